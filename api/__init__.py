@@ -1,3 +1,3 @@
 from .fastapi_server import FastAPIServer
 from .endpoints import APIRouter
-from .websocket_handler import WebSocketHandler
\ No newline at end of file
+from .websocket_handler import WebSocketHandler, get_websocket_handler
\ No newline at end of file
@@ -1,88 +1,192 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
+import asyncio
 import cv2
 import numpy as np
 import base64
+import math
+import time
+
+from smartcity_vision.utils.metrics import instrument_components
+from smartcity_vision.utils.detection_batch import DetectionBatch
+from .inference_service import get_inference_service, QueueFullError, ServiceUnavailableError
+from .ingest import get_image_ingestor, IngestError
+from .websocket_handler import get_websocket_handler
 
 router = APIRouter()
 
-@router.post("/analyze/traffic")
-async def analyze_traffic(file: UploadFile = File(...)):
-    contents = await file.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+def retry_headers(retry_after):
+    return {'Retry-After': str(max(math.ceil(retry_after), 1))}
+
+async def ingest_image(request, response, file, reduce=True):
+    service = get_inference_service()
+    ingestor = get_image_ingestor()
+    try:
+        if file is None:
+            ingested = await ingestor.ingest_raw(request)
+        else:
+            ingested = await ingestor.ingest_upload(file, service.run, reduce)
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e.retry_after))
+    
+    response.headers['Server-Timing'] = ingested.server_timing()
+    return ingested
+
+async def detect(ingested, model='default'):
+    try:
+        objects = await get_inference_service().detect(ingested.image, model)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_headers(e.retry_after))
+    except ServiceUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e.retry_after))
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {e.args[0]}")
+    return DetectionBatch.coerce(objects).scale(ingested.scale)
+
+def to_jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def instrument_analyzers(registry=None):
+    from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
+    from smartcity_vision.core.crowd_density import CrowdDensityAnalyzer
+    from smartcity_vision.core.parking_analyzer import ParkingAnalyzer
     
-    from smartcity_vision.core.object_detector import ObjectDetector
+    instrument_components(traffic_analyzer=TrafficAnalyzer, crowd_analyzer=CrowdDensityAnalyzer,
+                          parking_analyzer=ParkingAnalyzer, registry=registry)
+
+def run_traffic(objects, ingested):
     from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
     
-    detector = ObjectDetector()
     traffic_analyzer = TrafficAnalyzer()
-    
-    objects = detector.detect_objects(image)
-    analysis = traffic_analyzer.analyze_traffic_flow(objects, image.shape)
-    
-    return analysis
+    return traffic_analyzer.analyze_traffic_flow(objects, ingested.source_shape)
 
-@router.post("/analyze/crowd")
-async def analyze_crowd(file: UploadFile = File(...)):
-    contents = await file.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    from smartcity_vision.core.object_detector import ObjectDetector
+def run_crowd(objects, ingested):
     from smartcity_vision.core.crowd_density import CrowdDensityAnalyzer
     
-    detector = ObjectDetector()
     crowd_analyzer = CrowdDensityAnalyzer()
-    
-    objects = detector.detect_objects(image)
-    analysis = crowd_analyzer.analyze_crowd_density(objects, image.shape)
-    
-    return analysis
+    return crowd_analyzer.analyze_crowd_density(objects, ingested.source_shape)
 
-@router.post("/analyze/parking")
-async def analyze_parking(file: UploadFile = File(...)):
-    contents = await file.read()
-    nparr = np.frombuffer(contents, np.uint8)
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    from smartcity_vision.core.object_detector import ObjectDetector
+def run_parking(objects, ingested):
     from smartcity_vision.core.parking_analyzer import ParkingAnalyzer
     
-    detector = ObjectDetector()
     parking_analyzer = ParkingAnalyzer()
+    parking_analyzer.detect_parking_spots(ingested.image)
+    return parking_analyzer.analyze_parking_occupancy(objects, ingested.image)
+
+def run_pedestrian(objects, ingested):
+    from smartcity_vision.core.pedestrian_tracker import PedestrianTracker
     
-    objects = detector.detect_objects(image)
-    parking_spots = parking_analyzer.detect_parking_spots(image)
-    analysis = parking_analyzer.analyze_parking_occupancy(objects, image)
-    
-    return analysis
+    pedestrian_tracker = PedestrianTracker()
+    return pedestrian_tracker.analyze_pedestrian_flow(pedestrian_tracker.update_tracks(objects))
 
-# api/websocket_handler.py
-from fastapi import WebSocket
-import json
-import asyncio
+ANALYSIS_TASKS = {
+    'traffic': run_traffic,
+    'crowd': run_crowd,
+    'parking': run_parking,
+    'pedestrian': run_pedestrian
+}
+PIXEL_TASKS = ('parking',)
 
-class WebSocketHandler:
-    def __init__(self):
-        self.active_connections = []
+def parse_tasks(tasks):
+    selected = [task.strip() for task in tasks.split(',') if task.strip()] if tasks else list(ANALYSIS_TASKS)
+    unknown = [task for task in selected if task not in ANALYSIS_TASKS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown tasks: {', '.join(unknown)}; choose from {', '.join(ANALYSIS_TASKS)}")
+    return list(dict.fromkeys(selected))
+
+def publish_result(task, camera_id, analysis):
+    if 'density_map' in analysis:
+        analysis = {key: value for key, value in analysis.items() if key != 'density_map'}
+    get_websocket_handler().publish(analysis, f"{task}/{camera_id}")
+
+async def timed(timings, name, awaitable):
+    start_time = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = (time.perf_counter() - start_time) * 1000
+
+@router.post("/analyze/traffic")
+async def analyze_traffic(request: Request, response: Response, file: UploadFile = File(None), camera_id: str = 'api'):
+    ingested = await ingest_image(request, response, file)
+    objects = await detect(ingested)
+    analysis = await get_inference_service().run(run_traffic, objects, ingested)
+    publish_result('traffic', camera_id, analysis)
     
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    return analysis
+
+@router.post("/analyze/crowd")
+async def analyze_crowd(request: Request, response: Response, file: UploadFile = File(None), camera_id: str = 'api'):
+    ingested = await ingest_image(request, response, file)
+    objects = await detect(ingested)
+    analysis = await get_inference_service().run(run_crowd, objects, ingested)
+    publish_result('crowd', camera_id, analysis)
     
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+    return to_jsonable(analysis)
+
+@router.post("/analyze/parking")
+async def analyze_parking(request: Request, response: Response, file: UploadFile = File(None), camera_id: str = 'api'):
+    ingested = await ingest_image(request, response, file, reduce=False)
+    objects = await detect(ingested)
+    analysis = await get_inference_service().run(run_parking, objects, ingested)
+    publish_result('parking', camera_id, analysis)
     
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    return analysis
+
+@router.post("/analyze/all")
+async def analyze_all(request: Request, response: Response, file: UploadFile = File(None),
+                      tasks: str = Query(None), timings: bool = False, include_maps: bool = False,
+                      camera_id: str = 'api'):
+    selected = parse_tasks(tasks)
+    service = get_inference_service()
+    stage_times = {}
+    start_time = time.perf_counter()
+    
+    ingested = await ingest_image(request, response, file, reduce=not set(selected) & set(PIXEL_TASKS))
+    stage_times.update(read=ingested.read_time * 1000, decode=ingested.decode_time * 1000)
+    objects = await timed(stage_times, 'detect', detect(ingested))
+    results = await asyncio.gather(*(timed(stage_times, task, service.run(ANALYSIS_TASKS[task], objects, ingested))
+                                     for task in selected))
+    
+    analysis = {
+        'image_shape': list(ingested.source_shape),
+        'ingest': ingested.summary(),
+        'total_objects': len(objects),
+        'tasks': selected
+    }
+    analysis.update(zip(selected, results))
+    for task, result in zip(selected, results):
+        publish_result(task, camera_id, result)
+    if not include_maps and 'crowd' in analysis:
+        analysis['crowd'].pop('density_map', None)
+    if timings:
+        stage_times['total'] = (time.perf_counter() - start_time) * 1000
+        analysis['timings_ms'] = {name: round(value, 3) for name, value in stage_times.items()}
+    
+    return to_jsonable(analysis)
+
+@router.get("/websocket")
+async def websocket_stats():
+    return get_websocket_handler().get_stats()
+
+@router.get("/models")
+async def model_stats():
+    from smartcity_vision.core.model_registry import get_model_registry
     
-    async def broadcast(self, message: dict):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                disconnected.append(connection)
-        
-        for connection in disconnected:
-            self.active_connections.remove(connection)
\ No newline at end of file
+    return get_model_registry().stats()
+
+@router.get("/inference")
+async def inference_stats():
+    stats = get_inference_service().get_stats()
+    stats['ingest'] = get_image_ingestor().get_stats()
+    return stats
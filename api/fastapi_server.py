@@ -1,13 +1,29 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import json
 
+from smartcity_vision.core.model_registry import get_model_registry
+from smartcity_vision.utils.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from .endpoints import router, instrument_analyzers
+from .inference_service import get_inference_service
+from .ingest import get_image_ingestor, UploadLimitMiddleware
+from .websocket_handler import get_websocket_handler
+
 class FastAPIServer:
     def __init__(self, config):
         self.config = config
         self.app = FastAPI(title="SmartCity Vision API", version="1.0.0")
+        metrics.enabled = bool(config.get('metrics.enabled', False))
+        self.model_registry = get_model_registry(config)
+        self.inference_service = get_inference_service(config)
+        self.ingestor = get_image_ingestor(config)
+        self.websocket_handler = get_websocket_handler(config)
+        if metrics.enabled:
+            metrics.gauge('smartcity_model_registry_memory_bytes', 'Estimated memory held by loaded models',
+                          callback=self.model_registry.resident_memory)
+            instrument_analyzers()
         self.setup_middleware()
         self.setup_routes()
     
@@ -19,6 +35,7 @@ class FastAPIServer:
             allow_methods=["*"],
             allow_headers=["*"],
         )
+        self.app.add_middleware(UploadLimitMiddleware, max_bytes=self.ingestor.max_request_bytes)
     
     def setup_routes(self):
         @self.app.get("/")
@@ -28,6 +45,26 @@ class FastAPIServer:
         @self.app.get("/health")
         async def health():
             return {"status": "healthy"}
+        
+        @self.app.get("/metrics")
+        async def prometheus_metrics():
+            return Response(content=metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+        
+        @self.app.websocket("/ws")
+        async def websocket_updates(websocket: WebSocket, topics: str = Query('*'), encoding: str = Query(None)):
+            await self.websocket_handler.serve(websocket, topics.split(','), encoding)
+        
+        @self.app.on_event("startup")
+        async def load_models():
+            self.inference_service.start()
+            await self.inference_service.run(self.model_registry.preload,
+                                             self.config.get('model_registry.preload', ['default']))
+        
+        @self.app.on_event("shutdown")
+        async def stop_inference():
+            self.inference_service.stop()
+        
+        self.app.include_router(router)
     
     def run(self):
         uvicorn.run(
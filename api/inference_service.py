@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from smartcity_vision.core.batch_detector import MicroBatcher, QueueFullError
+from smartcity_vision.core.model_registry import get_model_registry
+
+class ServiceUnavailableError(RuntimeError):
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class InferenceService:
+    def __init__(self, detector_provider=None, executor_workers=None, max_batch_size=8, max_wait=0.01,
+                 max_queue_size=32):
+        self.detector_provider = detector_provider or (lambda name: get_model_registry().get(name))
+        self.executor_workers = executor_workers or min(4, os.cpu_count() or 1)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.executor = None
+        self.batchers = {}
+        self.lock = threading.Lock()
+        self.running = False
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            executor_workers=config.get('api.inference.executor_workers'),
+            max_batch_size=config.get('api.inference.max_batch_size', 8),
+            max_wait=config.get('api.inference.max_wait_ms', 10) / 1000,
+            max_queue_size=config.get('api.inference.max_queue_size', 32)
+        )
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix='inference')
+            self.running = True
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            batchers, self.batchers = self.batchers, {}
+        for batcher in batchers.values():
+            batcher.stop()
+        if self.executor:
+            self.executor.shutdown(wait=True)
+
+    async def run(self, func, *args, **kwargs):
+        if not self.running:
+            raise ServiceUnavailableError("Inference service is not running")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def batcher(self, name='default'):
+        batcher = self.batchers.get(name)
+        if batcher is not None:
+            return batcher
+
+        try:
+            await self.run(self.detector_provider, name)
+        except (KeyError, ServiceUnavailableError):
+            raise
+        except Exception as e:
+            raise ServiceUnavailableError(f"Model {name} failed to load: {e}", retry_after=5.0)
+
+        with self.lock:
+            if not self.running:
+                raise ServiceUnavailableError("Inference service is not running")
+            batcher = self.batchers.get(name)
+            if batcher is None:
+                batcher = MicroBatcher(max_batch_size=self.max_batch_size, max_wait=self.max_wait,
+                                       max_queue_size=self.max_queue_size,
+                                       detector_provider=functools.partial(self.detector_provider, name))
+                batcher.start()
+                self.batchers[name] = batcher
+        return batcher
+
+    async def detect(self, image, model='default'):
+        if not self.running:
+            raise ServiceUnavailableError("Inference service is not running")
+        batcher = await self.batcher(model)
+        return await asyncio.wrap_future(batcher.submit(image))
+
+    def get_stats(self):
+        with self.lock:
+            batchers = dict(self.batchers)
+        return {
+            'running': self.running,
+            'executor_workers': self.executor_workers,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_queue_size': self.max_queue_size,
+            'models': {name: batcher.get_stats() for name, batcher in batchers.items()}
+        }
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_inference_service(config=None):
+    global _service
+    with _service_lock:
+        if _service is None:
+            if config is None:
+                from smartcity_vision.utils.config_loader import ConfigLoader
+                config = ConfigLoader()
+            _service = InferenceService.from_config(config)
+            _service.start()
+        return _service
@@ -0,0 +1,336 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+RAW_DTYPES = {'uint8': np.uint8}
+
+class IngestError(ValueError):
+    status_code = 400
+
+class PayloadTooLargeError(IngestError):
+    status_code = 413
+
+class UnsupportedMediaError(IngestError):
+    status_code = 415
+
+class UnauthorizedSourceError(IngestError):
+    status_code = 403
+
+def jpeg_dimensions(data):
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    position = 2
+    while position + 9 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            position += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height = (data[position + 5] << 8) | data[position + 6]
+            width = (data[position + 7] << 8) | data[position + 8]
+            return width, height
+        position += 2 + ((data[position + 2] << 8) | data[position + 3])
+    return None
+
+def png_dimensions(data):
+    if len(data) < 24 or bytes(data[:8]) != PNG_SIGNATURE:
+        return None
+    return int.from_bytes(bytes(data[16:20]), 'big'), int.from_bytes(bytes(data[20:24]), 'big')
+
+def image_dimensions(data):
+    data = memoryview(data).cast('B')
+    dimensions = jpeg_dimensions(data)
+    if dimensions:
+        return 'jpeg', dimensions
+    dimensions = png_dimensions(data)
+    if dimensions:
+        return 'png', dimensions
+    return None, None
+
+class IngestedImage:
+    def __init__(self, image, source, source_shape, scale=1, size=0, read_time=0.0, decode_time=0.0):
+        self.image = image
+        self.source = source
+        self.source_shape = tuple(source_shape)
+        self.scale = scale
+        self.size = size
+        self.read_time = read_time
+        self.decode_time = decode_time
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def server_timing(self):
+        return f"read;dur={self.read_time * 1000:.3f}, decode;dur={self.decode_time * 1000:.3f}"
+
+    def summary(self):
+        return {
+            'source': self.source,
+            'source_shape': list(self.source_shape),
+            'shape': list(self.image.shape),
+            'scale': self.scale,
+            'bytes': self.size,
+            'read_ms': round(self.read_time * 1000, 3),
+            'decode_ms': round(self.decode_time * 1000, 3)
+        }
+
+class ImageIngestor:
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_pixels=7680 * 4320, target_size=640, reduced_decode=True,
+                 chunk_size=256 * 1024, raw_frames=False, raw_token=None):
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.target_size = target_size
+        self.reduced_decode = reduced_decode
+        self.chunk_size = chunk_size
+        self.raw_frames = raw_frames
+        self.raw_token = raw_token
+        self.lock = threading.Lock()
+        self.stats = {'images': 0, 'rejected': 0, 'bytes': 0, 'reduced': 0, 'raw': 0, 'read_time': 0.0,
+                      'decode_time': 0.0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_bytes=int(config.get('api.ingest.max_upload_mb', 16) * 1024 * 1024),
+            max_pixels=config.get('api.ingest.max_pixels', 7680 * 4320),
+            target_size=config.get('api.ingest.target_size') or config.get('object_detection.image_size', 640),
+            reduced_decode=config.get('api.ingest.reduced_decode', True),
+            chunk_size=config.get('api.ingest.chunk_kb', 256) * 1024,
+            raw_frames=config.get('api.ingest.raw_frames.enabled', False),
+            raw_token=config.get('api.ingest.raw_frames.token')
+        )
+
+    @property
+    def max_request_bytes(self):
+        if self.raw_frames:
+            return max(self.max_bytes, self.max_pixels * 3)
+        return self.max_bytes
+
+    def reduction(self, source, width, height):
+        if source != 'jpeg' or not self.reduced_decode or not self.target_size:
+            return 1, cv2.IMREAD_COLOR
+        for factor, flag in REDUCED_DECODE_FLAGS:
+            if max(width, height) // factor >= self.target_size:
+                return factor, flag
+        return 1, cv2.IMREAD_COLOR
+
+    def check_pixels(self, width, height):
+        if width <= 0 or height <= 0:
+            raise IngestError(f"Invalid image dimensions {width}x{height}")
+        if width * height > self.max_pixels:
+            raise PayloadTooLargeError(f"Image is {width}x{height}; the limit is {self.max_pixels} pixels")
+
+    def decode(self, buffer, size, reduce=True):
+        start_time = time.perf_counter()
+        source, dimensions = image_dimensions(buffer[:size])
+        if source is None:
+            raise UnsupportedMediaError("Only JPEG and PNG uploads are supported")
+        width, height = dimensions
+        self.check_pixels(width, height)
+
+        factor, flag = self.reduction(source, width, height) if reduce else (1, cv2.IMREAD_COLOR)
+        image = cv2.imdecode(buffer[:size], flag)
+        if image is None:
+            raise IngestError("Could not decode image")
+        return IngestedImage(image, source, (height, width, 3), factor, size,
+                             decode_time=time.perf_counter() - start_time)
+
+    def read_into(self, stream, buffer):
+        view = memoryview(buffer)
+        filled = 0
+        while filled < len(view):
+            count = stream.readinto(view[filled:filled + self.chunk_size])
+            if not count:
+                break
+            filled += count
+        return filled
+
+    async def read_upload(self, file, run):
+        size = file.size
+        if size is not None:
+            if size > self.max_bytes:
+                raise PayloadTooLargeError(f"Upload is {size} bytes; the limit is {self.max_bytes}")
+            buffer = np.empty(size, dtype=np.uint8)
+            await file.seek(0)
+            filled = await run(self.read_into, file.file, buffer)
+        else:
+            buffer = np.empty(self.chunk_size, dtype=np.uint8)
+            filled = 0
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                if filled + len(chunk) > self.max_bytes:
+                    raise PayloadTooLargeError(f"Upload exceeds the limit of {self.max_bytes} bytes")
+                if filled + len(chunk) > len(buffer):
+                    buffer = np.resize(buffer, max(filled + len(chunk), 2 * len(buffer)))
+                buffer[filled:filled + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+                filled += len(chunk)
+
+        if not filled:
+            raise IngestError("Empty upload")
+        return buffer, filled
+
+    async def ingest_upload(self, file, run, reduce=True):
+        try:
+            start_time = time.perf_counter()
+            buffer, size = await self.read_upload(file, run)
+            read_time = time.perf_counter() - start_time
+            ingested = await run(self.decode, buffer, size, reduce)
+        except IngestError:
+            self.record_rejection()
+            raise
+
+        ingested.read_time = read_time
+        self.record(ingested)
+        return ingested
+
+    def parse_raw_headers(self, headers):
+        if not self.raw_frames:
+            raise UnsupportedMediaError("Raw frame uploads are disabled")
+        if self.raw_token and headers.get('x-gateway-token') != self.raw_token:
+            raise UnauthorizedSourceError("Raw frame uploads require a valid gateway token")
+
+        dtype = RAW_DTYPES.get(headers.get('x-frame-dtype', 'uint8'))
+        if dtype is None:
+            raise UnsupportedMediaError(f"Supported raw dtypes: {', '.join(RAW_DTYPES)}")
+        try:
+            shape = tuple(int(value) for value in headers['x-frame-shape'].split(','))
+        except (KeyError, ValueError):
+            raise IngestError("Raw frames need an X-Frame-Shape header such as 720,1280,3")
+        if len(shape) not in (2, 3) or (len(shape) == 3 and shape[2] not in (1, 3)):
+            raise IngestError(f"Unsupported raw frame shape {shape}")
+        self.check_pixels(shape[1], shape[0])
+
+        expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        length = headers.get('content-length')
+        if length is not None and int(length) != expected:
+            raise IngestError(f"Raw frame of shape {shape} needs {expected} bytes, got {length}")
+        return shape, dtype, expected
+
+    async def ingest_raw(self, request):
+        try:
+            start_time = time.perf_counter()
+            shape, dtype, expected = self.parse_raw_headers(request.headers)
+            frame = np.empty(shape, dtype=dtype)
+            flat = frame.reshape(-1).view(np.uint8)
+            filled = 0
+            async for chunk in request.stream():
+                if filled + len(chunk) > expected:
+                    raise IngestError(f"Raw frame body is larger than {expected} bytes")
+                flat[filled:filled + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+                filled += len(chunk)
+            if filled != expected:
+                raise IngestError(f"Raw frame body has {filled} bytes, expected {expected}")
+        except IngestError:
+            self.record_rejection()
+            raise
+
+        if frame.ndim == 2 or frame.shape[2] == 1:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        ingested = IngestedImage(frame, 'raw', frame.shape, 1, expected, read_time=time.perf_counter() - start_time)
+        self.record(ingested)
+        return ingested
+
+    def record(self, ingested):
+        with self.lock:
+            self.stats['images'] += 1
+            self.stats['bytes'] += ingested.size
+            self.stats['reduced'] += ingested.scale > 1
+            self.stats['raw'] += ingested.source == 'raw'
+            self.stats['read_time'] += ingested.read_time
+            self.stats['decode_time'] += ingested.decode_time
+
+    def record_rejection(self):
+        with self.lock:
+            self.stats['rejected'] += 1
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        images = max(stats['images'], 1)
+        return {
+            'images': stats['images'],
+            'rejected': stats['rejected'],
+            'bytes': stats['bytes'],
+            'reduced_decodes': stats['reduced'],
+            'raw_frames': stats['raw'],
+            'avg_read_ms': stats.pop('read_time') / images * 1000,
+            'avg_decode_ms': stats.pop('decode_time') / images * 1000,
+            'max_bytes': self.max_bytes,
+            'max_pixels': self.max_pixels,
+            'target_size': self.target_size if self.reduced_decode else None
+        }
+
+class UploadLimitMiddleware:
+    def __init__(self, app, max_bytes, prefix='/analyze'):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.max_bytes() if callable(self.max_bytes) else self.max_bytes
+        headers = dict(scope['headers'])
+        length = headers.get(b'content-length')
+        if length is not None and length.isdigit() and int(length) > max_bytes:
+            await self.reject(send, max_bytes)
+            return
+
+        received = 0
+        rejected = False
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message['type'] == 'http.request' and not rejected:
+                received += len(message.get('body', b''))
+                if received > max_bytes:
+                    rejected = True
+                    await self.reject(send, max_bytes)
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+
+    async def reject(self, send, max_bytes):
+        body = f'{{"detail": "Request body exceeds {max_bytes} bytes"}}'.encode()
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+def get_image_ingestor(config=None):
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            if config is None:
+                from smartcity_vision.utils.config_loader import ConfigLoader
+                config = ConfigLoader()
+            _ingestor = ImageIngestor.from_config(config)
+        return _ingestor
@@ -0,0 +1,268 @@
+from fastapi import WebSocket, WebSocketDisconnect
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+import itertools
+import json
+import logging
+import threading
+import time
+import zlib
+import asyncio
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+def json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(message):
+    return json.dumps(message, separators=(',', ':'), default=json_default)
+
+def encode_deflate(message):
+    return zlib.compress(encode_json(message).encode(), 6)
+
+def encode_msgpack(message):
+    return msgpack.packb(message, default=json_default, use_bin_type=True)
+
+def parse_topics(topics):
+    if isinstance(topics, str):
+        topics = [topics]
+    if not isinstance(topics, (list, tuple)) or not all(isinstance(topic, str) and topic for topic in topics):
+        raise ValueError("Topics must be a topic string or a list of topic strings")
+    return list(topics)
+
+ENCODERS = {
+    'json': encode_json,
+    'deflate': encode_deflate
+}
+if msgpack is not None:
+    ENCODERS['msgpack'] = encode_msgpack
+
+class ClientConnection:
+    def __init__(self, websocket, topics=('*',), encoding='json', max_queue_size=32, send_timeout=5.0):
+        self.websocket = websocket
+        self.topics = set(topics)
+        self.encoding = encoding
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.pending = OrderedDict()
+        self.ready = asyncio.Event()
+        self.sequence = itertools.count()
+        self.task = None
+        self.closed = False
+        self.stats = {'sent': 0, 'dropped': 0, 'coalesced': 0}
+
+    def matches(self, topic):
+        return topic is None or any(fnmatchcase(topic, pattern) for pattern in self.topics)
+
+    def enqueue(self, payload, key=None):
+        if key is not None and key in self.pending:
+            self.pending[key] = payload
+            self.pending.move_to_end(key)
+            self.stats['coalesced'] += 1
+        else:
+            if len(self.pending) >= self.max_queue_size:
+                self.pending.popitem(last=False)
+                self.stats['dropped'] += 1
+            self.pending[key if key is not None else ('message', next(self.sequence))] = payload
+        self.ready.set()
+
+    async def send(self, payload):
+        if isinstance(payload, bytes):
+            await self.websocket.send_bytes(payload)
+        else:
+            await self.websocket.send_text(payload)
+
+    async def drain(self):
+        try:
+            while not self.closed:
+                await self.ready.wait()
+                self.ready.clear()
+                while self.pending and not self.closed:
+                    _, payload = self.pending.popitem(last=False)
+                    if hasattr(asyncio, 'timeout'):
+                        async with asyncio.timeout(self.send_timeout):
+                            await self.send(payload)
+                    else:
+                        await asyncio.wait_for(self.send(payload), self.send_timeout)
+                    self.stats['sent'] += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("Closing websocket client that stalled for more than %.1fs", self.send_timeout)
+        except Exception as e:
+            logger.info("Websocket client disconnected while sending: %s", e)
+        self.closed = True
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1011), 1.0)
+        except Exception:
+            pass
+
+    def get_stats(self):
+        return dict(self.stats, queued=len(self.pending), topics=sorted(self.topics), encoding=self.encoding)
+
+class WebSocketHandler:
+    def __init__(self, max_queue_size=32, send_timeout=5.0, default_encoding='json', max_routes=256):
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self.default_encoding = default_encoding
+        self.max_routes = max_routes
+        self.clients = {}
+        self.routes = OrderedDict()
+        self.loop = None
+        self.stats = {'published': 0, 'delivered': 0, 'serialized': 0, 'fanout_time': 0.0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_queue_size=config.get('api.websocket.max_queue_size', 32),
+            send_timeout=config.get('api.websocket.send_timeout', 5.0),
+            default_encoding=config.get('api.websocket.encoding', 'json'),
+            max_routes=config.get('api.websocket.max_routes', 256)
+        )
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
+
+    async def connect(self, websocket: WebSocket, topics=('*',), encoding=None):
+        encoding = encoding or self.default_encoding
+        if encoding not in ENCODERS:
+            reason = "msgpack is not installed" if encoding == 'msgpack' else f"Unknown encoding {encoding}"
+            await websocket.close(code=1003, reason=reason)
+            return None
+
+        await websocket.accept()
+        self.loop = asyncio.get_running_loop()
+        client = ClientConnection(websocket, parse_topics(topics), encoding, self.max_queue_size, self.send_timeout)
+        client.task = asyncio.create_task(client.drain())
+        client.task.add_done_callback(lambda _: self.disconnect(websocket))
+        self.clients[websocket] = client
+        self.routes.clear()
+        return client
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        client.closed = True
+        client.ready.set()
+        if client.task is not None and not client.task.done():
+            client.task.cancel()
+        self.routes.clear()
+
+    def subscribe(self, websocket, topics):
+        self.clients[websocket].topics.update(parse_topics(topics))
+        self.routes.clear()
+
+    def unsubscribe(self, websocket, topics):
+        self.clients[websocket].topics.difference_update(parse_topics(topics))
+        self.routes.clear()
+
+    def subscribers(self, topic):
+        clients = self.routes.get(topic)
+        if clients is not None:
+            self.routes.move_to_end(topic)
+            return clients
+
+        clients = [client for client in self.clients.values() if client.matches(topic)]
+        if clients:
+            self.routes[topic] = clients
+            if len(self.routes) > self.max_routes:
+                self.routes.popitem(last=False)
+        return clients
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        await websocket.send_text(message)
+
+    def publish(self, message, topic=None, coalesce=True):
+        start_time = time.perf_counter()
+        clients = self.subscribers(topic)
+        if not clients:
+            return 0
+
+        envelope = {'topic': topic, 'timestamp': time.time(), 'data': message} if topic is not None else message
+        key = topic if coalesce and topic is not None else None
+        payloads = {}
+        for client in clients:
+            payload = payloads.get(client.encoding)
+            if payload is None:
+                payload = payloads[client.encoding] = ENCODERS[client.encoding](envelope)
+            client.enqueue(payload, key)
+
+        self.stats['published'] += 1
+        self.stats['delivered'] += len(clients)
+        self.stats['serialized'] += len(payloads)
+        self.stats['fanout_time'] += time.perf_counter() - start_time
+        return len(clients)
+
+    def publish_threadsafe(self, message, topic=None, coalesce=True):
+        if self.loop is None or self.loop.is_closed() or not self.clients:
+            return
+        self.loop.call_soon_threadsafe(self.publish, message, topic, coalesce)
+
+    async def broadcast(self, message: dict, topic=None):
+        return self.publish(message, topic, coalesce=False)
+
+    def handle_request(self, websocket, request):
+        if not isinstance(request, dict):
+            raise ValueError("Requests must be JSON objects")
+        subscribe = parse_topics(request['subscribe']) if 'subscribe' in request else []
+        unsubscribe = parse_topics(request['unsubscribe']) if 'unsubscribe' in request else []
+        if subscribe:
+            self.subscribe(websocket, subscribe)
+        if unsubscribe:
+            self.unsubscribe(websocket, unsubscribe)
+
+    async def serve(self, websocket: WebSocket, topics=('*',), encoding=None):
+        client = await self.connect(websocket, topics, encoding)
+        if client is None:
+            return
+        try:
+            while not client.closed:
+                message = await websocket.receive_text()
+                try:
+                    self.handle_request(websocket, json.loads(message))
+                except ValueError as e:
+                    client.enqueue(ENCODERS[client.encoding]({'error': str(e)}))
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            self.disconnect(websocket)
+
+    def get_stats(self):
+        published = max(self.stats['published'], 1)
+        return {
+            'clients': len(self.clients),
+            'published': self.stats['published'],
+            'delivered': self.stats['delivered'],
+            'serialized': self.stats['serialized'],
+            'avg_fanout_ms': self.stats['fanout_time'] / published * 1000,
+            'max_queue_size': self.max_queue_size,
+            'connections': [client.get_stats() for client in self.clients.values()]
+        }
+
+_handler = None
+_handler_lock = threading.Lock()
+
+def get_websocket_handler(config=None):
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            if config is None:
+                from smartcity_vision.utils.config_loader import ConfigLoader
+                config = ConfigLoader()
+            _handler = WebSocketHandler.from_config(config)
+        return _handler
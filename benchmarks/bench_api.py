@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import cv2
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import smartcity_vision.api.inference_service as inference_service
+from smartcity_vision.api.endpoints import router
+from smartcity_vision.api.inference_service import InferenceService
+from smartcity_vision.data.sample_data import create_sample_frame
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+
+def build_service(args, max_batch_size):
+    detector = StubDetector(inference_time=args.stub_latency, batch_scaling=args.batch_scaling)
+    return InferenceService(lambda name: detector, max_batch_size=max_batch_size, max_wait=args.max_wait_ms / 1000,
+                            max_queue_size=args.max_queue_size)
+
+async def run_case(args, payload, max_batch_size, concurrency):
+    service = build_service(args, max_batch_size)
+    service.start()
+    inference_service._service = service
+
+    app = FastAPI()
+    app.include_router(router)
+    latencies = []
+    statuses = {}
+
+    async def client_loop(client, deadline):
+        while time.perf_counter() < deadline:
+            start_time = time.perf_counter()
+            response = await client.post('/analyze/traffic', files={'file': ('frame.jpg', payload, 'image/jpeg')})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start_time)
+            else:
+                await asyncio.sleep(float(response.headers.get('Retry-After', 1)) / 100)
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            await client.post('/analyze/traffic', files={'file': ('frame.jpg', payload, 'image/jpeg')})
+            start_time = time.perf_counter()
+            deadline = start_time + args.duration
+            await asyncio.gather(*(client_loop(client, deadline) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start_time
+        stats = service.get_stats()['models']['default']
+    finally:
+        service.stop()
+        inference_service._service = None
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'avg_batch_size': stats['avg_batch_size'],
+        'statuses': statuses
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure API throughput under concurrent requests')
+    parser.add_argument('--concurrency', type=str, default='1,2,4,8,16', help='Comma-separated client counts')
+    parser.add_argument('--batch-sizes', type=str, default='1,8', help='Comma-separated max batch sizes to compare')
+    parser.add_argument('--duration', type=float, default=3.0, help='Seconds per case')
+    parser.add_argument('--stub-latency', type=float, default=0.02, help='Stub inference time for one image')
+    parser.add_argument('--batch-scaling', type=float, default=0.15,
+                        help='Extra stub cost per additional image in a batch, relative to one image')
+    parser.add_argument('--max-wait-ms', type=float, default=10, help='Max queueing delay before a batch runs')
+    parser.add_argument('--max-queue-size', type=int, default=32, help='Requests queued before rejecting with 429')
+    parser.add_argument('--size', type=str, default='640x480', help='Uploaded image size')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    payload = cv2.imencode('.jpg', create_sample_frame(width, height, seed=0)[0])[1].tobytes()
+
+    results = {}
+    for max_batch_size in (int(value) for value in args.batch_sizes.split(',')):
+        for concurrency in (int(value) for value in args.concurrency.split(',')):
+            case = f"batch{max_batch_size}/c{concurrency}"
+            results[case] = asyncio.run(run_case(args, payload, max_batch_size, concurrency))
+            result = results[case]
+            print(f"{case:14s} {result['throughput']:7.1f} req/s | p50 {result['p50_ms']:7.1f} ms | "
+                  f"p95 {result['p95_ms']:7.1f} ms | batch {result['avg_batch_size']:.1f} | {result['statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.core.object_detector import ObjectDetector
+from smartcity_vision.data.sample_data import create_sample_frame
+from smartcity_vision.utils.box_utils import to_box_array, box_iou_matrix
+from smartcity_vision.benchmarks.bench_utils import StageTimer, format_summary
+
+def parse_variant(value):
+    backend, _, quantization = value.partition(':')
+    return backend, quantization or None
+
+def build_detector(args, backend, quantization):
+    model_type = args.arch if backend == 'eager' else f"{args.arch}_{backend}"
+    return ObjectDetector(model_type=model_type, model_path=args.weights, confidence_threshold=args.confidence,
+                          repo_path=args.repo_path, quantization=quantization, image_size=args.image_size,
+                          num_threads=args.threads)
+
+def agreement(reference, objects, iou_threshold=0.5):
+    if not reference:
+        return 1.0 if not objects else 0.0
+
+    ious = box_iou_matrix(to_box_array([obj['bbox'] for obj in reference]),
+                          to_box_array([obj['bbox'] for obj in objects]))
+    matched = ious.max(axis=1) >= iou_threshold if ious.size else np.zeros(len(reference), dtype=bool)
+    return float(matched.mean())
+
+def run_variant(args, frames, backend, quantization):
+    start_time = time.perf_counter()
+    detector = build_detector(args, backend, quantization)
+    load_time = time.perf_counter() - start_time
+
+    for frame in frames[:args.warmup]:
+        detector.detect_objects(frame)
+
+    timer = StageTimer()
+    outputs = []
+    for index in range(args.frames):
+        frame = frames[index % len(frames)]
+        with timer.time('inference'):
+            objects = detector.detect_objects(frame)
+        if index < len(frames):
+            outputs.append(objects)
+
+    return timer.summary(), outputs, load_time
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ObjectDetector inference backends on CPU')
+    parser.add_argument('--weights', type=str, required=True, help='Local detector weights')
+    parser.add_argument('--arch', type=str, default='yolov5', help='Model architecture (yolov5 or faster_rcnn)')
+    parser.add_argument('--repo-path', type=str, help='Local YOLOv5 repository')
+    parser.add_argument('--variants', type=str, default='eager,torchscript,torchscript:dynamic,onnx,onnx:dynamic',
+                        help='Comma-separated backend[:quantization] variants')
+    parser.add_argument('--size', type=str, default='1280x720', help='Frame size')
+    parser.add_argument('--image-size', type=int, default=640, help='Model input size for exported YOLOv5 models')
+    parser.add_argument('--threads', type=int, help='CPU threads for the runtime')
+    parser.add_argument('--frames', type=int, default=30, help='Measured frames per variant')
+    parser.add_argument('--warmup', type=int, default=3, help='Warmup frames per variant')
+    parser.add_argument('--unique-frames', type=int, default=4, help='Distinct synthetic frames to cycle through')
+    parser.add_argument('--confidence', type=float, default=0.5, help='Confidence threshold')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    frames = [create_sample_frame(width, height, seed=i)[0] for i in range(args.unique_frames)]
+
+    results = {}
+    reference = None
+    for variant in args.variants.split(','):
+        backend, quantization = parse_variant(variant)
+        try:
+            summary, outputs, load_time = run_variant(args, frames, backend, quantization)
+        except (ImportError, RuntimeError, ValueError) as e:
+            print(f"{variant}: skipped ({e})")
+            continue
+
+        if reference is None:
+            reference = outputs
+        summary['agreement'] = float(np.mean([agreement(ref, out) for ref, out in zip(reference, outputs)]))
+        summary['load_time'] = load_time
+        results[variant] = summary
+
+        print(format_summary(variant, {'inference': summary['inference']}))
+        print(f"  load {load_time:.1f} s | agreement with {args.variants.split(',')[0]} "
+              f"{summary['agreement'] * 100:.1f}%")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.api.ingest import ImageIngestor
+from smartcity_vision.data.sample_data import create_sample_frame
+from smartcity_vision.benchmarks.bench_utils import StageTimer, format_summary
+
+SIZES = {'720p': (720, 1280), '1080p': (1080, 1920), '4k': (2160, 3840)}
+
+def run_case(ingestor, payload, frame, iterations):
+    buffer = np.frombuffer(payload, dtype=np.uint8).copy()
+    timer = StageTimer()
+    for _ in range(iterations):
+        with timer.time('full_decode'):
+            cv2.imdecode(np.frombuffer(bytes(payload), np.uint8), cv2.IMREAD_COLOR)
+        with timer.time('ingest_decode'):
+            ingested = ingestor.decode(buffer, len(buffer))
+        with timer.time('raw_frame'):
+            raw = np.empty(frame.shape, dtype=np.uint8)
+            raw.reshape(-1)[:] = np.frombuffer(frame.data, dtype=np.uint8)
+    return timer.summary(), list(ingested.shape)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full-resolution decoding against the API ingest path')
+    parser.add_argument('--sizes', type=str, default='720p,1080p,4k', help='Comma-separated frame sizes')
+    parser.add_argument('--iterations', type=int, default=50, help='Decodes per case')
+    parser.add_argument('--target-size', type=int, default=640, help='Model input size for reduced decoding')
+    parser.add_argument('--quality', type=int, default=90, help='JPEG quality of the test payloads')
+    parser.add_argument('--blur', type=float, default=3.0,
+                        help='Gaussian sigma applied to the noise background so payloads compress like camera frames')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+    ingestor = ImageIngestor(target_size=args.target_size)
+
+    results = {}
+    for size in args.sizes.split(','):
+        height, width = SIZES[size]
+        frame = create_sample_frame(width, height, seed=0)[0]
+        if args.blur:
+            frame = cv2.GaussianBlur(frame, (0, 0), args.blur)
+        payload = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])[1].tobytes()
+        summary, decoded_shape = run_case(ingestor, payload, frame, args.iterations)
+        results[size] = {'summary': summary, 'bytes': len(payload), 'decoded_shape': decoded_shape}
+        print(format_summary(f"{size} ({len(payload) // 1024} KiB -> {decoded_shape[1]}x{decoded_shape[0]})", summary))
+
+        speedup = summary['full_decode']['p50_ms'] / summary['ingest_decode']['p50_ms']
+        print(f"  {size}: ingest decode p50 speedup {speedup:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.utils.shared_frames import SharedFrameChannel
+from smartcity_vision.benchmarks.bench_utils import StageTimer, format_summary
+
+SIZES = {'720p': (720, 1280), '1080p': (1080, 1920), '4k': (2160, 3840)}
+
+def consumer(channel, task_queue, ack_queue):
+    while True:
+        payload = task_queue.get()
+        if payload is None:
+            break
+        if channel is not None:
+            frame = channel.view(payload)
+            checksum = int(frame[::64, ::64].sum())
+            channel.release(payload)
+        else:
+            checksum = int(payload[::64, ::64].sum())
+        ack_queue.put(checksum)
+    if channel is not None:
+        channel.close()
+
+def run_transport(context, transport, frames, iterations, slots):
+    channel = SharedFrameChannel(frames[0].shape, slots) if transport == 'shared_memory' else None
+    task_queue, ack_queue = context.Queue(), context.Queue()
+    process = context.Process(target=consumer, args=(channel, task_queue, ack_queue), daemon=True)
+    process.start()
+
+    timer = StageTimer()
+    try:
+        for index in range(iterations):
+            frame = frames[index % len(frames)]
+            start_time = time.perf_counter()
+            if channel is not None:
+                payload = channel.write(frame, index, time.time())
+            else:
+                payload = frame
+            task_queue.put(payload)
+            checksum = ack_queue.get()
+            timer.record('transfer', time.perf_counter() - start_time)
+            if checksum != int(frame[::64, ::64].sum()):
+                raise RuntimeError(f"{transport} delivered a corrupted frame")
+    finally:
+        task_queue.put(None)
+        process.join()
+        if channel is not None:
+            channel.close()
+            channel.unlink()
+
+    return timer.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare shared-memory frame transport against queue pickling')
+    parser.add_argument('--sizes', type=str, default='720p,1080p,4k', help='Comma-separated frame sizes')
+    parser.add_argument('--iterations', type=int, default=200, help='Frames sent per case')
+    parser.add_argument('--slots', type=int, default=4, help='Shared-memory slots')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+    context = multiprocessing.get_context('spawn')
+    rng = np.random.default_rng(0)
+
+    results = {}
+    for size in args.sizes.split(','):
+        height, width = SIZES[size]
+        frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(2)]
+        for transport in ('pickle_queue', 'shared_memory'):
+            case = f"{size}/{transport}"
+            results[case] = run_transport(context, transport, frames, args.iterations, args.slots)
+            print(format_summary(case, results[case]))
+
+        speedup = results[f"{size}/pickle_queue"]['transfer']['p50_ms'] / \
+            results[f"{size}/shared_memory"]['transfer']['p50_ms']
+        print(f"  {size}: shared memory p50 speedup {speedup:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
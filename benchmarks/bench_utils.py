@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def time(self, stage):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start_time)
+
+    def record(self, stage, duration):
+        self.samples[stage].append(duration)
+
+    def summary(self):
+        results = {}
+        for stage, samples in self.samples.items():
+            latencies = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            results[stage] = {
+                'count': len(samples),
+                'mean_ms': float(latencies.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'fps': float(1000 / latencies.mean()) if latencies.mean() > 0 else 0.0
+            }
+        return results
+
+def format_summary(name, summary):
+    lines = [name]
+    for stage, stats in summary.items():
+        lines.append(f"  {stage:<12} p50 {stats['p50_ms']:8.2f} ms | p95 {stats['p95_ms']:8.2f} ms | "
+                     f"p99 {stats['p99_ms']:8.2f} ms | {stats['fps']:8.1f} fps")
+    return '\n'.join(lines)
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def save_baseline(path, results):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+def compare_to_baseline(results, baseline, tolerance=0.2, metric='p50_ms', min_delta_ms=0.05):
+    regressions = []
+    for case, stages in results.items():
+        for stage, stats in stages.items():
+            reference = baseline.get(case, {}).get(stage)
+            if reference is None:
+                continue
+
+            current_value = stats[metric]
+            reference_value = reference[metric]
+            if current_value > reference_value * (1 + tolerance) and current_value - reference_value > min_delta_ms:
+                regressions.append({
+                    'case': case,
+                    'stage': stage,
+                    'baseline': reference_value,
+                    'current': current_value,
+                    'ratio': current_value / reference_value if reference_value > 0 else float('inf')
+                })
+    return regressions
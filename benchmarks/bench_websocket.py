@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.api.websocket_handler import WebSocketHandler
+from smartcity_vision.benchmarks.bench_utils import StageTimer, format_summary
+
+class Delivery:
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.done = asyncio.Event()
+
+    def reset(self):
+        self.count = 0
+        self.done.clear()
+
+    def record(self):
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+class BenchSocket:
+    def __init__(self, delivery, latency=0.0):
+        self.delivery = delivery
+        self.latency = latency
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+    async def deliver(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += 1
+        if not self.latency:
+            self.delivery.record()
+
+    async def send_text(self, payload):
+        await self.deliver()
+
+    async def send_bytes(self, payload):
+        await self.deliver()
+
+    async def send_json(self, message):
+        json.dumps(message)
+        await self.deliver()
+
+async def sequential_broadcast(sockets, message):
+    for socket in sockets:
+        await socket.send_json(message)
+
+async def run_case(mode, args, message):
+    delivery = Delivery(args.clients - args.slow_clients)
+    sockets = [BenchSocket(delivery, args.slow_latency if index < args.slow_clients else 0.0)
+               for index in range(args.clients)]
+    handler = WebSocketHandler(max_queue_size=args.queue_size, send_timeout=30.0)
+    if mode == 'queued':
+        for index, socket in enumerate(sockets):
+            await handler.connect(socket, [f"traffic/camera_{index % args.cameras}", 'alerts/*'], args.encoding)
+
+    timer = StageTimer()
+    for index in range(args.messages):
+        delivery.reset()
+        start_time = time.perf_counter()
+        if mode == 'queued':
+            for camera in range(args.cameras):
+                handler.publish(message, f"traffic/camera_{camera}")
+            timer.record('publish', time.perf_counter() - start_time)
+        else:
+            await sequential_broadcast(sockets, message)
+            timer.record('publish', time.perf_counter() - start_time)
+        await delivery.done.wait()
+        timer.record('fast_clients', time.perf_counter() - start_time)
+
+    for socket in list(handler.clients):
+        handler.disconnect(socket)
+    await asyncio.sleep(0)
+    return timer.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sequential websocket broadcast with queued per-client fan-out')
+    parser.add_argument('--clients', type=int, default=500, help='Connected clients')
+    parser.add_argument('--slow-clients', type=int, default=5, help='Clients whose sends stall')
+    parser.add_argument('--slow-latency', type=float, default=0.05, help='Seconds each send takes on a slow client')
+    parser.add_argument('--cameras', type=int, default=1, help='Camera topics clients are spread across')
+    parser.add_argument('--messages', type=int, default=20, help='Updates published per case')
+    parser.add_argument('--queue-size', type=int, default=32, help='Per-client outbound queue bound')
+    parser.add_argument('--encoding', type=str, default='json', help='json, deflate or msgpack')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    message = {
+        'vehicle_count': {'car': 12, 'bus': 2, 'truck': 3},
+        'traffic_density': 14.2,
+        'congestion_level': 'Medium',
+        'objects': [{'bbox': rng.integers(0, 640, 4).tolist(), 'confidence': 0.9, 'class_name': 'car'}
+                    for _ in range(40)]
+    }
+
+    results = {}
+    for mode in ('sequential', 'queued'):
+        results[mode] = asyncio.run(run_case(mode, args, message))
+        print(format_summary(f"{mode} ({args.clients} clients, {args.slow_clients} slow)", results[mode]))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
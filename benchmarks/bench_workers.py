@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.core.detector_pool import DetectorPool, available_cpus
+from smartcity_vision.core.object_detector import ObjectDetector
+from smartcity_vision.data.sample_data import create_sample_frame
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+
+def build_pool(args, num_workers):
+    if args.weights:
+        factory, kwargs = ObjectDetector, {'model_type': args.model_type, 'model_path': args.weights,
+                                           'repo_path': args.repo_path}
+    else:
+        factory, kwargs = StubDetector, {'inference_time': args.stub_latency, 'busy_wait': True}
+    return DetectorPool(num_workers, factory, kwargs, threads_per_worker=args.threads_per_worker,
+                        pin_cpus=not args.no_pin, max_pending=args.max_pending, max_batch_size=args.max_batch_size)
+
+def run_case(args, frames, num_workers):
+    pool = build_pool(args, num_workers)
+    pool.start(timeout=300)
+    try:
+        in_flight = {camera: [] for camera in range(args.cameras)}
+        completed = 0
+        start_time = time.perf_counter()
+        deadline = start_time + args.duration
+        index = 0
+        while time.perf_counter() < deadline:
+            for camera, futures in in_flight.items():
+                completed += sum(future.done() for future in futures)
+                futures[:] = [future for future in futures if not future.done()]
+                if len(futures) < args.camera_queue:
+                    future = pool.submit(frames[index % len(frames)], camera)
+                    if future is not None:
+                        futures.append(future)
+            index += 1
+            time.sleep(0.001)
+
+        for futures in in_flight.values():
+            for future in futures:
+                future.result()
+                completed += 1
+        elapsed = time.perf_counter() - start_time
+        stats = pool.get_stats()
+    finally:
+        pool.stop()
+
+    return {'workers': num_workers, 'fps': completed / elapsed, 'dropped': stats['dropped'],
+            'rebalances': stats['rebalances']}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure detector worker pool scaling')
+    parser.add_argument('--workers', type=str, default='1,2,4,8', help='Comma-separated worker counts')
+    parser.add_argument('--cameras', type=int, default=16, help='Simulated cameras')
+    parser.add_argument('--camera-queue', type=int, default=2, help='In-flight frames per camera')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per worker count')
+    parser.add_argument('--size', type=str, default='1280x720', help='Frame size')
+    parser.add_argument('--weights', type=str, help='Local detector weights (uses a CPU-bound stub if omitted)')
+    parser.add_argument('--model-type', type=str, default='yolov5', help='Model type for --weights')
+    parser.add_argument('--repo-path', type=str, help='Local YOLOv5 repository for --weights')
+    parser.add_argument('--stub-latency', type=float, default=0.02, help='CPU time per stub detection in seconds')
+    parser.add_argument('--threads-per-worker', type=int, help='torch threads per worker (defaults to its CPU share)')
+    parser.add_argument('--max-pending', type=int, default=8, help='In-flight frames per worker')
+    parser.add_argument('--max-batch-size', type=int, default=4, help='Frames batched per worker call')
+    parser.add_argument('--no-pin', action='store_true', help='Do not pin workers to CPU sets')
+    parser.add_argument('--output', type=str, help='Write results as JSON')
+
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    frames = [create_sample_frame(width, height, seed=i)[0] for i in range(4)]
+    print(f"{len(available_cpus())} CPUs available")
+
+    results = []
+    for num_workers in [int(value) for value in args.workers.split(',')]:
+        result = run_case(args, frames, num_workers)
+        result['speedup'] = result['fps'] / results[0]['fps'] if results else 1.0
+        results.append(result)
+        print(f"{num_workers:3d} workers | {result['fps']:8.1f} fps | speedup {result['speedup']:5.2f}x | "
+              f"dropped {result['dropped']} | rebalances {result['rebalances']}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
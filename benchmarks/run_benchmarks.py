@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
+from smartcity_vision.core.crowd_density import CrowdDensityAnalyzer
+from smartcity_vision.core.parking_analyzer import ParkingAnalyzer
+from smartcity_vision.core.pedestrian_tracker import PedestrianTracker
+from smartcity_vision.data.sample_data import create_sample_frame
+from smartcity_vision.utils.visualization import Visualization, RenderPlan
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+from smartcity_vision.benchmarks.bench_utils import (StageTimer, format_summary, load_baseline,
+                                                     save_baseline, compare_to_baseline)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def parse_sizes(value):
+    sizes = []
+    for item in value.split(','):
+        width, height = item.lower().split('x')
+        sizes.append((int(width), int(height)))
+    return sizes
+
+def build_detector(args, num_objects):
+    if args.weights:
+        from smartcity_vision.core.object_detector import ObjectDetector
+        return ObjectDetector(model_type=args.model_type, model_path=args.weights,
+                              confidence_threshold=args.confidence, repo_path=args.repo_path)
+    return StubDetector(num_objects=num_objects, seed=args.seed, inference_time=args.stub_latency)
+
+def run_case(args, width, height, num_objects):
+    detector = build_detector(args, num_objects)
+    traffic_analyzer = TrafficAnalyzer()
+    crowd_analyzer = CrowdDensityAnalyzer(args.crowd_method)
+    parking_analyzer = ParkingAnalyzer()
+    pedestrian_tracker = PedestrianTracker(engine=args.tracking_engine)
+    visualizer = Visualization()
+
+    frames = [create_sample_frame(width, height, num_objects // 2, num_objects - num_objects // 2, seed=args.seed + i)[0]
+              for i in range(args.unique_frames)]
+    parking_analyzer.detect_parking_spots(frames[0])
+
+    timer = StageTimer()
+    for index in range(args.warmup + args.frames):
+        frame = frames[index % len(frames)].copy()
+        step_timer = timer if index >= args.warmup else StageTimer()
+        start_time = time.perf_counter()
+
+        with step_timer.time('preprocess'):
+            detector.preprocess_image(frame)
+        with step_timer.time('inference'):
+            objects = detector.filter_urban_objects(detector.detect(frame))
+        with step_timer.time('traffic'):
+            traffic_analysis = traffic_analyzer.analyze_traffic_flow(objects, frame.shape)
+        with step_timer.time('crowd'):
+            crowd_analysis = crowd_analyzer.analyze_crowd_density(objects, frame.shape)
+        with step_timer.time('parking'):
+            parking_analyzer.analyze_parking_occupancy(objects, frame)
+        with step_timer.time('pedestrian'):
+            tracks = pedestrian_tracker.update_tracks(objects)
+            pedestrian_tracker.analyze_pedestrian_flow(tracks)
+        with step_timer.time('render'):
+            plan = RenderPlan()
+            visualizer.plan_detections(plan, objects)
+            visualizer.plan_traffic_analysis(plan, traffic_analysis)
+            visualizer.plan_crowd_density(plan, crowd_analysis)
+            annotated_frame = visualizer.render(frame, plan, in_place=True)
+        with step_timer.time('encode'):
+            cv2.imencode('.jpg', annotated_frame)
+
+        step_timer.record('total', time.perf_counter() - start_time)
+
+    return timer.summary()
+
+def main():
+    parser = argparse.ArgumentParser(description='SmartCity Vision end-to-end benchmarks')
+    parser.add_argument('--sizes', type=str, default='640x480,1280x720,1920x1080', help='Comma-separated frame sizes')
+    parser.add_argument('--objects', type=str, default='10,50,150', help='Comma-separated object counts')
+    parser.add_argument('--frames', type=int, default=50, help='Measured frames per case')
+    parser.add_argument('--warmup', type=int, default=5, help='Warmup frames per case')
+    parser.add_argument('--unique-frames', type=int, default=4, help='Distinct synthetic frames to cycle through')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic frames and stub detections')
+    parser.add_argument('--stub-latency', type=float, default=0.0, help='Simulated stub inference time in seconds')
+    parser.add_argument('--weights', type=str, help='Local detector weights (uses the stub detector if omitted)')
+    parser.add_argument('--model-type', type=str, default='faster_rcnn', help='Model type for --weights')
+    parser.add_argument('--repo-path', type=str, help='Local YOLOv5 repository for --weights')
+    parser.add_argument('--confidence', type=float, default=0.5, help='Confidence threshold for --weights')
+    parser.add_argument('--crowd-method', type=str, default='counting', help='CrowdDensityAnalyzer method')
+    parser.add_argument('--tracking-engine', type=str, default='sort', help='PedestrianTracker engine')
+    parser.add_argument('--baseline', type=str, help=f"Baseline results file (default: {DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p50 slowdown before failing')
+    parser.add_argument('--output', type=str, help='Write full results as JSON')
+
+    args = parser.parse_args()
+
+    results = {}
+    for width, height in parse_sizes(args.sizes):
+        for num_objects in [int(n) for n in args.objects.split(',')]:
+            case = f"{width}x{height}/{num_objects}"
+            results[case] = run_case(args, width, height, num_objects)
+            print(format_summary(case, results[case]))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.save_baseline:
+        save_baseline(baseline_path, results)
+        print(f"Baseline saved: {baseline_path}")
+        return 0
+
+    baseline = load_baseline(baseline_path)
+    if baseline is None:
+        print(f"No baseline found at {baseline_path}; run with --save-baseline to create one")
+        return 1 if args.baseline else 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']} [{regression['stage']}]: "
+              f"{regression['baseline']:.2f} ms -> {regression['current']:.2f} ms ({regression['ratio']:.2f}x)")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import time
+import cv2
+import numpy as np
+
+from smartcity_vision.utils.detection_batch import DetectionBatch, URBAN_CLASSES
+
+STUB_CLASSES = [(0, 'person'), (2, 'car'), (5, 'bus'), (7, 'truck')]
+STUB_CLASS_WEIGHTS = [0.4, 0.4, 0.1, 0.1]
+STUB_CLASS_NAMES = dict(STUB_CLASSES)
+
+class StubDetector:
+    def __init__(self, num_objects=20, seed=0, inference_time=0.0, confidence_threshold=0.5, busy_wait=False,
+                 batch_scaling=1.0):
+        self.model_type = 'stub'
+        self.num_objects = num_objects
+        self.seed = seed
+        self.inference_time = inference_time
+        self.confidence_threshold = confidence_threshold
+        self.busy_wait = busy_wait
+        self.batch_scaling = batch_scaling
+        self.frame_shape = None
+        self.frame_index = 0
+
+    def reset(self, frame_shape):
+        rng = np.random.default_rng(self.seed)
+        height, width = frame_shape[:2]
+
+        self.frame_shape = tuple(frame_shape[:2])
+        self.frame_index = 0
+        self.class_idx = rng.choice(len(STUB_CLASSES), size=self.num_objects, p=STUB_CLASS_WEIGHTS)
+        self.sizes = np.where(self.class_idx[:, None] == 0, [20, 40], [50, 30]) * max(width / 640, 1)
+        self.positions = rng.uniform(0, 1, (self.num_objects, 2)) * [width, height]
+        self.velocities = rng.normal(0, 2, (self.num_objects, 2))
+        self.scores = rng.uniform(0.5, 1.0, self.num_objects)
+
+    def preprocess_image(self, image):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    def detect(self, image):
+        self.simulate_inference(self.inference_time)
+        return self.generate(image)
+
+    def generate(self, image):
+        if self.frame_shape != tuple(image.shape[:2]):
+            self.reset(image.shape)
+
+        self.preprocess_image(image)
+        height, width = self.frame_shape
+        positions = self.positions + self.velocities * self.frame_index
+        positions = np.abs(np.mod(positions, 2 * np.array([width, height])) - [width, height])
+        boxes = np.hstack([positions - self.sizes / 2, positions + self.sizes / 2]).astype(int)
+        self.frame_index += 1
+
+        class_ids = np.array([class_id for class_id, _ in STUB_CLASSES])[self.class_idx]
+        return DetectionBatch(boxes, self.scores, class_ids, STUB_CLASS_NAMES)
+
+    def simulate_inference(self, duration):
+        if duration and self.busy_wait:
+            deadline = time.process_time() + duration
+            while time.process_time() < deadline:
+                pass
+        elif duration:
+            time.sleep(duration)
+
+    def detect_batch(self, frames):
+        if isinstance(frames, dict):
+            return dict(zip(frames.keys(), self.detect_batch(list(frames.values()))))
+        if self.batch_scaling == 1.0:
+            return [self.detect(frame) for frame in frames]
+
+        self.simulate_inference(self.inference_time * (1 + self.batch_scaling * (len(frames) - 1)) if frames else 0)
+        return [self.generate(frame) for frame in frames]
+
+    def detect_objects(self, image):
+        return self.detect(image).to_dicts()
+
+    def detect_objects_batch(self, frames):
+        if isinstance(frames, dict):
+            return {key: batch.to_dicts() for key, batch in self.detect_batch(frames).items()}
+        return [batch.to_dicts() for batch in self.detect_batch(frames)]
+
+    def filter_urban_objects(self, objects, target_classes=None):
+        if target_classes is None:
+            target_classes = URBAN_CLASSES
+        if isinstance(objects, DetectionBatch):
+            return objects.select(target_classes)
+        return [obj for obj in objects if obj['class_name'] in target_classes]
@@ -2,4 +2,13 @@ from .object_detector import ObjectDetector
 from .traffic_analyzer import TrafficAnalyzer
 from .crowd_density import CrowdDensityAnalyzer
 from .parking_analyzer import ParkingAnalyzer
-from .pedestrian_tracker import PedestrianTracker
\ No newline at end of file
+from .pedestrian_tracker import PedestrianTracker
+from .model_registry import ModelRegistry
+from .batch_detector import MicroBatcher
+from .sort_tracker import SortTracker
+from .keyframe_detector import KeyframeDetector
+from .motion_gate import MotionGate
+from .region_detector import RegionDetector
+from .detector_pool import DetectorPool
+from .vehicle_counter import VehicleCounter
+from .speed_estimator import SpeedEstimator
@@ -0,0 +1,118 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+class QueueFullError(RuntimeError):
+    def __init__(self, queue_depth, retry_after):
+        super().__init__(f"Inference queue is full ({queue_depth} pending)")
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+
+class MicroBatcher:
+    def __init__(self, detector=None, max_batch_size=8, max_wait=0.02, max_queue_size=None, detector_provider=None):
+        self.detector = detector
+        self.detector_provider = detector_provider
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.request_queue = queue.Queue(maxsize=max_queue_size or 0)
+        self.running = False
+        self.thread = None
+        self.batches_processed = 0
+        self.frames_processed = 0
+        self.rejected = 0
+        self.batch_time = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._process_batches, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+        while True:
+            try:
+                _, _, future = self.request_queue.get_nowait()
+            except queue.Empty:
+                break
+            if not future.cancelled():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    def estimated_wait(self):
+        batches_ahead = self.request_queue.qsize() // self.max_batch_size + 1
+        return batches_ahead * self.batch_time + self.max_wait
+
+    def submit(self, frame, camera_id=None):
+        future = Future()
+        try:
+            self.request_queue.put_nowait((camera_id, frame, future))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFullError(self.request_queue.qsize(), self.estimated_wait())
+        return future
+
+    def detect_all(self, frames):
+        futures = {cam_id: self.submit(frame, cam_id) for cam_id, frame in frames.items()}
+        return {cam_id: future.result() for cam_id, future in futures.items()}
+
+    def collect_batch(self):
+        try:
+            batch = [self.request_queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.request_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def run_batch(self, frames):
+        detector = self.detector_provider() if self.detector_provider else self.detector
+        detect_batch = getattr(detector, 'detect_batch', None) or detector.detect_objects_batch
+        return detect_batch(frames)
+
+    def _process_batches(self):
+        while self.running:
+            batch = [item for item in self.collect_batch() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            frames = [frame for _, frame, _ in batch]
+            start_time = time.perf_counter()
+            try:
+                results = self.run_batch(frames)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                elapsed = time.perf_counter() - start_time
+                self.batch_time = elapsed if not self.batch_time else 0.8 * self.batch_time + 0.2 * elapsed
+
+            for (_, _, future), objects in zip(batch, results):
+                future.set_result(objects)
+
+            self.batches_processed += 1
+            self.frames_processed += len(batch)
+
+    def get_stats(self):
+        return {
+            'batches_processed': self.batches_processed,
+            'frames_processed': self.frames_processed,
+            'avg_batch_size': self.frames_processed / self.batches_processed if self.batches_processed else 0,
+            'avg_batch_time': self.batch_time,
+            'queue_depth': self.request_queue.qsize(),
+            'max_queue_size': self.max_queue_size,
+            'rejected': self.rejected
+        }
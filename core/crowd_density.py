@@ -1,14 +1,21 @@
-
 import cv2
 import numpy as np
 from sklearn.cluster import DBSCAN
 import torch
 import torch.nn as nn
 
+from smartcity_vision.utils.detection_batch import DetectionBatch
+
 class CrowdDensityAnalyzer:
-    def __init__(self, method='density_map'):
+    def __init__(self, method='density_map', cell_size=16, hotspot_radius=30, temporal_smoothing=0.0):
         self.method = method
         self.density_model = self.load_density_model() if method == 'density_map' else None
+        self.cell_size = cell_size
+        self.hotspot_radius = hotspot_radius
+        self.temporal_smoothing = temporal_smoothing
+        self.density_grid = None
+        self.grid_frame_shape = None
+        self.grid_initialized = False
         
     def load_density_model(self):
         class DensityNet(nn.Module):
@@ -33,12 +40,14 @@ class CrowdDensityAnalyzer:
         return model
     
     def analyze_crowd_density(self, objects, frame_shape):
-        people = [obj for obj in objects if obj['class_name'] == 'person']
+        people = DetectionBatch.coerce(objects).select(['person'])
         
         if self.method == 'counting':
             return self.counting_based_density(people, frame_shape)
         elif self.method == 'clustering':
             return self.clustering_based_density(people, frame_shape)
+        elif self.method == 'density_grid':
+            return self.density_grid_estimation(people, frame_shape)
         else:
             return self.density_map_estimation(people, frame_shape)
     
@@ -63,22 +72,14 @@ class CrowdDensityAnalyzer:
             'total_people': total_people,
             'density_value': density,
             'density_level': density_level,
-            'people_locations': [obj['bbox'] for obj in people]
+            'people_locations': people.boxes.astype(int).tolist()
         }
     
     def clustering_based_density(self, people, frame_shape):
         if not people:
             return {'total_people': 0, 'clusters': 0, 'avg_cluster_size': 0}
         
-        centers = []
-        for person in people:
-            bbox = person['bbox']
-            center = [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
-            centers.append(center)
-        
-        centers = np.array(centers)
-        
-        clustering = DBSCAN(eps=50, min_samples=2).fit(centers)
+        clustering = DBSCAN(eps=50, min_samples=2).fit(people.centers)
         labels = clustering.labels_
         
         n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
@@ -94,11 +95,7 @@ class CrowdDensityAnalyzer:
     def density_map_estimation(self, people, frame_shape):
         density_map = np.zeros(frame_shape[:2], dtype=np.float32)
         
-        for person in people:
-            bbox = person['bbox']
-            center_x = int((bbox[0] + bbox[2]) / 2)
-            center_y = int((bbox[1] + bbox[3]) / 2)
-            
+        for center_x, center_y in people.centers.astype(int).tolist():
             cv2.circle(density_map, (center_x, center_y), 30, 1, -1)
         
         total_density = np.sum(density_map)
@@ -106,10 +103,10 @@ class CrowdDensityAnalyzer:
         return {
             'density_map': density_map,
             'total_density': total_density,
-            'hotspots': self.find_hotspots(density_map)
+            'hotspots': self.find_hotspots(density_map, people.centers)
         }
     
-    def find_hotspots(self, density_map, threshold=0.5):
+    def find_hotspots(self, density_map, centers=None, threshold=0.5):
         _, binary_map = cv2.threshold(density_map, threshold, 1, cv2.THRESH_BINARY)
         contours, _ = cv2.findContours(binary_map.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
@@ -117,10 +114,91 @@ class CrowdDensityAnalyzer:
         for contour in contours:
             if cv2.contourArea(contour) > 100:
                 x, y, w, h = cv2.boundingRect(contour)
-                hotspots.append({
+                hotspot = {
                     'bbox': [x, y, x + w, y + h],
                     'area': w * h,
                     'density': np.sum(density_map[y:y+h, x:x+w])
-                })
+                }
+                if centers is not None:
+                    inside = ((centers[:, 0] >= x) & (centers[:, 0] < x + w) &
+                              (centers[:, 1] >= y) & (centers[:, 1] < y + h))
+                    hotspot['people'] = int(np.count_nonzero(inside))
+                hotspots.append(hotspot)
         
         return hotspots
+    
+    def allocate_density_grid(self, frame_shape):
+        height, width = frame_shape[:2]
+        rows = -(-height // self.cell_size)
+        cols = -(-width // self.cell_size)
+        radius = self.hotspot_radius // self.cell_size
+        
+        self.density_grid = np.zeros((rows, cols), dtype=np.float32)
+        self.cumulative_rows = np.zeros((rows, cols), dtype=np.float32)
+        self.summed_area = np.zeros((rows + 1, cols + 1), dtype=np.float32)
+        self.window_rows = (np.clip(np.arange(rows) - radius, 0, rows), np.clip(np.arange(rows) + radius + 1, 0, rows))
+        self.window_cols = (np.clip(np.arange(cols) - radius, 0, cols), np.clip(np.arange(cols) + radius + 1, 0, cols))
+        self.grid_frame_shape = tuple(frame_shape[:2])
+        self.grid_initialized = False
+    
+    def density_grid_estimation(self, people, frame_shape):
+        if self.grid_frame_shape != tuple(frame_shape[:2]):
+            self.allocate_density_grid(frame_shape)
+        
+        rows, cols = self.density_grid.shape
+        if people:
+            centers = people.centers
+            col_idx = np.clip((centers[:, 0] // self.cell_size).astype(np.int64), 0, cols - 1)
+            row_idx = np.clip((centers[:, 1] // self.cell_size).astype(np.int64), 0, rows - 1)
+            counts = np.bincount(row_idx * cols + col_idx, minlength=rows * cols).reshape(rows, cols)
+        else:
+            counts = 0
+        
+        if self.temporal_smoothing > 0 and self.grid_initialized:
+            self.density_grid *= self.temporal_smoothing
+            self.density_grid += (1 - self.temporal_smoothing) * counts
+        else:
+            self.density_grid[...] = counts
+            self.grid_initialized = True
+        
+        np.cumsum(self.density_grid, axis=0, out=self.cumulative_rows)
+        np.cumsum(self.cumulative_rows, axis=1, out=self.summed_area[1:, 1:])
+        
+        analysis = self.counting_based_density(people, frame_shape)
+        analysis.update({
+            'density_map': self.density_grid.copy(),
+            'cell_size': self.cell_size,
+            'smoothed_people': float(self.summed_area[-1, -1]),
+            'hotspots': self.find_grid_hotspots(frame_shape)
+        })
+        return analysis
+    
+    def region_sum(self, row0, col0, row1, col1):
+        sat = self.summed_area
+        return sat[row1, col1] - sat[row0, col1] - sat[row1, col0] + sat[row0, col0]
+    
+    def find_grid_hotspots(self, frame_shape, threshold=0.5, min_area=100):
+        (row0, row1), (col0, col1) = self.window_rows, self.window_cols
+        neighborhood = self.region_sum(row0[:, None], col0[None, :], row1[:, None], col1[None, :])
+        mask = (neighborhood >= threshold).astype(np.uint8)
+        
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        
+        height, width = frame_shape[:2]
+        hotspots = []
+        for label in range(1, num_labels):
+            x, y, w, h = stats[label, :4]
+            bbox = [int(x * self.cell_size), int(y * self.cell_size),
+                    int(min((x + w) * self.cell_size, width)), int(min((y + h) * self.cell_size, height))]
+            area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+            
+            if area > min_area:
+                smoothed_people = float(self.region_sum(y, x, y + h, x + w))
+                hotspots.append({
+                    'bbox': bbox,
+                    'area': area,
+                    'people': int(round(smoothed_people)),
+                    'smoothed_people': smoothed_people
+                })
+        
+        return hotspots
\ No newline at end of file
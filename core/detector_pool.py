@@ -0,0 +1,376 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .object_detector import ObjectDetector
+from smartcity_vision.utils.shared_frames import FrameRef
+
+logger = logging.getLogger(__name__)
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def partition_cpus(num_workers, cpus=None):
+    cpus = sorted(cpus) if cpus is not None else available_cpus()
+    per_worker = max(len(cpus) // num_workers, 1)
+    return [[cpus[(index * per_worker + offset) % len(cpus)] for offset in range(per_worker)]
+            for index in range(num_workers)]
+
+def resolve_frames(batch, channels):
+    frames = []
+    for _, payload in batch:
+        if isinstance(payload, FrameRef):
+            frame = channels[payload.channel].view(payload)
+            if frame is None:
+                raise RuntimeError(f"Stale shared frame reference: {payload!r}")
+            frames.append(frame)
+        else:
+            frames.append(payload)
+    return frames
+
+def release_frames(batch, channels):
+    for _, payload in batch:
+        if isinstance(payload, FrameRef):
+            channels[payload.channel].release(payload)
+
+def worker_main(worker_id, detector_factory, detector_kwargs, cpus, num_threads, max_batch_size, filter_urban,
+                channels, task_queue, result_queue):
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    channels = {channel.name: channel for channel in channels}
+    detector = detector_factory(**detector_kwargs)
+    detect = getattr(detector, 'detect', None) or detector.detect_objects
+    detect_batch = getattr(detector, 'detect_batch', None) or getattr(detector, 'detect_objects_batch', None)
+    result_queue.put(('ready', worker_id, None, None, 0.0))
+
+    running = True
+    while running:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        batch = [task]
+        while len(batch) < max_batch_size:
+            try:
+                task = task_queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                running = False
+                break
+            batch.append(task)
+
+        start_time = time.perf_counter()
+        try:
+            frames = resolve_frames(batch, channels)
+            if detect_batch and len(frames) > 1:
+                results = detect_batch(frames)
+            else:
+                results = [detect(frame) for frame in frames]
+        except Exception as e:
+            elapsed = (time.perf_counter() - start_time) / len(batch)
+            for task_id, _ in batch:
+                result_queue.put(('error', worker_id, task_id, repr(e), elapsed))
+            continue
+        finally:
+            release_frames(batch, channels)
+
+        if filter_urban:
+            results = [detector.filter_urban_objects(objects) for objects in results]
+
+        elapsed = (time.perf_counter() - start_time) / len(batch)
+        for (task_id, _), objects in zip(batch, results):
+            result_queue.put(('result', worker_id, task_id, objects, elapsed))
+
+class DetectorWorker:
+    def __init__(self, index, cpus, num_threads):
+        self.index = index
+        self.cpus = cpus
+        self.num_threads = num_threads
+        self.process = None
+        self.task_queue = None
+        self.ready = False
+        self.failed = False
+        self.restarts = 0
+        self.cameras = set()
+        self.pending = 0
+        self.completed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.busy_time = 0.0
+        self.busy_at_rebalance = 0.0
+
+class DetectorPool:
+    def __init__(self, num_workers=None, detector_factory=ObjectDetector, detector_kwargs=None,
+                 threads_per_worker=None, pin_cpus=True, max_pending=4, max_batch_size=4,
+                 rebalance_interval=5.0, high_water=0.9, filter_urban=False, channels=None, start_method='spawn',
+                 max_restarts=3):
+        cpus = available_cpus()
+        self.num_workers = num_workers or max(len(cpus) // 4, 1)
+        self.detector_factory = detector_factory
+        self.detector_kwargs = dict(detector_kwargs or {})
+        self.max_pending = max_pending
+        self.max_batch_size = max_batch_size
+        self.rebalance_interval = rebalance_interval
+        self.high_water = high_water
+        self.filter_urban = filter_urban
+        self.channels = list(channels or [])
+        self.max_restarts = max_restarts
+        self.context = multiprocessing.get_context(start_method)
+
+        cpu_sets = partition_cpus(self.num_workers, cpus)
+        self.workers = []
+        for index, cpu_set in enumerate(cpu_sets):
+            num_threads = threads_per_worker or len(cpu_set)
+            self.workers.append(DetectorWorker(index, cpu_set if pin_cpus else None, num_threads))
+
+        self.assignments = {}
+        self.camera_load = {}
+        self.futures = {}
+        self.task_ids = itertools.count()
+        self.lock = threading.Lock()
+        self.result_queue = None
+        self.collector = None
+        self.running = False
+        self.start_time = None
+        self.last_rebalance = None
+        self.rebalances = 0
+
+    def start_worker(self, worker):
+        worker.process = self.context.Process(
+            target=worker_main,
+            args=(worker.index, self.detector_factory, self.detector_kwargs, worker.cpus, worker.num_threads,
+                  self.max_batch_size, self.filter_urban, self.channels, worker.task_queue, self.result_queue),
+            daemon=True
+        )
+        worker.process.start()
+
+    def start(self, timeout=None):
+        self.result_queue = self.context.Queue()
+        for worker in self.workers:
+            worker.task_queue = self.context.Queue()
+            self.start_worker(worker)
+
+        self.running = True
+        self.collector = threading.Thread(target=self._collect_results, daemon=True)
+        self.collector.start()
+
+        deadline = time.perf_counter() + timeout if timeout else None
+        while not all(worker.ready for worker in self.workers):
+            if deadline and time.perf_counter() > deadline:
+                raise TimeoutError("Detector workers did not start in time")
+            if not all(worker.process.is_alive() for worker in self.workers):
+                self.stop()
+                raise RuntimeError("Detector worker exited during startup")
+            time.sleep(0.05)
+
+        self.start_time = self.last_rebalance = time.perf_counter()
+
+    def stop(self):
+        self.running = False
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.task_queue.put(None)
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        if self.collector:
+            self.collector.join(timeout=1)
+
+        with self.lock:
+            futures, self.futures = self.futures, {}
+        for entry in futures.values():
+            entry[0].cancel()
+
+    def assign(self, camera_id):
+        index = self.assignments.get(camera_id)
+        if index is None:
+            workers = [worker for worker in self.workers if not worker.failed] or self.workers
+            worker = min(workers, key=lambda worker: (len(worker.cameras), worker.pending))
+            index = worker.index
+            worker.cameras.add(camera_id)
+            self.assignments[camera_id] = index
+            self.camera_load[camera_id] = 0.0
+        return self.workers[index]
+
+    def submit(self, frame, camera_id='default'):
+        self.rebalance()
+
+        with self.lock:
+            worker = self.assign(camera_id)
+            if worker.failed:
+                future = Future()
+                future.set_exception(RuntimeError("No detector workers are alive"))
+                return future
+            if worker.pending >= self.max_pending:
+                worker.dropped += 1
+                return None
+
+            task_id = next(self.task_ids)
+            future = Future()
+            self.futures[task_id] = (future, worker.index, camera_id, time.perf_counter(), frame)
+            worker.pending += 1
+
+        worker.task_queue.put((task_id, frame))
+        return future
+
+    def detect_all(self, frames):
+        futures = {camera_id: self.submit(frame, camera_id) for camera_id, frame in frames.items()}
+        return {camera_id: future.result() for camera_id, future in futures.items() if future is not None}
+
+    def check_workers(self):
+        if self.start_time is None or not self.running:
+            return
+
+        exited = []
+        with self.lock:
+            for worker in self.workers:
+                if worker.failed or worker.process.is_alive():
+                    continue
+
+                task_ids = [task_id for task_id, entry in self.futures.items() if entry[1] == worker.index]
+                exited.append((worker, worker.process.exitcode, [self.futures.pop(task_id) for task_id in task_ids]))
+                worker.pending = 0
+                worker.ready = False
+                if worker.restarts < self.max_restarts:
+                    worker.restarts += 1
+                    worker.task_queue = self.context.Queue()
+                else:
+                    worker.failed = True
+                    self.reassign(worker)
+
+        channels = {channel.name: channel for channel in self.channels}
+        for worker, exitcode, entries in exited:
+            logger.warning("Detector worker %d exited with code %s; failing %d pending frames and %s",
+                           worker.index, exitcode, len(entries), 'giving up' if worker.failed else 'restarting it')
+            release_frames([(None, entry[4]) for entry in entries], channels)
+            for entry in entries:
+                entry[0].set_exception(RuntimeError(f"Detector worker {worker.index} exited with code {exitcode}"))
+            if not worker.failed:
+                self.start_worker(worker)
+
+    def reassign(self, worker):
+        alive = [other for other in self.workers if not other.failed]
+        if not alive:
+            return
+        for camera_id in sorted(worker.cameras, key=str):
+            target = min(alive, key=lambda other: (len(other.cameras), other.pending))
+            target.cameras.add(camera_id)
+            self.assignments[camera_id] = target.index
+        worker.cameras.clear()
+
+    def _collect_results(self):
+        while self.running or self.futures:
+            self.check_workers()
+            try:
+                kind, worker_index, task_id, payload, elapsed = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self.running:
+                    break
+                continue
+
+            with self.lock:
+                worker = self.workers[worker_index]
+                if kind == 'ready':
+                    worker.ready = True
+                    continue
+
+                entry = self.futures.pop(task_id, None)
+                worker.busy_time += elapsed
+                if entry is not None:
+                    worker.pending -= 1
+                    self.camera_load[entry[2]] = self.camera_load.get(entry[2], 0.0) + elapsed
+                if kind == 'error':
+                    worker.errors += 1
+                else:
+                    worker.completed += 1
+
+            if entry is None:
+                continue
+            if kind == 'error':
+                entry[0].set_exception(RuntimeError(payload))
+            else:
+                entry[0].set_result(payload)
+
+    def rebalance(self, force=False):
+        with self.lock:
+            if self.last_rebalance is None:
+                return None
+            now = time.perf_counter()
+            elapsed = now - self.last_rebalance
+            if not force and elapsed < self.rebalance_interval:
+                return None
+
+            loads = []
+            for worker in self.workers:
+                loads.append((worker.busy_time - worker.busy_at_rebalance) / max(elapsed, 1e-9))
+                worker.busy_at_rebalance = worker.busy_time
+            camera_loads = {camera_id: load / max(elapsed, 1e-9) for camera_id, load in self.camera_load.items()}
+            self.camera_load = dict.fromkeys(self.camera_load, 0.0)
+            self.last_rebalance = now
+
+            alive = [worker for worker in self.workers if not worker.failed]
+            if len(alive) < 2:
+                return None
+            busiest = max(alive, key=lambda worker: loads[worker.index])
+            idlest = min(alive, key=lambda worker: loads[worker.index])
+            gap = loads[busiest.index] - loads[idlest.index]
+            if loads[busiest.index] < self.high_water or len(busiest.cameras) < 2 or gap <= 0:
+                return None
+
+            candidates = [camera_id for camera_id in busiest.cameras if 0 < camera_loads.get(camera_id, 0.0) < gap]
+            if not candidates:
+                return None
+
+            camera_id = min(candidates, key=lambda camera_id: abs(camera_loads.get(camera_id, 0.0) - gap / 2))
+            busiest.cameras.discard(camera_id)
+            idlest.cameras.add(camera_id)
+            self.assignments[camera_id] = idlest.index
+            self.rebalances += 1
+            return camera_id, busiest.index, idlest.index
+
+    def get_stats(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+            workers = {}
+            for worker in self.workers:
+                processed = worker.completed + worker.errors
+                workers[worker.index] = {
+                    'cpus': worker.cpus,
+                    'threads': worker.num_threads,
+                    'cameras': sorted(worker.cameras, key=str),
+                    'pending': worker.pending,
+                    'completed': worker.completed,
+                    'errors': worker.errors,
+                    'dropped': worker.dropped,
+                    'restarts': worker.restarts,
+                    'alive': not worker.failed,
+                    'throughput': worker.completed / elapsed if elapsed > 0 else 0,
+                    'avg_latency': worker.busy_time / processed if processed else 0,
+                    'utilization': worker.busy_time / elapsed if elapsed > 0 else 0
+                }
+
+            completed = sum(worker.completed for worker in self.workers)
+            return {
+                'workers': workers,
+                'throughput': completed / elapsed if elapsed > 0 else 0,
+                'dropped': sum(worker.dropped for worker in self.workers),
+                'rebalances': self.rebalances
+            }
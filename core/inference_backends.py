@@ -0,0 +1,211 @@
+import inspect
+import os
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+BACKENDS = ('torchscript', 'onnx')
+QUANTIZATION_MODES = (None, 'dynamic', 'static')
+
+def split_model_type(model_type):
+    for backend in BACKENDS:
+        if model_type.endswith('_' + backend):
+            return model_type[:-len(backend) - 1], backend
+    return model_type, None
+
+def default_export_path(model_path, arch, backend, quantization=None, image_size=640):
+    base = os.path.splitext(model_path)[0] if model_path else arch
+    suffix = f"-{quantization}-int8" if quantization else ''
+    extension = 'torchscript.pt' if backend == 'torchscript' else 'onnx'
+    return f"{base}{suffix}-{image_size}.{extension}"
+
+def letterbox(image, size=640, color=(114, 114, 114)):
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    padded = cv2.copyMakeBorder(resized, pad_y, size - new_height - pad_y, pad_x, size - new_width - pad_x,
+                                cv2.BORDER_CONSTANT, value=color)
+    return padded, ratio, (pad_x, pad_y)
+
+def to_yolo_input(images_rgb, size=640):
+    batch = []
+    transforms = []
+    for image in images_rgb:
+        padded, ratio, padding = letterbox(image, size)
+        batch.append(padded.transpose(2, 0, 1))
+        transforms.append((ratio, padding, image.shape[:2]))
+    return np.ascontiguousarray(np.stack(batch), dtype=np.float32) / 255.0, transforms
+
+def yolo_postprocess(predictions, transforms, confidence_threshold=0.25, iou_threshold=0.45, max_detections=300):
+    predictions = torch.as_tensor(predictions)
+    results = []
+    for prediction, (ratio, (pad_x, pad_y), (height, width)) in zip(predictions, transforms):
+        prediction = prediction[prediction[:, 4] >= confidence_threshold]
+        scores, classes = (prediction[:, 5:] * prediction[:, 4:5]).max(1)
+        keep = scores >= confidence_threshold
+        prediction, scores, classes = prediction[keep], scores[keep], classes[keep]
+
+        boxes = torch.empty((len(prediction), 4))
+        boxes[:, :2] = prediction[:, :2] - prediction[:, 2:4] / 2
+        boxes[:, 2:] = prediction[:, :2] + prediction[:, 2:4] / 2
+
+        keep = torchvision.ops.batched_nms(boxes, scores, classes, iou_threshold)[:max_detections]
+        boxes = boxes[keep]
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / ratio).clamp(0, width)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / ratio).clamp(0, height)
+
+        results.append(torch.cat([boxes, scores[keep, None], classes[keep, None].float()], 1))
+    return results
+
+def enable_export_mode(model):
+    for module in model.modules():
+        if hasattr(module, 'export') and type(module).__name__ in ('Detect', 'Segment'):
+            module.export = True
+    return model
+
+def quantize_dynamic(model, arch=None):
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if not any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in quantized.modules()):
+        raise ValueError(f"{arch or type(model).__name__} has no Linear layers for dynamic quantization; "
+                         "use the onnx backend to quantize its convolutions")
+    return quantized
+
+def export_torchscript(model, arch, path, image_size=640, quantization=None):
+    if quantization == 'static':
+        raise ValueError("Static quantization is only supported for the onnx backend")
+    if quantization == 'dynamic':
+        model = quantize_dynamic(model, arch)
+
+    with torch.no_grad():
+        if arch == 'yolov5':
+            example = torch.zeros(1, 3, image_size, image_size)
+            module = torch.jit.trace(enable_export_mode(model), example, strict=False)
+        else:
+            module = torch.jit.script(model)
+    module.save(path)
+    return path
+
+def export_onnx(model, arch, path, image_size=640, quantization=None, calibration_images=None):
+    raw_path = path if not quantization else path.replace('.onnx', '.fp32.onnx')
+    options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+    with torch.no_grad():
+        if arch == 'yolov5':
+            example = torch.zeros(1, 3, image_size, image_size)
+            torch.onnx.export(enable_export_mode(model), example, raw_path, opset_version=12,
+                              input_names=['images'], output_names=['output'],
+                              dynamic_axes={'images': {0: 'batch'}, 'output': {0: 'batch'}}, **options)
+        else:
+            example = [torch.zeros(3, image_size, image_size)]
+            torch.onnx.export(model, (example,), raw_path, opset_version=11,
+                              input_names=['image'], output_names=['boxes', 'labels', 'scores'],
+                              dynamic_axes={'image': {1: 'height', 2: 'width'}}, **options)
+
+    if quantization == 'dynamic':
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(raw_path, path, weight_type=QuantType.QInt8)
+    elif quantization == 'static':
+        from onnxruntime.quantization import quantize_static, QuantType
+        reader = CalibrationReader(arch, calibration_images, image_size)
+        quantize_static(raw_path, path, reader, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return path
+
+class CalibrationReader:
+    def __init__(self, arch, images, image_size=640):
+        if not images:
+            raise ValueError("Static quantization needs calibration_images")
+
+        self.inputs = []
+        for image in images:
+            if isinstance(image, str):
+                image = cv2.imread(image)
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if arch == 'yolov5':
+                batch, _ = to_yolo_input([image_rgb], image_size)
+                self.inputs.append({'images': batch})
+            else:
+                self.inputs.append({'image': image_rgb.transpose(2, 0, 1).astype(np.float32) / 255.0})
+        self.iterator = iter(self.inputs)
+
+    def get_next(self):
+        return next(self.iterator, None)
+
+    def rewind(self):
+        self.iterator = iter(self.inputs)
+
+class TorchScriptBackend:
+    def __init__(self, path, arch, names=None, num_threads=None):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.arch = arch
+        self.names = names
+        self.module = torch.jit.load(path, map_location='cpu').eval()
+        if arch == 'yolov5':
+            self.module = torch.jit.optimize_for_inference(torch.jit.freeze(self.module))
+
+    def parameters(self):
+        return self.module.parameters()
+
+    def buffers(self):
+        return self.module.buffers()
+
+    def __call__(self, inputs):
+        with torch.no_grad():
+            if self.arch == 'yolov5':
+                output = self.module(torch.from_numpy(inputs))
+                return output[0] if isinstance(output, (tuple, list)) else output
+
+            _, predictions = self.module([torch.from_numpy(image) for image in inputs])
+            return predictions
+
+class OnnxBackend:
+    def __init__(self, path, arch, names=None, num_threads=None):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.arch = arch
+        self.names = names
+        self.memory_bytes = os.path.getsize(path)
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, inputs):
+        if self.arch == 'yolov5':
+            return self.session.run(None, {self.input_name: inputs})[0]
+
+        predictions = []
+        for image in inputs:
+            boxes, labels, scores = self.session.run(None, {self.input_name: image})
+            predictions.append({
+                'boxes': torch.from_numpy(boxes),
+                'labels': torch.from_numpy(labels),
+                'scores': torch.from_numpy(scores)
+            })
+        return predictions
+
+def load_backend(model, arch, backend, path, image_size=640, quantization=None, calibration_images=None,
+                 num_threads=None):
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported quantization mode: {quantization}")
+
+    names = getattr(model, 'names', None)
+    if not os.path.exists(path):
+        model.eval()
+        if backend == 'torchscript':
+            export_torchscript(model, arch, path, image_size, quantization)
+        else:
+            export_onnx(model, arch, path, image_size, quantization, calibration_images)
+
+    if backend == 'torchscript':
+        return TorchScriptBackend(path, arch, names, num_threads)
+    return OnnxBackend(path, arch, names, num_threads)
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+from .sort_tracker import SortTracker
+
+class KeyframeDetector:
+    def __init__(self, detector, interval=5, min_interval=1, max_interval=15, adaptive=True,
+                 max_shift_ratio=0.25, scene_change_threshold=30.0, confidence_decay=0.95, max_age=None):
+        self.detector = detector
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.adaptive = adaptive
+        self.max_shift_ratio = max_shift_ratio
+        self.scene_change_threshold = scene_change_threshold
+        self.confidence_decay = confidence_decay
+        self.tracker = SortTracker(max_age=max_age or max_interval)
+        self.track_info = {}
+        self.frames_since_keyframe = 0
+        self.keyframe_thumbnail = None
+        self.keyframes = 0
+        self.propagated_frames = 0
+        self.scene_changes = 0
+
+    @classmethod
+    def from_config(cls, detector, config):
+        return cls(
+            detector,
+            interval=config.get('object_detection.keyframe.interval', 5),
+            min_interval=config.get('object_detection.keyframe.min_interval', 1),
+            max_interval=config.get('object_detection.keyframe.max_interval', 15),
+            adaptive=config.get('object_detection.keyframe.adaptive', True),
+            scene_change_threshold=config.get('object_detection.keyframe.scene_change_threshold', 30.0)
+        )
+
+    @property
+    def model_type(self):
+        return self.detector.model_type
+
+    def preprocess_image(self, image):
+        return self.detector.preprocess_image(image)
+
+    def filter_urban_objects(self, objects, target_classes=None):
+        return self.detector.filter_urban_objects(objects, target_classes)
+
+    def thumbnail(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (64, 36), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def is_scene_change(self, thumbnail):
+        if self.keyframe_thumbnail is None:
+            return True
+        return np.abs(thumbnail - self.keyframe_thumbnail).mean() > self.scene_change_threshold
+
+    def detect_objects(self, image):
+        thumbnail = self.thumbnail(image)
+        scene_change = self.is_scene_change(thumbnail)
+
+        if scene_change or self.frames_since_keyframe + 1 >= self.interval:
+            if scene_change and self.keyframe_thumbnail is not None:
+                self.scene_changes += 1
+            self.keyframe_thumbnail = thumbnail
+            return self.run_keyframe(image)
+
+        return self.propagate()
+
+    def run_keyframe(self, image):
+        objects = self.detector.detect_objects(image)
+        track_ids = self.tracker.update([obj['bbox'] for obj in objects])
+
+        for obj, track_id in zip(objects, track_ids.tolist()):
+            obj['track_id'] = track_id
+            obj['propagated'] = False
+            self.track_info[track_id] = {
+                'confidence': obj['confidence'],
+                'class_id': obj['class_id'],
+                'class_name': obj['class_name']
+            }
+
+        for track_id in self.tracker.removed_ids:
+            self.track_info.pop(track_id, None)
+
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        if self.adaptive:
+            self.adapt_interval()
+        return objects
+
+    def propagate(self):
+        self.tracker.predict()
+        self.frames_since_keyframe += 1
+        self.propagated_frames += 1
+
+        boxes = self.tracker.predicted_boxes()
+        decay = self.confidence_decay ** self.frames_since_keyframe
+
+        objects = []
+        for track_id, box, age in zip(self.tracker.ids.tolist(), boxes, self.tracker.time_since_update.tolist()):
+            info = self.track_info.get(track_id)
+            if info is None or age > self.frames_since_keyframe:
+                continue
+            objects.append({
+                'bbox': box.astype(int).tolist(),
+                'confidence': info['confidence'] * decay,
+                'class_id': info['class_id'],
+                'class_name': info['class_name'],
+                'track_id': track_id,
+                'propagated': True
+            })
+
+        return objects
+
+    def adapt_interval(self):
+        if not len(self.tracker.ids):
+            self.interval = self.max_interval
+            return
+
+        matched = (self.tracker.time_since_update == 0) & (self.tracker.hits > 1)
+        if not matched.any():
+            self.interval = self.min_interval
+            return
+
+        states = self.tracker.states[matched]
+        speed = np.hypot(states[:, 4], states[:, 5])
+        size = np.maximum(np.minimum(states[:, 2], states[:, 3]), 1.0)
+        motion = float(np.median(speed / size))
+
+        if motion <= 0:
+            self.interval = self.max_interval
+        else:
+            self.interval = int(np.clip(self.max_shift_ratio / motion, self.min_interval, self.max_interval))
+
+    def get_stats(self):
+        total = self.keyframes + self.propagated_frames
+        return {
+            'interval': self.interval,
+            'keyframes': self.keyframes,
+            'propagated_frames': self.propagated_frames,
+            'scene_changes': self.scene_changes,
+            'detection_rate': self.keyframes / total if total else 0
+        }
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .inference_backends import split_model_type
+from .object_detector import ObjectDetector
+from smartcity_vision.utils.metrics import instrument_components
+
+def check_local_weights(name, spec):
+    arch, _ = split_model_type(spec.get('model_type') or 'yolov5')
+    if not spec.get('model_path'):
+        raise ValueError(f"Model {name} has no model_path; the registry only loads local weight files")
+    if arch == 'yolov5' and not spec.get('repo_path'):
+        raise ValueError(f"Model {name} needs repo_path pointing at a local yolov5 checkout to load "
+                         f"{spec['model_path']} without network access")
+
+class ModelEntry:
+    def __init__(self, name, detector, load_time, memory_bytes):
+        self.name = name
+        self.detector = detector
+        self.load_time = load_time
+        self.memory_bytes = memory_bytes
+        self.hits = 0
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+class ModelRegistry:
+    def __init__(self, model_specs=None, max_memory_mb=None, detector_factory=ObjectDetector):
+        self.model_specs = dict(model_specs or {})
+        self.detector_factory = detector_factory
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.load_locks = {}
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config):
+        specs = {
+            'default': {
+                'model_type': config.get('object_detection.model_type', 'yolov5'),
+                'model_path': config.get('object_detection.model_path'),
+                'repo_path': config.get('object_detection.repo_path'),
+                'confidence_threshold': config.get('object_detection.confidence_threshold', 0.5),
+                'quantization': config.get('object_detection.quantization'),
+                'export_path': config.get('object_detection.export_path'),
+                'image_size': config.get('object_detection.image_size', 640),
+                'num_threads': config.get('object_detection.num_threads')
+            }
+        }
+        for name, spec in (config.get('model_registry.models') or {}).items():
+            specs[name] = dict(specs['default'], **spec)
+
+        registry = cls(specs, config.get('model_registry.max_memory_mb'))
+        return registry
+
+    def register(self, name, model_type='yolov5', model_path=None, confidence_threshold=0.5, repo_path=None,
+                 **backend_options):
+        with self.lock:
+            self.model_specs[name] = dict({
+                'model_type': model_type,
+                'model_path': model_path,
+                'repo_path': repo_path,
+                'confidence_threshold': confidence_threshold
+            }, **backend_options)
+
+    def get(self, name='default'):
+        with self.lock:
+            entry = self._hit(name)
+            if entry is not None:
+                return entry.detector
+            if name not in self.model_specs:
+                raise KeyError(f"Unknown model: {name}")
+            load_lock = self.load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self.lock:
+                entry = self._hit(name)
+                if entry is not None:
+                    return entry.detector
+                spec = self.model_specs[name]
+
+            check_local_weights(name, spec)
+            start_time = time.perf_counter()
+            detector = self.detector_factory(**spec)
+            load_time = time.perf_counter() - start_time
+            instrument_components(detector=detector)
+            entry = ModelEntry(name, detector, load_time, self.estimate_memory(detector.model))
+
+            with self.lock:
+                self.misses += 1
+                self.entries[name] = entry
+                self.evict_if_needed(keep=name)
+
+        return detector
+
+    def _hit(self, name):
+        entry = self.entries.get(name)
+        if entry is not None:
+            entry.hits += 1
+            entry.last_used = time.time()
+            self.entries.move_to_end(name)
+        return entry
+
+    def preload(self, names=None):
+        for name in names or list(self.model_specs):
+            self.get(name)
+
+    def evict(self, name):
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                self.evictions += 1
+
+    def evict_if_needed(self, keep=None):
+        if self.max_memory_bytes is None:
+            return
+
+        while self.resident_memory() > self.max_memory_bytes:
+            candidates = [name for name in self.entries if name != keep]
+            if not candidates:
+                break
+            del self.entries[candidates[0]]
+            self.evictions += 1
+
+    def resident_memory(self):
+        return sum(entry.memory_bytes for entry in self.entries.values())
+
+    def estimate_memory(self, model):
+        if hasattr(model, 'memory_bytes'):
+            return model.memory_bytes
+        if not hasattr(model, 'parameters'):
+            return 0
+
+        total_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        total_bytes += sum(b.numel() * b.element_size() for b in model.buffers())
+        return total_bytes
+
+    def stats(self):
+        with self.lock:
+            models = {}
+            for name, entry in self.entries.items():
+                models[name] = {
+                    'model_type': entry.detector.model_type,
+                    'load_time': entry.load_time,
+                    'hits': entry.hits,
+                    'memory_mb': entry.memory_bytes / (1024 * 1024),
+                    'loaded_at': entry.loaded_at,
+                    'last_used': entry.last_used
+                }
+
+            return {
+                'models': models,
+                'loaded_models': len(self.entries),
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'resident_memory_mb': self.resident_memory() / (1024 * 1024),
+                'max_memory_mb': self.max_memory_bytes / (1024 * 1024) if self.max_memory_bytes else None
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry(config=None):
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            if config is None:
+                from smartcity_vision.utils.config_loader import ConfigLoader
+                config = ConfigLoader()
+            _registry = ModelRegistry.from_config(config)
+        return _registry
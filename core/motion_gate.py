@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+class CameraMotionState:
+    def __init__(self):
+        self.reference = None
+        self.frames = 0
+        self.detections = 0
+        self.skipped = 0
+        self.forced = 0
+        self.frames_since_detection = 0
+
+class MotionGate:
+    def __init__(self, width=160, pixel_threshold=25, min_area_ratio=0.002, max_staleness=30, region_padding=8):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area_ratio = min_area_ratio
+        self.max_staleness = max_staleness
+        self.region_padding = region_padding
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self.cameras = {}
+
+    def downscale(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(self.width / width, 1.0)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0).astype(np.float32), scale
+
+    def find_regions(self, mask, scale, frame_shape):
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        height, width = frame_shape[:2]
+        padding = self.region_padding
+
+        regions = []
+        for x, y, w, h, _ in stats[1:num_labels]:
+            x1 = max(int(x / scale) - padding, 0)
+            y1 = max(int(y / scale) - padding, 0)
+            x2 = min(int((x + w) / scale) + padding, width)
+            y2 = min(int((y + h) / scale) + padding, height)
+            regions.append([x1, y1, x2, y2])
+        return regions
+
+    def update(self, frame, camera_id='default'):
+        state = self.cameras.setdefault(camera_id, CameraMotionState())
+        small, scale = self.downscale(frame)
+        state.frames += 1
+
+        if state.reference is None or state.reference.shape != small.shape:
+            state.reference = small
+            state.detections += 1
+            state.frames_since_detection = 0
+            return {'detect': True, 'motion': True, 'stale': False, 'changed_ratio': 1.0,
+                    'regions': [[0, 0, frame.shape[1], frame.shape[0]]]}
+
+        diff = cv2.absdiff(small, state.reference)
+        mask = (diff > self.pixel_threshold).astype(np.uint8)
+        mask = cv2.dilate(mask, self.kernel)
+        changed_ratio = float(mask.mean())
+        motion = changed_ratio >= self.min_area_ratio
+
+        stale = not motion and self.max_staleness is not None and \
+            state.frames_since_detection + 1 >= self.max_staleness
+        detect = motion or stale
+
+        if detect:
+            state.reference = small
+            state.detections += 1
+            state.frames_since_detection = 0
+            state.forced += stale
+        else:
+            state.skipped += 1
+            state.frames_since_detection += 1
+
+        return {
+            'detect': detect,
+            'motion': motion,
+            'stale': stale,
+            'changed_ratio': changed_ratio,
+            'regions': self.find_regions(mask, scale, frame.shape) if motion else []
+        }
+
+    def reset(self, camera_id=None):
+        if camera_id is None:
+            self.cameras.clear()
+        else:
+            self.cameras.pop(camera_id, None)
+
+    def get_stats(self, camera_id=None):
+        if camera_id is not None:
+            state = self.cameras.get(camera_id)
+            if state is None:
+                return None
+            return {
+                'frames': state.frames,
+                'detections': state.detections,
+                'skipped': state.skipped,
+                'forced': state.forced,
+                'skip_rate': state.skipped / state.frames if state.frames else 0
+            }
+
+        return {camera_id: self.get_stats(camera_id) for camera_id in self.cameras}
@@ -5,31 +5,72 @@ import torchvision
 from PIL import Image
 import time
 
+from .inference_backends import (split_model_type, default_export_path, load_backend,
+                                 to_yolo_input, yolo_postprocess)
+from smartcity_vision.utils.detection_batch import DetectionBatch, URBAN_CLASSES
+
+COCO_INSTANCE_CATEGORY_NAMES = [
+    '__background__', 'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck',
+    'boat', 'traffic light', 'fire hydrant', 'N/A', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'N/A', 'backpack', 'umbrella',
+    'N/A', 'N/A', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball', 'kite',
+    'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket', 'bottle', 'N/A',
+    'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
+    'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'couch', 'potted plant', 'bed',
+    'N/A', 'dining table', 'N/A', 'N/A', 'toilet', 'N/A', 'tv', 'laptop', 'mouse', 'remote', 'keyboard',
+    'cell phone', 'microwave', 'oven', 'toaster', 'sink', 'refrigerator', 'N/A', 'book', 'clock', 'vase',
+    'scissors', 'teddy bear', 'hair drier', 'toothbrush'
+]
+
 class ObjectDetector:
-    def __init__(self, model_type='yolov5', model_path=None, confidence_threshold=0.5):
+    def __init__(self, model_type='yolov5', model_path=None, confidence_threshold=0.5, repo_path=None,
+                 quantization=None, export_path=None, image_size=640, calibration_images=None, num_threads=None):
         self.model_type = model_type
+        self.arch, self.backend = split_model_type(model_type)
         self.confidence_threshold = confidence_threshold
+        self.repo_path = repo_path
+        self.quantization = quantization
+        self.image_size = image_size
+        self.export_path = export_path
+        if self.backend and not export_path:
+            self.export_path = default_export_path(model_path, self.arch, self.backend, quantization, image_size)
+        self.calibration_images = calibration_images
+        self.num_threads = num_threads
         self.model = self.load_model(model_path)
         self.class_names = self.get_class_names()
         
     def load_model(self, model_path):
-        if self.model_type == 'yolov5':
+        if self.backend is None:
+            return self.load_eager_model(model_path)
+        
+        model = self.load_eager_model(model_path, autoshape=False)
+        return load_backend(model, self.arch, self.backend, self.export_path, self.image_size,
+                            self.quantization, self.calibration_images, self.num_threads)
+    
+    def load_eager_model(self, model_path, autoshape=True):
+        if self.arch == 'yolov5':
+            if model_path and self.repo_path:
+                model = torch.hub.load(self.repo_path, 'custom', path=model_path, source='local', autoshape=autoshape)
+            elif model_path:
+                model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path, autoshape=autoshape)
+            else:
+                model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True, autoshape=autoshape)
+        elif self.arch == 'faster_rcnn':
             if model_path:
-                model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path)
+                model = torchvision.models.detection.fasterrcnn_resnet50_fpn(pretrained=False, pretrained_backbone=False)
+                model.load_state_dict(torch.load(model_path, map_location='cpu'))
             else:
-                model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
-        elif self.model_type == 'faster_rcnn':
-            model = torchvision.models.detection.fasterrcnn_resnet50_fpn(pretrained=True)
+                model = torchvision.models.detection.fasterrcnn_resnet50_fpn(pretrained=True)
             model.eval()
         else:
             raise ValueError("Unsupported model type")
         return model
     
     def get_class_names(self):
-        if self.model_type == 'yolov5':
+        if self.arch == 'yolov5':
             return self.model.names
         else:
-            return ['person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck']
+            return COCO_INSTANCE_CATEGORY_NAMES
     
     def preprocess_image(self, image):
         if isinstance(image, str):
@@ -43,43 +84,72 @@ class ObjectDetector:
         return image_rgb
     
     def detect_objects(self, image):
+        return self.detect(image).to_dicts()
+    
+    def detect_objects_batch(self, frames):
+        if isinstance(frames, dict):
+            return {key: batch.to_dicts() for key, batch in self.detect_batch(frames).items()}
+        return [batch.to_dicts() for batch in self.detect_batch(frames)]
+    
+    def detect(self, image):
+        if self.backend is not None:
+            return self.detect_batch([image])[0]
+        
         preprocessed_image = self.preprocess_image(image)
         
         if self.model_type == 'yolov5':
             results = self.model(preprocessed_image)
-            detections = results.xyxy[0].cpu().numpy()
-            
-            objects = []
-            for det in detections:
-                x1, y1, x2, y2, conf, cls = det
-                if conf >= self.confidence_threshold:
-                    objects.append({
-                        'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                        'confidence': float(conf),
-                        'class_id': int(cls),
-                        'class_name': self.class_names[int(cls)]
-                    })
+            return self.parse_yolo_detections(results.xyxy[0])
         else:
             image_tensor = torch.from_numpy(preprocessed_image).permute(2, 0, 1).float() / 255.0
             with torch.no_grad():
                 predictions = self.model([image_tensor])
-            
-            objects = []
-            for i in range(len(predictions[0]['boxes'])):
-                if predictions[0]['scores'][i] >= self.confidence_threshold:
-                    bbox = predictions[0]['boxes'][i].cpu().numpy().astype(int)
-                    objects.append({
-                        'bbox': bbox.tolist(),
-                        'confidence': float(predictions[0]['scores'][i]),
-                        'class_id': int(predictions[0]['labels'][i]),
-                        'class_name': self.class_names[int(predictions[0]['labels'][i])]
-                    })
+            return self.parse_rcnn_predictions(predictions[0])
+    
+    def detect_batch(self, frames):
+        if isinstance(frames, dict):
+            keys = list(frames.keys())
+            results = self.detect_batch([frames[key] for key in keys])
+            return dict(zip(keys, results))
         
-        return objects
+        if not frames:
+            return []
+        
+        preprocessed_images = [self.preprocess_image(frame) for frame in frames]
+        
+        if self.backend is not None:
+            return self.detect_with_backend(preprocessed_images)
+        
+        if self.model_type == 'yolov5':
+            results = self.model(preprocessed_images)
+            return [self.parse_yolo_detections(detections) for detections in results.xyxy]
+        else:
+            image_tensors = [torch.from_numpy(image).permute(2, 0, 1).float() / 255.0 for image in preprocessed_images]
+            with torch.no_grad():
+                predictions = self.model(image_tensors)
+            return [self.parse_rcnn_predictions(prediction) for prediction in predictions]
+    
+    def detect_with_backend(self, preprocessed_images):
+        if self.arch == 'yolov5':
+            inputs, transforms = to_yolo_input(preprocessed_images, self.image_size)
+            detections = yolo_postprocess(self.model(inputs), transforms, self.confidence_threshold)
+            return [self.parse_yolo_detections(image_detections) for image_detections in detections]
+        
+        inputs = [image.transpose(2, 0, 1).astype(np.float32) / 255.0 for image in preprocessed_images]
+        return [self.parse_rcnn_predictions(prediction) for prediction in self.model(inputs)]
+    
+    def parse_yolo_detections(self, detections):
+        return DetectionBatch.from_tensor(detections, self.class_names, self.confidence_threshold)
+    
+    def parse_rcnn_predictions(self, prediction):
+        return DetectionBatch.from_rcnn(prediction, self.class_names, self.confidence_threshold)
     
     def filter_urban_objects(self, objects, target_classes=None):
         if target_classes is None:
-            target_classes = ['person', 'car', 'bus', 'truck', 'motorcycle', 'bicycle']
+            target_classes = URBAN_CLASSES
+        
+        if isinstance(objects, DetectionBatch):
+            return objects.select(target_classes)
         
         filtered_objects = []
         for obj in objects:
@@ -2,11 +2,17 @@ import cv2
 import numpy as np
 from sklearn.cluster import KMeans
 
+from .parking_index import ParkingSpotIndex
+from smartcity_vision.utils.detection_batch import DetectionBatch, PARKING_CLASSES
+
 class ParkingAnalyzer:
-    def __init__(self):
+    def __init__(self, use_spatial_index=True, index_cell_size=None):
         self.parking_spots = {}
         self.occupied_spots = set()
         self.parking_occupancy = {}
+        self.use_spatial_index = use_spatial_index
+        self.index_cell_size = index_cell_size
+        self.spot_index = None
         
     def detect_parking_spots(self, frame, method='grid'):
         if method == 'grid':
@@ -68,15 +74,40 @@ class ParkingAnalyzer:
         self.parking_spots = spots
         return spots
     
+    def get_spot_index(self):
+        if self.spot_index is None or self.spot_index.spots is not self.parking_spots or \
+                len(self.spot_index.spot_ids) != len(self.parking_spots):
+            self.spot_index = ParkingSpotIndex(self.parking_spots, self.index_cell_size)
+        return self.spot_index
+    
     def analyze_parking_occupancy(self, objects, frame):
-        vehicles = [obj for obj in objects if obj['class_name'] in ['car', 'bus', 'truck']]
+        vehicles = DetectionBatch.coerce(objects).select(PARKING_CLASSES)
+        
+        if self.use_spatial_index:
+            self.update_occupancy_indexed(vehicles)
+        else:
+            self.update_occupancy(vehicles)
+        
+        total_spots = len(self.parking_spots)
+        occupied_spots = sum(1 for spot in self.parking_spots.values() if spot['occupied'])
+        available_spots = total_spots - occupied_spots
         
+        return {
+            'total_spots': total_spots,
+            'occupied_spots': occupied_spots,
+            'available_spots': available_spots,
+            'occupancy_rate': (occupied_spots / total_spots) * 100 if total_spots > 0 else 0,
+            'spots_detail': self.parking_spots
+        }
+    
+    def update_occupancy(self, vehicles):
+        vehicle_bboxes = DetectionBatch.coerce(vehicles).boxes.tolist()
         for spot_id, spot in self.parking_spots.items():
             spot_occupied = False
             max_iou = 0
             
-            for vehicle in vehicles:
-                iou = self.calculate_iou(spot['bbox'], vehicle['bbox'])
+            for vehicle_bbox in vehicle_bboxes:
+                iou = self.calculate_iou(spot['bbox'], vehicle_bbox)
                 if iou > max_iou:
                     max_iou = iou
                 
@@ -85,18 +116,14 @@ class ParkingAnalyzer:
             
             self.parking_spots[spot_id]['occupied'] = spot_occupied
             self.parking_spots[spot_id]['confidence'] = max_iou
+    
+    def update_occupancy_indexed(self, vehicles):
+        spot_index = self.get_spot_index()
+        max_iou = spot_index.max_iou(DetectionBatch.coerce(vehicles).boxes)
         
-        total_spots = len(self.parking_spots)
-        occupied_spots = sum(1 for spot in self.parking_spots.values() if spot['occupied'])
-        available_spots = total_spots - occupied_spots
-        
-        return {
-            'total_spots': total_spots,
-            'occupied_spots': occupied_spots,
-            'available_spots': available_spots,
-            'occupancy_rate': (occupied_spots / total_spots) * 100 if total_spots > 0 else 0,
-            'spots_detail': self.parking_spots
-        }
+        for spot_id, iou in zip(spot_index.spot_ids, max_iou.tolist()):
+            self.parking_spots[spot_id]['occupied'] = iou > 0.3
+            self.parking_spots[spot_id]['confidence'] = iou
     
     def calculate_iou(self, bbox1, bbox2):
         x1 = max(bbox1[0], bbox2[0])
@@ -0,0 +1,96 @@
+import numpy as np
+
+from smartcity_vision.utils.box_utils import to_box_array, box_areas
+
+def expand_ranges(starts, lengths):
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(total)
+
+class ParkingSpotIndex:
+    def __init__(self, parking_spots, cell_size=None):
+        self.spots = parking_spots
+        self.spot_ids = list(parking_spots.keys())
+        self.boxes = to_box_array([spot['bbox'] for spot in parking_spots.values()])
+        self.areas = box_areas(self.boxes)
+
+        if cell_size is None:
+            cell_size = self.default_cell_size()
+        self.cell_size = float(cell_size)
+        self.build_grid()
+
+    def default_cell_size(self):
+        if not len(self.boxes):
+            return 1.0
+        sizes = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+        return max(float(np.median(sizes)), 1.0)
+
+    def build_grid(self):
+        if len(self.boxes):
+            self.origin = self.boxes[:, :2].min(axis=0)
+            extent = self.boxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            extent = np.zeros(2)
+        self.grid_cols = int(extent[0] // self.cell_size) + 1
+        self.grid_rows = int(extent[1] // self.cell_size) + 1
+
+        col0, row0, col1, row1 = self.cell_ranges(self.boxes)
+        spot_cells, spot_idx = self.expand_cells(col0, row0, col1, row1)
+
+        order = np.argsort(spot_cells, kind='stable')
+        self.cell_spots = spot_idx[order]
+        counts = np.bincount(spot_cells, minlength=self.grid_rows * self.grid_cols)
+        self.cell_starts = np.concatenate([[0], np.cumsum(counts)])
+
+    def cell_ranges(self, boxes):
+        cells = np.floor((boxes - np.tile(self.origin, 2)) / self.cell_size).astype(np.int64)
+        col0 = np.clip(cells[:, 0], 0, self.grid_cols - 1)
+        row0 = np.clip(cells[:, 1], 0, self.grid_rows - 1)
+        col1 = np.clip(cells[:, 2], -1, self.grid_cols - 1)
+        row1 = np.clip(cells[:, 3], -1, self.grid_rows - 1)
+        return col0, row0, col1, row1
+
+    def expand_cells(self, col0, row0, col1, row1):
+        cols = np.maximum(col1 - col0 + 1, 0)
+        rows = np.maximum(row1 - row0 + 1, 0)
+        counts = cols * rows
+
+        owner = np.repeat(np.arange(len(counts)), counts)
+        local = expand_ranges(np.zeros(len(counts), dtype=np.int64), counts)
+        cell_cols = col0[owner] + local % cols[owner]
+        cell_rows = row0[owner] + local // cols[owner]
+        return cell_rows * self.grid_cols + cell_cols, owner
+
+    def candidate_pairs(self, vehicle_boxes):
+        vehicle_cells, vehicle_idx = self.expand_cells(*self.cell_ranges(vehicle_boxes))
+
+        starts = self.cell_starts[vehicle_cells]
+        lengths = self.cell_starts[vehicle_cells + 1] - starts
+        spot_idx = self.cell_spots[expand_ranges(starts, lengths)]
+        vehicle_idx = np.repeat(vehicle_idx, lengths)
+
+        pair_keys = np.unique(vehicle_idx * len(self.boxes) + spot_idx)
+        return pair_keys // len(self.boxes), pair_keys % len(self.boxes)
+
+    def max_iou(self, vehicle_bboxes):
+        spot_iou = np.zeros(len(self.boxes))
+        vehicle_boxes = to_box_array(vehicle_bboxes)
+        if not len(vehicle_boxes) or not len(self.boxes):
+            return spot_iou
+
+        vehicle_idx, spot_idx = self.candidate_pairs(vehicle_boxes)
+        vehicles = vehicle_boxes[vehicle_idx]
+        spots = self.boxes[spot_idx]
+
+        width = np.minimum(vehicles[:, 2], spots[:, 2]) - np.maximum(vehicles[:, 0], spots[:, 0])
+        height = np.minimum(vehicles[:, 3], spots[:, 3]) - np.maximum(vehicles[:, 1], spots[:, 1])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        union = self.areas[spot_idx] + box_areas(vehicles) - intersection
+
+        iou = np.zeros(len(intersection))
+        np.divide(intersection, union, out=iou, where=union > 0)
+        np.maximum.at(spot_iou, spot_idx, iou)
+        return spot_iou
@@ -2,34 +2,73 @@ import cv2
 import numpy as np
 from collections import defaultdict, deque
 
+from .sort_tracker import SortTracker
+from smartcity_vision.utils.box_utils import box_iou_matrix, to_box_array
+from smartcity_vision.utils.detection_batch import DetectionBatch
+
 class PedestrianTracker:
-    def __init__(self, max_age=30):
-        self.max_age = max_age
+    def __init__(self, config=None, max_age=None, engine=None, iou_threshold=None, trajectory_length=None):
+        self.config = config or {}
+        self.max_age = max_age if max_age is not None else self.config.get('max_track_age', 30)
+        self.engine = engine or self.config.get('tracking_engine', 'sort')
+        iou_threshold = iou_threshold if iou_threshold is not None else self.config.get('iou_threshold', 0.3)
+        self.trajectory_length = trajectory_length or self.config.get('trajectory_length', 50)
         self.tracks = {}
         self.next_id = 0
-        self.trajectories = defaultdict(lambda: deque(maxlen=50))
+        self.trajectories = defaultdict(lambda: deque(maxlen=self.trajectory_length))
+        self.sort_tracker = SortTracker(max_age=self.max_age, iou_threshold=iou_threshold) \
+            if self.engine == 'sort' else None
         
     def update_tracks(self, detections):
+        if self.sort_tracker is not None:
+            return self.update_tracks_sort(detections)
+        
+        people = DetectionBatch.coerce(detections).select(['person'])
         current_tracks = {}
         
-        for detection in detections:
-            if detection['class_name'] == 'person':
-                track_id = self.assign_track_id(detection)
-                bbox = detection['bbox']
-                center = [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
-                
-                self.trajectories[track_id].append(center)
-                
-                current_tracks[track_id] = {
-                    'bbox': bbox,
-                    'center': center,
-                    'age': 0,
-                    'trajectory': list(self.trajectories[track_id])
-                }
+        for detection, center in zip(people, people.centers.tolist()):
+            track_id = self.assign_track_id(detection)
+            bbox = detection['bbox']
+            
+            self.trajectories[track_id].append(center)
+            
+            current_tracks[track_id] = {
+                'bbox': bbox,
+                'center': center,
+                'age': 0,
+                'trajectory': list(self.trajectories[track_id])
+            }
         
         self.cleanup_old_tracks(current_tracks)
         return current_tracks
     
+    def update_tracks_sort(self, detections):
+        people = DetectionBatch.coerce(detections).select(['person'])
+        track_ids = self.sort_tracker.update(people.boxes)
+        bboxes = people.boxes.astype(int).tolist()
+        
+        current_tracks = {}
+        for bbox, center, track_id in zip(bboxes, people.centers.tolist(), track_ids.tolist()):
+            self.trajectories[track_id].append(center)
+            
+            current_tracks[track_id] = {
+                'bbox': bbox,
+                'center': center,
+                'age': 0,
+                'trajectory': list(self.trajectories[track_id])
+            }
+        
+        for track_id in self.sort_tracker.removed_ids:
+            self.tracks.pop(track_id, None)
+            self.trajectories.pop(track_id, None)
+        
+        for track_id in self.tracks:
+            if track_id not in current_tracks:
+                self.tracks[track_id]['age'] += 1
+        self.tracks.update(current_tracks)
+        
+        return current_tracks
+    
     def assign_track_id(self, detection):
         best_match = None
         best_iou = 0.3
@@ -47,6 +86,9 @@ class PedestrianTracker:
             self.next_id += 1
             return new_id
     
+    def calculate_iou(self, bbox1, bbox2):
+        return float(box_iou_matrix(to_box_array([bbox1]), to_box_array([bbox2]))[0, 0])
+    
     def cleanup_old_tracks(self, current_tracks):
         tracks_to_remove = []
         
@@ -55,13 +97,12 @@ class PedestrianTracker:
                 self.tracks[track_id]['age'] += 1
                 if self.tracks[track_id]['age'] > self.max_age:
                     tracks_to_remove.append(track_id)
-            else:
-                self.tracks[track_id] = current_tracks[track_id]
         
         for track_id in tracks_to_remove:
             del self.tracks[track_id]
             if track_id in self.trajectories:
                 del self.trajectories[track_id]
+        self.tracks.update(current_tracks)
     
     def analyze_pedestrian_flow(self, tracks):
         total_pedestrians = len(tracks)
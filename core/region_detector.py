@@ -0,0 +1,169 @@
+import cv2
+import numpy as np
+
+from smartcity_vision.utils.detection_batch import DetectionBatch
+from smartcity_vision.utils.box_utils import to_box_array, box_areas, box_ios_matrix, non_max_suppression
+
+class RegionDetector:
+    def __init__(self, detector, rois=None, tile_size=None, tile_overlap=0.2, nms_threshold=0.5,
+                 nms_metric='iou'):
+        self.detector = detector
+        self.rois = [np.asarray(polygon, dtype=np.int32).reshape(-1, 2) for polygon in rois or []]
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.nms_threshold = nms_threshold
+        self.nms_metric = nms_metric
+        self.frames = 0
+        self.crops = 0
+        self.pixels_processed = 0
+        self.pixels_total = 0
+
+    @classmethod
+    def from_config(cls, detector, config, camera_id='default'):
+        rois = (config.get('roi.cameras') or {}).get(camera_id)
+        return cls(
+            detector,
+            rois=rois,
+            tile_size=config.get('roi.tile_size'),
+            tile_overlap=config.get('roi.tile_overlap', 0.2),
+            nms_threshold=config.get('roi.nms_threshold', 0.5),
+            nms_metric=config.get('roi.nms_metric', 'iou')
+        )
+
+    @property
+    def model_type(self):
+        return self.detector.model_type
+
+    def preprocess_image(self, image):
+        return self.detector.preprocess_image(image)
+
+    def filter_urban_objects(self, objects, target_classes=None):
+        return self.detector.filter_urban_objects(objects, target_classes)
+
+    def roi_windows(self, frame_shape):
+        height, width = frame_shape[:2]
+        windows = []
+        for polygon in self.rois:
+            x, y, w, h = cv2.boundingRect(polygon)
+            x1, y1 = max(x, 0), max(y, 0)
+            x2, y2 = min(x + w, width), min(y + h, height)
+            if x2 > x1 and y2 > y1:
+                windows.append((x1, y1, x2, y2))
+        return windows
+
+    def clip_to_rois(self, regions, frame_shape):
+        if not self.rois:
+            return [tuple(region) for region in regions]
+
+        windows = []
+        for rx1, ry1, rx2, ry2 in self.roi_windows(frame_shape):
+            for x1, y1, x2, y2 in regions:
+                x1, y1, x2, y2 = max(x1, rx1), max(y1, ry1), min(x2, rx2), min(y2, ry2)
+                if x2 > x1 and y2 > y1:
+                    windows.append((x1, y1, x2, y2))
+        return windows
+
+    def tile_spans(self, start, end):
+        length = end - start
+        if not self.tile_size or length <= self.tile_size:
+            return [(start, end)]
+
+        stride = max(int(self.tile_size * (1 - self.tile_overlap)), 1)
+        count = int(np.ceil((length - self.tile_size) / stride)) + 1
+        offsets = np.linspace(0, length - self.tile_size, count).round().astype(int)
+        return [(start + offset, start + offset + self.tile_size) for offset in offsets.tolist()]
+
+    def tile_windows(self, windows):
+        tiles = []
+        tile_windows = []
+        for window in windows:
+            x1, y1, x2, y2 = window
+            for ty1, ty2 in self.tile_spans(y1, y2):
+                for tx1, tx2 in self.tile_spans(x1, x2):
+                    tiles.append((tx1, ty1, tx2, ty2))
+                    tile_windows.append(window)
+        return tiles, tile_windows
+
+    def is_truncated(self, bbox, tile, window, margin=2):
+        return any(abs(bbox[i] - tile[i]) <= margin and tile[i] != window[i] for i in range(4))
+
+    def inside_rois(self, bbox):
+        center = ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+        return any(cv2.pointPolygonTest(polygon, center, False) >= 0 for polygon in self.rois)
+
+    def fragment_mask(self, boxes, labels, tile_ids, truncated):
+        labels, tile_ids = np.asarray(labels), np.asarray(tile_ids)
+        areas = box_areas(boxes)
+        candidates = (labels[:, None] == labels[None, :]) & (tile_ids[:, None] != tile_ids[None, :])
+        candidates &= areas[:, None] <= areas[None, :]
+        contained = candidates & (box_ios_matrix(boxes, boxes) > self.nms_threshold)
+        np.fill_diagonal(contained, False)
+        return np.asarray(truncated, dtype=bool) & contained.any(axis=1)
+
+    def detect_objects(self, image, regions=None):
+        height, width = image.shape[:2]
+        if regions is not None:
+            windows = self.clip_to_rois(regions, image.shape)
+        elif self.rois:
+            windows = self.roi_windows(image.shape)
+        else:
+            windows = [(0, 0, width, height)]
+
+        tiles, tile_windows = self.tile_windows(windows)
+        self.frames += 1
+        self.crops += len(tiles)
+        self.pixels_total += width * height
+        self.pixels_processed += sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in tiles)
+
+        if not tiles:
+            return []
+        if tiles == [(0, 0, width, height)]:
+            return self.detector.detect_objects(image)
+
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        results = self.detector.detect_objects_batch(crops)
+
+        objects = []
+        priorities = []
+        tile_ids = []
+        truncated = []
+        for tile_id, (tile, window, tile_objects) in enumerate(zip(tiles, tile_windows, results)):
+            x1, y1 = tile[:2]
+            for obj in tile_objects:
+                bx1, by1, bx2, by2 = obj['bbox']
+                obj['bbox'] = [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1]
+                if self.rois and not self.inside_rois(obj['bbox']):
+                    continue
+                objects.append(obj)
+                truncated.append(self.is_truncated(obj['bbox'], tile, window))
+                priorities.append(obj['confidence'] - truncated[-1])
+                tile_ids.append(tile_id)
+
+        if len(tiles) > 1 and objects:
+            boxes = to_box_array([obj['bbox'] for obj in objects])
+            labels = [obj['class_id'] for obj in objects]
+            fragments = self.fragment_mask(boxes, labels, tile_ids, truncated)
+            remaining = np.flatnonzero(~fragments)
+            keep = non_max_suppression(boxes[remaining], np.asarray(priorities)[remaining],
+                                       np.asarray(labels)[remaining], self.nms_threshold, self.nms_metric,
+                                       groups=np.asarray(tile_ids)[remaining])
+            objects = [objects[i] for i in sorted(remaining[keep].tolist())]
+
+        return objects
+
+    def detect_changed(self, image, regions, previous):
+        previous = DetectionBatch.coerce(previous)
+        boxes, windows = previous.boxes, np.asarray(regions, dtype=np.float32).reshape(-1, 4)
+        overlaps = ((boxes[:, None, 0] < windows[None, :, 2]) & (boxes[:, None, 2] > windows[None, :, 0]) &
+                    (boxes[:, None, 1] < windows[None, :, 3]) & (boxes[:, None, 3] > windows[None, :, 1]))
+        unchanged = previous[~overlaps.any(axis=1)]
+
+        objects = self.filter_urban_objects(self.detect_objects(image, regions=regions))
+        return DetectionBatch.concatenate([unchanged, objects])
+
+    def get_stats(self):
+        return {
+            'frames': self.frames,
+            'crops_per_frame': self.crops / self.frames if self.frames else 0,
+            'processed_pixel_ratio': self.pixels_processed / self.pixels_total if self.pixels_total else 0
+        }
@@ -0,0 +1,143 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from smartcity_vision.utils.box_utils import to_box_array, box_iou_matrix
+
+class SortTracker:
+    def __init__(self, max_age=30, iou_threshold=0.3, std_weight_position=1.0 / 20, std_weight_velocity=1.0 / 160):
+        self.max_age = max_age
+        self.iou_threshold = iou_threshold
+        self.std_weight_position = std_weight_position
+        self.std_weight_velocity = std_weight_velocity
+
+        self.transition = np.eye(8)
+        self.transition[:4, 4:] = np.eye(4)
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.states = np.zeros((0, 8))
+        self.covariances = np.zeros((0, 8, 8))
+        self.time_since_update = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.next_id = 0
+        self.removed_ids = []
+
+    def update(self, bboxes):
+        detections = to_box_array(bboxes)
+        self.predict()
+
+        matches, unmatched_detections = self.associate(detections)
+        track_ids = np.full(len(detections), -1, dtype=np.int64)
+
+        if len(matches):
+            det_idx, track_idx = matches[:, 0], matches[:, 1]
+            self.correct(track_idx, self.to_measurement(detections[det_idx]))
+            self.time_since_update[track_idx] = 0
+            self.hits[track_idx] += 1
+            track_ids[det_idx] = self.ids[track_idx]
+
+        if len(unmatched_detections):
+            track_ids[unmatched_detections] = self.initiate(detections[unmatched_detections])
+
+        alive = self.time_since_update <= self.max_age
+        self.removed_ids = self.ids[~alive].tolist()
+        self.ids = self.ids[alive]
+        self.states = self.states[alive]
+        self.covariances = self.covariances[alive]
+        self.time_since_update = self.time_since_update[alive]
+        self.hits = self.hits[alive]
+
+        return track_ids
+
+    def predict(self):
+        if not len(self.ids):
+            return
+
+        self.states = self.states @ self.transition.T
+        self.covariances = self.transition @ self.covariances @ self.transition.T + self.process_noise(self.states)
+        self.time_since_update += 1
+
+    def associate(self, detections):
+        if not len(detections) or not len(self.ids):
+            return np.zeros((0, 2), dtype=np.int64), np.arange(len(detections))
+
+        iou = box_iou_matrix(detections, self.predicted_boxes())
+        det_idx, track_idx = linear_sum_assignment(-iou)
+
+        valid = iou[det_idx, track_idx] >= self.iou_threshold
+        matches = np.stack([det_idx[valid], track_idx[valid]], axis=1)
+
+        unmatched = np.ones(len(detections), dtype=bool)
+        unmatched[matches[:, 0]] = False
+        return matches, np.flatnonzero(unmatched)
+
+    def correct(self, track_idx, measurements):
+        states = self.states[track_idx]
+        covariances = self.covariances[track_idx]
+
+        innovation_cov = covariances[:, :4, :4] + self.measurement_noise(states)
+        gain = np.linalg.solve(innovation_cov, covariances[:, :4, :]).transpose(0, 2, 1)
+        innovation = measurements - states[:, :4]
+
+        self.states[track_idx] = states + (gain @ innovation[:, :, None])[:, :, 0]
+        self.covariances[track_idx] = covariances - gain @ covariances[:, :4, :]
+
+    def initiate(self, detections):
+        measurements = self.to_measurement(detections)
+        count = len(measurements)
+
+        states = np.hstack([measurements, np.zeros((count, 4))])
+        scale = np.stack([measurements[:, 2], measurements[:, 3]] * 2, axis=1)
+        std = np.hstack([2 * self.std_weight_position * scale, 10 * self.std_weight_velocity * scale])
+
+        new_ids = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.states = np.vstack([self.states, states])
+        self.covariances = np.concatenate([self.covariances, self.diagonal(std ** 2)])
+        self.time_since_update = np.concatenate([self.time_since_update, np.zeros(count, dtype=np.int64)])
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+        return new_ids
+
+    def process_noise(self, states):
+        scale = self.state_scale(states)
+        std = np.hstack([self.std_weight_position * scale, self.std_weight_velocity * scale])
+        return self.diagonal(std ** 2)
+
+    def measurement_noise(self, states):
+        std = self.std_weight_position * self.state_scale(states)
+        return self.diagonal(std ** 2)
+
+    def state_scale(self, states):
+        width = np.maximum(states[:, 2], 1.0)
+        height = np.maximum(states[:, 3], 1.0)
+        return np.stack([width, height, width, height], axis=1)
+
+    def diagonal(self, values):
+        matrices = np.zeros(values.shape + (values.shape[1],))
+        idx = np.arange(values.shape[1])
+        matrices[:, idx, idx] = values
+        return matrices
+
+    def to_measurement(self, boxes):
+        width = boxes[:, 2] - boxes[:, 0]
+        height = boxes[:, 3] - boxes[:, 1]
+        return np.stack([boxes[:, 0] + width / 2, boxes[:, 1] + height / 2, width, height], axis=1)
+
+    def predicted_boxes(self):
+        center_x, center_y = self.states[:, 0], self.states[:, 1]
+        half_width = np.maximum(self.states[:, 2], 1.0) / 2
+        half_height = np.maximum(self.states[:, 3], 1.0) / 2
+        return np.stack([center_x - half_width, center_y - half_height, center_x + half_width, center_y + half_height], axis=1)
+
+    def get_tracks(self):
+        boxes = self.predicted_boxes()
+        return {
+            int(track_id): {
+                'bbox': boxes[i].astype(int).tolist(),
+                'velocity': self.states[i, 4:6].tolist(),
+                'age': int(self.time_since_update[i]),
+                'hits': int(self.hits[i])
+            }
+            for i, track_id in enumerate(self.ids)
+        }
@@ -0,0 +1,177 @@
+import cv2
+import numpy as np
+
+DEFAULT_BINS = (0, 10, 20, 30, 40, 50, 60, 80, 100, 130)
+
+def homography_from_config(config):
+    if config.get('homography') is not None:
+        return np.asarray(config['homography'], dtype=np.float64).reshape(3, 3)
+    if config.get('image_points') and config.get('world_points'):
+        matrix, _ = cv2.findHomography(np.asarray(config['image_points'], dtype=np.float64),
+                                       np.asarray(config['world_points'], dtype=np.float64))
+        return matrix
+    if config.get('meters_per_pixel'):
+        return np.diag([config['meters_per_pixel'], config['meters_per_pixel'], 1.0])
+    return None
+
+class SpeedEstimator:
+    def __init__(self, homography, lanes=None, smoothing=0.3, max_speed=250.0, min_interval=0.02,
+                 history=512, bins=DEFAULT_BINS):
+        self.homography = np.asarray(homography, dtype=np.float64)
+        self.lanes = [(name, np.asarray(polygon, dtype=np.int32)) for name, polygon in (lanes or {}).items()]
+        self.smoothing = smoothing
+        self.max_speed = max_speed
+        self.min_interval = min_interval
+        self.bins = np.asarray(bins, dtype=np.float64)
+        self.lane_map = None
+
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.positions = np.zeros((0, 2))
+        self.timestamps = np.zeros(0)
+        self.speeds = np.full(0, np.nan)
+        self.track_lanes = np.zeros(0, dtype=np.int64)
+
+        self.history = np.full((len(self.lanes) + 1, history), np.nan)
+        self.history_index = np.zeros(len(self.lanes) + 1, dtype=np.int64)
+
+    @classmethod
+    def from_config(cls, config, camera_id='default'):
+        config = dict(config or {})
+        config.update((config.get('cameras') or {}).get(camera_id) or {})
+
+        homography = homography_from_config(config)
+        if homography is None:
+            return None
+
+        lanes = {lane['name']: lane['polygon'] for lane in config.get('lanes') or []}
+        return cls(
+            homography,
+            lanes=lanes,
+            smoothing=config.get('smoothing', 0.3),
+            max_speed=config.get('max_speed', 250.0),
+            history=config.get('history', 512),
+            bins=config.get('bins', DEFAULT_BINS)
+        )
+
+    @property
+    def lane_names(self):
+        return [name for name, _ in self.lanes] + ['unassigned']
+
+    def to_ground(self, points):
+        projected = points @ self.homography[:, :2].T + self.homography[:, 2]
+        return projected[:, :2] / projected[:, 2:3]
+
+    def build_lane_map(self, width, height):
+        self.lane_map = np.full((height, width), len(self.lanes), dtype=np.int16)
+        for index, (_, polygon) in enumerate(self.lanes):
+            cv2.fillPoly(self.lane_map, [polygon], index)
+
+    def assign_lanes(self, points):
+        if not self.lanes:
+            return np.zeros(len(points), dtype=np.int64)
+
+        coords = np.floor(points).astype(np.int64)
+        width, height = coords.max(axis=0) + 1 if len(coords) else (0, 0)
+        if self.lane_map is None or width > self.lane_map.shape[1] or height > self.lane_map.shape[0]:
+            extent = np.vstack([polygon for _, polygon in self.lanes] + [coords]).max(axis=0) + 1
+            self.build_lane_map(*extent.tolist())
+
+        lanes = np.full(len(points), len(self.lanes), dtype=np.int64)
+        inside = (coords >= 0).all(axis=1)
+        lanes[inside] = self.lane_map[coords[inside, 1], coords[inside, 0]]
+        return lanes
+
+    def update(self, track_ids, points, timestamp, removed_ids=()):
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        positions = self.to_ground(points)
+        lanes = self.assign_lanes(points)
+
+        index = np.searchsorted(self.ids, track_ids)
+        known = index < len(self.ids)
+        known[known] = self.ids[index[known]] == track_ids[known]
+        previous = index[known]
+
+        speeds = np.full(len(track_ids), np.nan)
+        elapsed = timestamp - self.timestamps[previous]
+        valid = elapsed >= self.min_interval
+        distance = np.linalg.norm(positions[known] - self.positions[previous], axis=1)
+        raw = np.full(len(previous), np.nan)
+        np.divide(distance * 3.6, elapsed, out=raw, where=valid)
+        raw[raw > self.max_speed] = np.nan
+
+        last = self.speeds[previous]
+        smoothed = np.where(np.isnan(last), raw, self.smoothing * raw + (1 - self.smoothing) * last)
+        smoothed = np.where(np.isnan(raw), last, smoothed)
+        speeds[known] = smoothed
+
+        self.positions[previous[valid]] = positions[known][valid]
+        self.timestamps[previous[valid]] = timestamp
+        self.speeds[previous] = smoothed
+        self.track_lanes[previous] = lanes[known]
+
+        if (~known).any():
+            self.insert(track_ids[~known], positions[~known], timestamp, lanes[~known])
+        if len(removed_ids):
+            self.remove(np.asarray(removed_ids, dtype=np.int64))
+        return speeds
+
+    def insert(self, track_ids, positions, timestamp, lanes):
+        ids = np.concatenate([self.ids, track_ids])
+        order = np.argsort(ids, kind='stable')
+        self.ids = ids[order]
+        self.positions = np.concatenate([self.positions, positions])[order]
+        self.timestamps = np.concatenate([self.timestamps, np.full(len(track_ids), timestamp)])[order]
+        self.speeds = np.concatenate([self.speeds, np.full(len(track_ids), np.nan)])[order]
+        self.track_lanes = np.concatenate([self.track_lanes, lanes])[order]
+
+    def remove(self, removed_ids):
+        finished = np.isin(self.ids, removed_ids)
+        for lane, speed in zip(self.track_lanes[finished].tolist(), self.speeds[finished].tolist()):
+            if not np.isnan(speed):
+                self.history[lane, self.history_index[lane] % self.history.shape[1]] = speed
+                self.history_index[lane] += 1
+
+        keep = ~finished
+        self.ids = self.ids[keep]
+        self.positions = self.positions[keep]
+        self.timestamps = self.timestamps[keep]
+        self.speeds = self.speeds[keep]
+        self.track_lanes = self.track_lanes[keep]
+
+    def summarize(self, speeds):
+        speeds = speeds[~np.isnan(speeds)]
+        if not len(speeds):
+            return {'count': 0, 'mean': None, 'p50': None, 'p85': None, 'histogram': []}
+
+        p50, p85 = np.percentile(speeds, [50, 85])
+        histogram, _ = np.histogram(speeds, bins=np.append(self.bins, np.inf))
+        return {
+            'count': int(len(speeds)),
+            'mean': float(speeds.mean()),
+            'p50': float(p50),
+            'p85': float(p85),
+            'histogram': histogram.tolist()
+        }
+
+    def current_speeds(self):
+        return dict(zip(self.ids.tolist(), self.speeds.tolist()))
+
+    def lane_distributions(self):
+        distributions = {}
+        for lane, name in enumerate(self.lane_names):
+            current = self.speeds[self.track_lanes == lane]
+            if not len(current) and not self.history_index[lane]:
+                continue
+            distributions[name] = {
+                'current': self.summarize(current),
+                'completed': self.summarize(self.history[lane])
+            }
+        return distributions
+
+    def get_stats(self):
+        return {
+            'active_tracks': len(self.ids),
+            'bins': self.bins.tolist(),
+            'completed': {name: int(count) for name, count in zip(self.lane_names, self.history_index.tolist())}
+        }
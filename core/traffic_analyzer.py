@@ -3,55 +3,81 @@ import numpy as np
 from collections import deque, defaultdict
 import time
 
+from .vehicle_counter import VehicleCounter
+from .speed_estimator import SpeedEstimator
+from smartcity_vision.utils.box_utils import box_iou_matrix
+from smartcity_vision.utils.detection_batch import DetectionBatch, VEHICLE_CLASSES
+
 class TrafficAnalyzer:
-    def __init__(self, config=None):
+    def __init__(self, config=None, camera_id='default'):
         self.config = config or {}
-        self.vehicle_count = defaultdict(int)
+        self.camera_id = camera_id
+        self.vehicle_count = {}
         self.traffic_flow = deque(maxlen=100)
         self.speed_estimates = {}
         self.trajectories = defaultdict(list)
         self.frame_count = 0
+        self.counter = VehicleCounter.from_config(self.config.get('counting'))
+        self.speed_estimator = SpeedEstimator.from_config(self.config.get('speed'), camera_id)
         
-    def analyze_traffic_flow(self, objects, frame_shape):
+    def analyze_traffic_flow(self, objects, frame_shape, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
         current_vehicles = self.filter_vehicles(objects)
         self.update_vehicle_count(current_vehicles)
+        crossings = self.counter.update(current_vehicles, timestamp)
         
         traffic_density = self.calculate_traffic_density(current_vehicles, frame_shape)
         congestion_level = self.assess_congestion(traffic_density)
         
         analysis = {
             'vehicle_count': dict(self.vehicle_count),
+            'unique_vehicles': self.counter.unique_vehicles(),
             'total_vehicles': len(current_vehicles),
             'traffic_density': traffic_density,
             'congestion_level': congestion_level,
-            'timestamp': time.time()
+            'crossings': crossings,
+            'timestamp': timestamp
         }
+        if self.speed_estimator is not None:
+            analysis.update(self.update_speeds(timestamp))
         
-        self.traffic_flow.append(analysis)
+        self.frame_count += 1
+        self.traffic_flow.append({
+            'total_vehicles': analysis['total_vehicles'],
+            'traffic_density': traffic_density,
+            'crossings': len(crossings),
+            'timestamp': timestamp
+        })
         return analysis
     
+    def get_counts(self, timestamp=None):
+        return self.counter.get_counts(timestamp)
+    
+    def update_speeds(self, timestamp):
+        track_ids = self.counter.track_ids
+        speeds = self.speed_estimator.update(track_ids, self.counter.points, timestamp,
+                                             self.counter.tracker.removed_ids)
+        measured = ~np.isnan(speeds)
+        
+        return {
+            'average_speed': float(speeds[measured].mean()) if measured.any() else None,
+            'vehicle_speeds': dict(zip(track_ids[measured].tolist(), speeds[measured].round(1).tolist())),
+            'lane_speeds': self.speed_estimator.lane_distributions()
+        }
+    
     def filter_vehicles(self, objects):
-        vehicle_classes = ['car', 'bus', 'truck', 'motorcycle']
-        return [obj for obj in objects if obj['class_name'] in vehicle_classes]
+        return DetectionBatch.coerce(objects).select(VEHICLE_CLASSES)
     
     def update_vehicle_count(self, vehicles):
-        for vehicle in vehicles:
-            vehicle_type = vehicle['class_name']
-            self.vehicle_count[vehicle_type] += 1
+        self.vehicle_count = DetectionBatch.coerce(vehicles).count_by_class()
     
     def calculate_traffic_density(self, vehicles, frame_shape):
+        vehicles = DetectionBatch.coerce(vehicles)
         if not vehicles:
             return 0.0
         
         frame_area = frame_shape[0] * frame_shape[1]
-        total_vehicle_area = 0
-        
-        for vehicle in vehicles:
-            bbox = vehicle['bbox']
-            bbox_area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
-            total_vehicle_area += bbox_area
-        
-        density = (total_vehicle_area / frame_area) * 100
+        density = (float(vehicles.areas.sum()) / frame_area) * 100
         return min(density, 100.0)
     
     def assess_congestion(self, density):
@@ -64,17 +90,19 @@ class TrafficAnalyzer:
         else:
             return 'Severe'
     
-    def estimate_speed(self, current_objects, previous_objects, fps):
-        speeds = []
+    def estimate_speed(self, current_objects, previous_objects, fps, iou_threshold=0.3):
+        current = DetectionBatch.coerce(current_objects)
+        previous = DetectionBatch.coerce(previous_objects)
+        if not current or not previous:
+            return 0
         
-        for curr_obj in current_objects:
-            for prev_obj in previous_objects:
-                if self.is_same_vehicle(curr_obj, prev_obj):
-                    distance = self.calculate_distance(curr_obj['bbox'], prev_obj['bbox'])
-                    speed = (distance * fps) / 100
-                    speeds.append(speed)
+        same_class = np.array(current.labels)[:, None] == np.array(previous.labels)[None, :]
+        matched = same_class & (box_iou_matrix(current.boxes, previous.boxes) > iou_threshold)
+        if not matched.any():
+            return 0
         
-        return np.mean(speeds) if speeds else 0
+        distances = np.linalg.norm(current.centers[:, None, :] - previous.centers[None, :, :], axis=2)
+        return np.mean(distances[matched] * fps / 100)
     
     def is_same_vehicle(self, obj1, obj2, iou_threshold=0.3):
         if obj1['class_name'] != obj2['class_name']:
@@ -0,0 +1,228 @@
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from .sort_tracker import SortTracker
+from smartcity_vision.utils.detection_batch import DetectionBatch, VEHICLE_CLASSES
+
+DEFAULT_WINDOWS = {'1m': 60, '15m': 900, '1h': 3600}
+DEFAULT_DIRECTIONS = ('forward', 'backward')
+
+class RollingCounter:
+    def __init__(self, window, num_buckets=60):
+        self.window = window
+        self.bucket_seconds = window / num_buckets
+        self.buckets = [0] * num_buckets
+        self.total = 0
+        self.head = None
+
+    def advance(self, timestamp):
+        bucket = int(timestamp // self.bucket_seconds)
+        if self.head is None or bucket - self.head >= len(self.buckets):
+            self.buckets = [0] * len(self.buckets)
+            self.total = 0
+        elif bucket > self.head:
+            for index in range(self.head + 1, bucket + 1):
+                position = index % len(self.buckets)
+                self.total -= self.buckets[position]
+                self.buckets[position] = 0
+        else:
+            return
+        self.head = bucket
+
+    def add(self, timestamp, count=1):
+        self.advance(timestamp)
+        self.buckets[self.head % len(self.buckets)] += count
+        self.total += count
+
+    def value(self, timestamp):
+        self.advance(timestamp)
+        return self.total
+
+class CountingLine:
+    def __init__(self, name, start, end, directions=DEFAULT_DIRECTIONS):
+        self.name = name
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.directions = tuple(directions)
+
+    def side(self, points):
+        direction = self.end - self.start
+        offsets = points - self.start
+        return np.where(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0] >= 0, 1, -1)
+
+    def crossings(self, previous, current):
+        before, after = self.side(previous), self.side(current)
+        crossed = before != after
+
+        motion = current - previous
+        offsets = self.start - previous
+        extent = self.end - self.start
+        denominator = motion[:, 0] * extent[1] - motion[:, 1] * extent[0]
+        along = np.zeros(len(previous))
+        np.divide(motion[:, 1] * offsets[:, 0] - motion[:, 0] * offsets[:, 1], denominator, out=along,
+                  where=denominator != 0)
+        crossed &= (along >= 0) & (along <= 1)
+
+        directions = np.where(after > 0, 0, 1)
+        return crossed, directions
+
+class CountingZone:
+    def __init__(self, name, polygon):
+        self.name = name
+        self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 1, 2)
+
+    def contains(self, points):
+        return np.array([cv2.pointPolygonTest(self.polygon, (float(x), float(y)), False) >= 0
+                         for x, y in points.tolist()], dtype=bool)
+
+class VehicleCounter:
+    def __init__(self, lines=None, zones=None, windows=None, vehicle_classes=VEHICLE_CLASSES, anchor='bottom',
+                 max_age=15, iou_threshold=0.3, min_hits=2, num_buckets=60):
+        self.lines = list(lines or [])
+        self.zones = list(zones or [])
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.vehicle_classes = vehicle_classes
+        self.anchor = anchor
+        self.min_hits = min_hits
+        self.num_buckets = num_buckets
+        self.tracker = SortTracker(max_age=max_age, iou_threshold=iou_threshold)
+
+        self.track_state = {}
+        self.totals = defaultdict(int)
+        self.rolling = {}
+        self.frames = 0
+        self.last_timestamp = None
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.points = np.zeros((0, 2))
+
+    @classmethod
+    def from_config(cls, config):
+        config = config or {}
+        lines = [CountingLine(line['name'], *line['points'], directions=line.get('directions') or DEFAULT_DIRECTIONS)
+                 for line in config.get('lines') or []]
+        zones = [CountingZone(zone['name'], zone['polygon']) for zone in config.get('zones') or []]
+        return cls(
+            lines=lines,
+            zones=zones,
+            windows=config.get('windows'),
+            anchor=config.get('anchor', 'bottom'),
+            max_age=config.get('max_age', 15),
+            iou_threshold=config.get('iou_threshold', 0.3),
+            min_hits=config.get('min_hits', 2)
+        )
+
+    def anchor_points(self, vehicles):
+        centers = vehicles.centers
+        if self.anchor == 'bottom':
+            centers[:, 1] = vehicles.boxes[:, 3]
+        return centers
+
+    def record(self, target, class_name, direction, timestamp):
+        key = (target, class_name, direction)
+        self.totals[key] += 1
+        counters = self.rolling.get(key)
+        if counters is None:
+            counters = {name: RollingCounter(seconds, self.num_buckets) for name, seconds in self.windows.items()}
+            self.rolling[key] = counters
+        for counter in counters.values():
+            counter.add(timestamp)
+
+    def update(self, objects, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.last_timestamp = timestamp
+        vehicles = DetectionBatch.coerce(objects).select(self.vehicle_classes)
+        track_ids = self.tracker.update(vehicles.boxes)
+        points = self.anchor_points(vehicles)
+        labels = vehicles.labels
+        self.frames += 1
+        self.track_ids, self.points = track_ids, points
+
+        for track_id in self.tracker.removed_ids:
+            self.track_state.pop(track_id, None)
+
+        hits = dict(zip(self.tracker.ids.tolist(), self.tracker.hits.tolist()))
+        events = []
+        moved = []
+        for index, track_id in enumerate(track_ids.tolist()):
+            state = self.track_state.get(track_id)
+            if state is None:
+                state = self.track_state[track_id] = {'point': None, 'counted': set()}
+            state['class_name'] = labels[index]
+            if state['point'] is not None:
+                moved.append((track_id, state['point'], index))
+            state['point'] = points[index]
+
+            if hits.get(track_id, 0) >= self.min_hits and None not in state['counted']:
+                state['counted'].add(None)
+                self.record(None, labels[index], None, timestamp)
+
+        if moved and self.lines:
+            previous = np.array([point for _, point, _ in moved])
+            current = points[[index for _, _, index in moved]]
+            for line in self.lines:
+                crossed, directions = line.crossings(previous, current)
+                for position in np.flatnonzero(crossed).tolist():
+                    track_id = moved[position][0]
+                    events.extend(self.count_once(track_id, line.name, line.directions[directions[position]],
+                                                  timestamp))
+
+        confirmed = np.array([hits.get(track_id, 0) >= self.min_hits for track_id in track_ids.tolist()], dtype=bool)
+        for zone in self.zones:
+            inside = zone.contains(points) & confirmed
+            for index in np.flatnonzero(inside).tolist():
+                events.extend(self.count_once(int(track_ids[index]), zone.name, 'enter', timestamp))
+
+        return events
+
+    def count_once(self, track_id, target, direction, timestamp):
+        state = self.track_state[track_id]
+        if (target, direction) in state['counted']:
+            return []
+        state['counted'].add((target, direction))
+        self.record(target, state['class_name'], direction, timestamp)
+        return [{
+            'track_id': track_id,
+            'target': target,
+            'class_name': state['class_name'],
+            'direction': direction,
+            'timestamp': timestamp
+        }]
+
+    def unique_vehicles(self):
+        counts = defaultdict(int)
+        for (target, class_name, _), count in self.totals.items():
+            if target is None:
+                counts[class_name] += count
+        return dict(counts)
+
+    def get_counts(self, timestamp=None):
+        if timestamp is None:
+            timestamp = self.last_timestamp if self.last_timestamp is not None else time.time()
+
+        def nest(values):
+            counts = {'vehicles': defaultdict(int), 'targets': {}}
+            for (target, class_name, direction), count in values:
+                if not count:
+                    continue
+                if target is None:
+                    counts['vehicles'][class_name] += count
+                else:
+                    by_class = counts['targets'].setdefault(target, {}).setdefault(class_name, {})
+                    by_class[direction] = by_class.get(direction, 0) + count
+            counts['vehicles'] = dict(counts['vehicles'])
+            return counts
+
+        result = {'total': nest(self.totals.items())}
+        for name in self.windows:
+            result[name] = nest((key, counters[name].value(timestamp)) for key, counters in self.rolling.items())
+        return result
+
+    def get_stats(self):
+        return {
+            'frames': self.frames,
+            'active_tracks': len(self.track_state),
+            'count_keys': len(self.rolling)
+        }
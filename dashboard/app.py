@@ -1,51 +1,168 @@
-from flask import Flask, render_template, Response, jsonify
+from flask import Flask, render_template, Response, jsonify, request
+from collections import deque
 import cv2
 import numpy as np
 import json
 import threading
 import time
 
+from smartcity_vision.utils.frame_broadcast import FrameBroadcast
+
 app = Flask(__name__)
 
-class Dashboard:
-    def __init__(self):
-        self.traffic_data = []
-        self.crowd_data = []
-        self.parking_data = []
-        self.latest_frame = None
-        
-    def generate_frames(self):
-        from smartcity_vision.core.object_detector import ObjectDetector
+def build_detector(config_loader):
+    from smartcity_vision.core.object_detector import ObjectDetector
+    from smartcity_vision.core.keyframe_detector import KeyframeDetector
+    from smartcity_vision.main import detector_options
+
+    detector = ObjectDetector(**detector_options(config_loader))
+    if config_loader.get('object_detection.keyframe.enabled', False):
+        detector = KeyframeDetector.from_config(detector, config_loader)
+    return detector
+
+class CameraProducer:
+    def __init__(self, camera_id, source, config_loader, on_analysis=None, quality_levels=(50, 70, 85)):
+        self.camera_id = camera_id
+        self.source = source
+        self.config_loader = config_loader
+        self.on_analysis = on_analysis
+        self.broadcast = FrameBroadcast(quality_levels)
+        self.running = False
+        self.thread = None
+        self.frames_processed = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name=f"dashboard-{self.camera_id}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.broadcast.close()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    @property
+    def alive(self):
+        return self.running and self.thread is not None and self.thread.is_alive()
+
+    def run(self):
         from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
         from smartcity_vision.utils.visualization import Visualization
-        
-        detector = ObjectDetector()
-        traffic_analyzer = TrafficAnalyzer()
+
+        detector = build_detector(self.config_loader)
+        traffic_analyzer = TrafficAnalyzer(self.config_loader.get('traffic_analysis'), self.camera_id)
         visualizer = Visualization()
-        
-        camera = cv2.VideoCapture(0)
-        
-        while True:
-            success, frame = camera.read()
-            if not success:
-                break
-            
-            objects = detector.detect_objects(frame)
-            traffic_analysis = traffic_analyzer.analyze_traffic_flow(objects, frame.shape)
-            
-            annotated_frame = visualizer.draw_detections(frame, objects)
-            annotated_frame = visualizer.draw_traffic_analysis(annotated_frame, traffic_analysis)
-            
-            self.traffic_data.append(traffic_analysis)
-            self.latest_frame = annotated_frame
-            
-            ret, buffer = cv2.imencode('.jpg', annotated_frame)
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        camera.release()
+        camera = cv2.VideoCapture(self.source)
+
+        try:
+            while self.running:
+                if not self.broadcast.wait_for_viewers(timeout=1.0):
+                    continue
+
+                success, frame = camera.read()
+                if not success:
+                    break
+
+                objects = detector.detect_objects(frame)
+                traffic_analysis = traffic_analyzer.analyze_traffic_flow(objects, frame.shape)
+                self.frames_processed += 1
+                if self.on_analysis is not None:
+                    self.on_analysis(self.camera_id, traffic_analysis)
+
+                annotated_frame = visualizer.draw_detections(frame, objects)
+                annotated_frame = visualizer.draw_traffic_analysis(annotated_frame, traffic_analysis, in_place=True)
+                self.broadcast.publish(annotated_frame)
+        finally:
+            camera.release()
+            self.running = False
+            self.broadcast.close()
+
+    def get_stats(self):
+        stats = self.broadcast.get_stats()
+        return dict(stats, camera_id=self.camera_id, running=self.alive, paused=stats['viewers'] == 0,
+                    frames_processed=self.frames_processed)
+
+class Dashboard:
+    def __init__(self, config_loader=None):
+        self._config_loader = config_loader
+        self.traffic_data = deque(maxlen=500)
+        self.crowd_data = deque(maxlen=500)
+        self.parking_data = deque(maxlen=500)
+        self.producers = {}
+        self.lock = threading.Lock()
+
+    @property
+    def config_loader(self):
+        if self._config_loader is None:
+            from smartcity_vision.utils.config_loader import ConfigLoader
+            self._config_loader = ConfigLoader()
+        return self._config_loader
+
+    def camera_sources(self):
+        return self.config_loader.get('dashboard.cameras') or {'default': 0}
+
+    def record_analysis(self, camera_id, analysis):
+        self.traffic_data.append(dict(analysis, camera_id=camera_id))
+
+    def get_producer(self, camera_id='default'):
+        with self.lock:
+            producer = self.producers.get(camera_id)
+            if producer is None or not producer.alive:
+                sources = self.camera_sources()
+                if camera_id not in sources:
+                    raise KeyError(camera_id)
+                producer = CameraProducer(
+                    camera_id, sources[camera_id], self.config_loader, self.record_analysis,
+                    quality_levels=self.config_loader.get('dashboard.stream.quality_levels', [50, 70, 85])
+                )
+                producer.start()
+                self.producers[camera_id] = producer
+            return producer
+
+    def stream_limits(self, fps=None, quality=None):
+        max_fps = self.config_loader.get('dashboard.stream.max_fps', 25)
+        fps = min(fps or self.config_loader.get('dashboard.stream.default_fps', 10), max_fps)
+        quality = quality or self.config_loader.get('dashboard.stream.default_quality', 70)
+        return max(fps, 0.1), quality
+
+    def generate_frames(self, camera_id='default', fps=None, quality=None):
+        fps, quality = self.stream_limits(fps, quality)
+        return self.stream_frames(self.get_producer(camera_id).broadcast, 1.0 / fps, quality)
+
+    def stream_frames(self, broadcast, interval, quality):
+        broadcast.add_viewer()
+        try:
+            sequence = 0
+            next_frame_time = 0.0
+            while True:
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                latest = broadcast.wait(sequence, timeout=1.0)
+                if latest is None:
+                    if broadcast.closed:
+                        break
+                    continue
+
+                sequence, frame_bytes = broadcast.jpeg(quality)
+                next_frame_time = time.monotonic() + interval
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        finally:
+            broadcast.remove_viewer()
+
+    def stop(self):
+        with self.lock:
+            producers, self.producers = self.producers, {}
+        for producer in producers.values():
+            producer.stop()
+
+    def get_stats(self):
+        with self.lock:
+            producers = dict(self.producers)
+        return {camera_id: producer.get_stats() for camera_id, producer in producers.items()}
 
 dashboard = Dashboard()
 
@@ -54,21 +171,30 @@ def index():
     return render_template('index.html')
 
 @app.route('/video_feed')
-def video_feed():
-    return Response(dashboard.generate_frames(),
-                   mimetype='multipart/x-mixed-replace; boundary=frame')
+@app.route('/video_feed/<camera_id>')
+def video_feed(camera_id='default'):
+    try:
+        frames = dashboard.generate_frames(camera_id, request.args.get('fps', type=float),
+                                           request.args.get('quality', type=int))
+    except KeyError:
+        return jsonify({'error': f"Unknown camera: {camera_id}"}), 404
+    return Response(frames, mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/traffic_data')
 def get_traffic_data():
-    return jsonify(dashboard.traffic_data[-50:])
+    return jsonify(list(dashboard.traffic_data)[-50:])
 
 @app.route('/api/crowd_data')
 def get_crowd_data():
-    return jsonify(dashboard.crowd_data[-50:])
+    return jsonify(list(dashboard.crowd_data)[-50:])
 
 @app.route('/api/parking_data')
 def get_parking_data():
-    return jsonify(dashboard.parking_data[-50:])
+    return jsonify(list(dashboard.parking_data)[-50:])
+
+@app.route('/api/stream_stats')
+def get_stream_stats():
+    return jsonify(dashboard.get_stats())
 
 def run_dashboard():
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
@@ -27,4 +27,23 @@ def create_sample_video(output_path='data/sample_video.mp4', duration=10, fps=30
         out.write(frame)
     
     out.release()
-    print(f"Sample video created: {output_path}")
\ No newline at end of file
+    print(f"Sample video created: {output_path}")
+
+def create_sample_frame(width=640, height=480, num_cars=5, num_people=10, seed=None):
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    objects = []
+    
+    for _ in range(num_cars):
+        x = int(rng.integers(0, width - 50))
+        y = int(rng.integers(0, height - 30))
+        cv2.rectangle(frame, (x, y), (x + 50, y + 30), (0, 255, 0), -1)
+        objects.append({'bbox': [x, y, x + 50, y + 30], 'confidence': 0.9, 'class_id': 2, 'class_name': 'car'})
+    
+    for _ in range(num_people):
+        x = int(rng.integers(0, width - 20))
+        y = int(rng.integers(0, height - 40))
+        cv2.rectangle(frame, (x, y), (x + 20, y + 40), (255, 0, 0), -1)
+        objects.append({'bbox': [x, y, x + 20, y + 40], 'confidence': 0.9, 'class_id': 0, 'class_name': 'person'})
+    
+    return frame, objects
\ No newline at end of file
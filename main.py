@@ -1,17 +1,199 @@
 import argparse
+import functools
 import cv2
 import time
 import json
+from collections import deque
+from concurrent.futures import wait, FIRST_COMPLETED
 from datetime import datetime
 
 from smartcity_vision.core.object_detector import ObjectDetector
+from smartcity_vision.core.keyframe_detector import KeyframeDetector
+from smartcity_vision.core.motion_gate import MotionGate
+from smartcity_vision.core.region_detector import RegionDetector
+from smartcity_vision.core.detector_pool import DetectorPool
 from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
 from smartcity_vision.core.crowd_density import CrowdDensityAnalyzer
 from smartcity_vision.core.parking_analyzer import ParkingAnalyzer
 from smartcity_vision.core.pedestrian_tracker import PedestrianTracker
 from smartcity_vision.utils.config_loader import ConfigLoader
-from smartcity_vision.utils.video_processor import VideoProcessor
-from smartcity_vision.utils.visualization import Visualization
+from smartcity_vision.utils.detection_batch import DetectionBatch
+from smartcity_vision.utils.video_processor import VideoProcessor, MultiCameraProcessor
+from smartcity_vision.utils.visualization import Visualization, RenderPlan
+from smartcity_vision.utils.pipeline import Pipeline, PipelineStage, parallel_stage
+from smartcity_vision.utils.metrics import (metrics, instrument_components, instrument_video_processor,
+                                            instrument_pipeline, start_metrics_server)
+
+def print_pipeline_stats(pipeline):
+    for name, stats in pipeline.get_stats().items():
+        print(f"[{name}] {stats['throughput']:.1f} fps | "
+              f"latency {stats['avg_latency'] * 1000:.1f} ms | "
+              f"utilization {stats['utilization'] * 100:.0f}% | "
+              f"queue {stats['queue_depth']} (max {stats['max_queue_depth']}) | "
+              f"dropped {stats['dropped']}")
+
+def print_keyframe_stats(detector):
+    stats = detector.get_stats()
+    print(f"[keyframe] interval {stats['interval']} | "
+          f"detected {stats['keyframes']} | "
+          f"propagated {stats['propagated_frames']} | "
+          f"scene changes {stats['scene_changes']} | "
+          f"detection rate {stats['detection_rate'] * 100:.0f}%")
+
+def print_motion_stats(motion_gate):
+    for camera_id, stats in motion_gate.get_stats().items():
+        print(f"[motion:{camera_id}] skip rate {stats['skip_rate'] * 100:.0f}% | "
+              f"detected {stats['detections']} | "
+              f"skipped {stats['skipped']} | "
+              f"forced {stats['forced']}")
+
+def print_traffic_counts(traffic_analyzer, camera_id=None):
+    prefix = f"[counts:{camera_id}]" if camera_id else "[counts]"
+    for window, counts in traffic_analyzer.get_counts().items():
+        vehicles = ', '.join(f"{name} {count}" for name, count in sorted(counts['vehicles'].items()))
+        print(f"{prefix} {window}: {vehicles or 'no vehicles'}")
+        for target, by_class in counts['targets'].items():
+            crossings = ', '.join(f"{name} {direction} {count}" for name, directions in sorted(by_class.items())
+                                  for direction, count in directions.items())
+            print(f"{prefix} {window} {target}: {crossings}")
+    
+    if traffic_analyzer.speed_estimator is not None:
+        for lane, distribution in traffic_analyzer.speed_estimator.lane_distributions().items():
+            completed = distribution['completed']
+            if completed['count']:
+                print(f"{prefix} speed {lane}: {completed['count']} vehicles | p50 {completed['p50']:.0f} km/h | "
+                      f"p85 {completed['p85']:.0f} km/h")
+
+def print_pool_stats(pool):
+    stats = pool.get_stats()
+    print(f"[pool] {stats['throughput']:.1f} fps | dropped {stats['dropped']} | rebalances {stats['rebalances']}")
+    for index, worker in stats['workers'].items():
+        print(f"[worker {index}] cpus {worker['cpus']} | cameras {worker['cameras']} | "
+              f"{worker['throughput']:.1f} fps | latency {worker['avg_latency'] * 1000:.1f} ms | "
+              f"utilization {worker['utilization'] * 100:.0f}% | dropped {worker['dropped']}")
+
+def detector_options(config_loader):
+    return {
+        'model_type': config_loader.get('object_detection.model_type'),
+        'model_path': config_loader.get('object_detection.model_path'),
+        'confidence_threshold': config_loader.get('object_detection.confidence_threshold'),
+        'repo_path': config_loader.get('object_detection.repo_path'),
+        'quantization': config_loader.get('object_detection.quantization'),
+        'export_path': config_loader.get('object_detection.export_path'),
+        'image_size': config_loader.get('object_detection.image_size', 640),
+        'num_threads': config_loader.get('object_detection.num_threads')
+    }
+
+def build_analyzers(config_loader, camera_id='default'):
+    traffic_analyzer = TrafficAnalyzer(config_loader.get('traffic_analysis'), camera_id)
+    crowd_analyzer = CrowdDensityAnalyzer(
+        config_loader.get('crowd_analysis.method'),
+        cell_size=config_loader.get('crowd_analysis.grid_cell_size', 16),
+        hotspot_radius=config_loader.get('crowd_analysis.hotspot_radius', 30),
+        temporal_smoothing=config_loader.get('crowd_analysis.temporal_smoothing', 0.0)
+    )
+    parking_analyzer = ParkingAnalyzer(
+        use_spatial_index=config_loader.get('parking_analysis.use_spatial_index', True),
+        index_cell_size=config_loader.get('parking_analysis.index_cell_size')
+    )
+    pedestrian_tracker = PedestrianTracker(config_loader.get('pedestrian_analysis'))
+    return traffic_analyzer, crowd_analyzer, parking_analyzer, pedestrian_tracker
+
+def run_detector_pool(args, config_loader):
+    camera_sources = {f"camera_{index}": source for index, source in enumerate(args.source.split(','))}
+    shared_memory = config_loader.get('detector_pool.shared_memory', False)
+    cameras = MultiCameraProcessor(camera_sources, target_fps=config_loader.get('detector_pool.target_fps'),
+                                   ring_slots=config_loader.get('video.ring_slots'), borrow_frames=shared_memory,
+                                   shared_slots=(config_loader.get('video.ring_slots') or 8) if shared_memory else None)
+    cameras.start_all()
+    
+    pool = DetectorPool(
+        num_workers=args.workers or config_loader.get('detector_pool.num_workers'),
+        detector_kwargs=detector_options(config_loader),
+        threads_per_worker=config_loader.get('detector_pool.threads_per_worker'),
+        pin_cpus=config_loader.get('detector_pool.pin_cpus', True),
+        max_pending=config_loader.get('detector_pool.max_pending', 4),
+        max_batch_size=config_loader.get('detector_pool.max_batch_size', 4),
+        rebalance_interval=config_loader.get('detector_pool.rebalance_interval', 5.0),
+        filter_urban=True,
+        channels=cameras.get_shared_channels()
+    )
+    analyzers = {camera_id: build_analyzers(config_loader, camera_id) for camera_id in camera_sources}
+    in_flight = {camera_id: deque() for camera_id in camera_sources}
+    visualizer = Visualization()
+    stats_interval = config_loader.get('pipeline.stats_interval', 100)
+    
+    def analyze(camera_id, packet, objects):
+        frame = packet['frame']
+        objects = DetectionBatch.coerce(objects)
+        traffic_analyzer, crowd_analyzer, parking_analyzer, pedestrian_tracker = analyzers[camera_id]
+        traffic = traffic_analyzer.analyze_traffic_flow(objects, frame.shape, packet['timestamp'])
+        crowd = crowd_analyzer.analyze_crowd_density(objects, frame.shape)
+        parking = parking_analyzer.analyze_parking_occupancy(objects, frame)
+        pedestrian_tracker.analyze_pedestrian_flow(pedestrian_tracker.update_tracks(objects))
+        
+        print(f"[{camera_id}] Traffic: {traffic['congestion_level']} | "
+              f"Crowd: {crowd['density_level']} | "
+              f"Parking: {parking['available_spots']} available")
+        
+        if not args.headless:
+            plan = RenderPlan()
+            visualizer.plan_detections(plan, objects)
+            visualizer.plan_traffic_analysis(plan, traffic)
+            visualizer.plan_crowd_density(plan, crowd)
+            cv2.imshow(f'SmartCity Vision [{camera_id}]', visualizer.render(frame, plan, in_place=True))
+    
+    print(f"Starting {pool.num_workers} detector workers for {len(camera_sources)} cameras...")
+    pool.start()
+    
+    processed = 0
+    try:
+        while True:
+            packets = cameras.read_ready(timeout=0.05)
+            for packet in packets:
+                payload = cameras.share(packet) if shared_memory else packet['frame']
+                future = pool.submit(payload, packet['camera_id'])
+                if future is not None:
+                    in_flight[packet['camera_id']].append((future, packet))
+                    continue
+                if shared_memory:
+                    cameras.processors[packet['camera_id']].shared_channel.release(payload)
+                cameras.release(packet)
+            
+            pending = [entries[0][0] for entries in in_flight.values() if entries]
+            if not packets and not pending and all(processor.finished and not processor.has_frames()
+                                                   for processor in cameras.processors.values()):
+                break
+            if not packets and pending:
+                wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            
+            for camera_id, entries in in_flight.items():
+                while entries and entries[0][0].done():
+                    future, packet = entries.popleft()
+                    error = future.exception()
+                    if error is None:
+                        analyze(camera_id, packet, future.result())
+                    else:
+                        print(f"[{camera_id}] Detection failed: {error}")
+                    cameras.release(packet)
+                    processed += 1
+                    if processed % stats_interval == 0:
+                        print_pool_stats(pool)
+            
+            if not args.headless and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    
+    except KeyboardInterrupt:
+        print("Stopping...")
+    
+    finally:
+        pool.stop()
+        cameras.stop_all()
+        print_pool_stats(pool)
+        for camera_id, (traffic_analyzer, _, _, _) in analyzers.items():
+            print_traffic_counts(traffic_analyzer, camera_id)
+        if not args.headless:
+            cv2.destroyAllWindows()
 
 def main():
     parser = argparse.ArgumentParser(description='SmartCity Vision System')
@@ -19,6 +201,9 @@ def main():
     parser.add_argument('--config', type=str, default='config.yaml', help='Config file path')
     parser.add_argument('--output', type=str, help='Output video file path')
     parser.add_argument('--headless', action='store_true', help='Run without display')
+    parser.add_argument('--pipeline', action='store_true', help='Run stages concurrently on dedicated workers')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Run detection in N worker processes (--source may list several comma-separated cameras)')
     
     args = parser.parse_args()
     
@@ -26,63 +211,183 @@ def main():
     
     print("Initializing SmartCity Vision System...")
     
-    detector = ObjectDetector(
-        model_type=config_loader.get('object_detection.model_type'),
-        confidence_threshold=config_loader.get('object_detection.confidence_threshold')
-    )
+    if args.workers or config_loader.get('detector_pool.enabled', False):
+        flags = [flag for flag, value in (('--output', args.output), ('--pipeline', args.pipeline)) if value]
+        if flags:
+            parser.error(f"{' and '.join(flags)} cannot be combined with the detector pool "
+                         "(--workers or detector_pool.enabled)")
+        ignored = [key for key in ('motion_gate.enabled', 'object_detection.keyframe.enabled')
+                   if config_loader.get(key, False)]
+        if config_loader.get('roi.tile_size') or config_loader.get('roi.cameras'):
+            ignored.append('roi')
+        if ignored:
+            print(f"Warning: the detector pool ignores {', '.join(ignored)}")
+        run_detector_pool(args, config_loader)
+        return
+    
+    detector = ObjectDetector(**detector_options(config_loader))
     
-    traffic_analyzer = TrafficAnalyzer(config_loader.get('traffic_analysis'))
-    crowd_analyzer = CrowdDensityAnalyzer(config_loader.get('crowd_analysis.method'))
-    parking_analyzer = ParkingAnalyzer()
-    pedestrian_tracker = PedestrianTracker()
+    if config_loader.get('roi.tile_size') or (config_loader.get('roi.cameras') or {}).get('default'):
+        detector = RegionDetector.from_config(detector, config_loader)
+    
+    if config_loader.get('object_detection.keyframe.enabled', False):
+        detector = KeyframeDetector.from_config(detector, config_loader)
+    
+    traffic_analyzer, crowd_analyzer, parking_analyzer, pedestrian_tracker = build_analyzers(config_loader)
     visualizer = Visualization()
     
-    video_processor = VideoProcessor(args.source)
+    motion_gate = None
+    if config_loader.get('motion_gate.enabled', False):
+        motion_gate = MotionGate(
+            width=config_loader.get('motion_gate.width', 160),
+            pixel_threshold=config_loader.get('motion_gate.pixel_threshold', 25),
+            min_area_ratio=config_loader.get('motion_gate.min_area_ratio', 0.002),
+            max_staleness=config_loader.get('motion_gate.max_staleness', 30)
+        )
+    
+    video_processor = VideoProcessor(args.source, ring_slots=config_loader.get('video.ring_slots'))
     video_processor.start()
     
+    if config_loader.get('metrics.enabled', False):
+        metrics.enabled = True
+        instrument_components(detector, traffic_analyzer, crowd_analyzer, parking_analyzer,
+                              pedestrian_tracker, visualizer)
+        instrument_video_processor(video_processor)
+        start_metrics_server(config_loader.get('metrics.port', 9100))
+    
     if args.output:
         frame_size = video_processor.get_frame_size()
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
         out = cv2.VideoWriter(args.output, fourcc, 20.0, frame_size)
     
+    last_detection = {}
+    last_analysis = {}
+    
+    def detect(ctx):
+        if motion_gate:
+            ctx['motion'] = motion_gate.update(ctx['frame'], ctx['packet']['camera_id'] or 'default')
+            if not ctx['motion']['detect'] and last_analysis:
+                ctx['objects'] = last_detection['objects']
+                ctx['reused'] = True
+                return ctx
+        
+        regions = ctx['motion']['regions'] if motion_gate else None
+        if regions and isinstance(detector, RegionDetector) and 'objects' in last_detection:
+            ctx['objects'] = detector.detect_changed(ctx['frame'], regions, last_detection['objects'])
+        else:
+            detect_frame = getattr(detector, 'detect', None) or detector.detect_objects
+            objects = detector.filter_urban_objects(detect_frame(ctx['frame']))
+            ctx['objects'] = DetectionBatch.coerce(objects)
+        last_detection['objects'] = ctx['objects']
+        return ctx
+    
+    def analyze_pedestrians(ctx):
+        pedestrian_tracks = pedestrian_tracker.update_tracks(ctx['objects'])
+        return pedestrian_tracker.analyze_pedestrian_flow(pedestrian_tracks)
+    
+    analyzers = {
+        'traffic': lambda ctx: traffic_analyzer.analyze_traffic_flow(ctx['objects'], ctx['frame'].shape,
+                                                                     ctx['packet']['timestamp']),
+        'crowd': lambda ctx: crowd_analyzer.analyze_crowd_density(ctx['objects'], ctx['frame'].shape),
+        'parking': lambda ctx: parking_analyzer.analyze_parking_occupancy(ctx['objects'], ctx['frame']),
+        'pedestrian': analyze_pedestrians
+    }
+    
+    def reuse_analysis(func):
+        @functools.wraps(func)
+        def run(ctx):
+            if ctx.get('reused'):
+                ctx.update(last_analysis)
+                return ctx
+            ctx = func(ctx)
+            last_analysis.update((name, ctx[name]) for name in analyzers)
+            return ctx
+        return run
+    
+    @reuse_analysis
+    def analyze(ctx):
+        for name, analyzer in analyzers.items():
+            ctx[name] = analyzer(ctx)
+        return ctx
+    
+    def render(ctx):
+        plan = RenderPlan()
+        visualizer.plan_detections(plan, ctx['objects'])
+        visualizer.plan_traffic_analysis(plan, ctx['traffic'])
+        visualizer.plan_crowd_density(plan, ctx['crowd'])
+        ctx['annotated_frame'] = visualizer.render(ctx['frame'], plan, in_place=True)
+        return ctx
+    
+    def read_frames():
+        while True:
+            packet = video_processor.read_packet(timeout=1.0, borrow=True)
+            if packet is None:
+                return
+            yield {'frame': packet['frame'], 'packet': packet}
+    
+    def release_frame(ctx):
+        video_processor.release(ctx['packet'])
+    
+    render_enabled = bool(args.output) or not args.headless
+    use_pipeline = args.pipeline or config_loader.get('pipeline.enabled', False)
+    pipeline = None
+    if use_pipeline:
+        queue_size = config_loader.get('pipeline.queue_size', 4)
+        backpressure = config_loader.get('pipeline.backpressure', 'block')
+        stages = [
+            PipelineStage('detect', detect, queue_size, backpressure),
+            PipelineStage('analyze', reuse_analysis(parallel_stage(analyzers)), queue_size, backpressure)
+        ]
+        if render_enabled:
+            stages.append(PipelineStage('render', render, queue_size, backpressure))
+        pipeline = instrument_pipeline(Pipeline(stages, on_discard=release_frame))
+        results = pipeline.run(read_frames())
+    elif render_enabled:
+        results = (render(analyze(detect(ctx))) for ctx in read_frames())
+    else:
+        results = (analyze(detect(ctx)) for ctx in read_frames())
+    
+    stats_interval = config_loader.get('pipeline.stats_interval', 100)
+    
     print("Starting analysis...")
     
     try:
-        while True:
-            frame = video_processor.read()
-            if frame is None:
-                break
-            
-            objects = detector.detect_objects(frame)
-            urban_objects = detector.filter_urban_objects(objects)
-            
-            traffic_analysis = traffic_analyzer.analyze_traffic_flow(urban_objects, frame.shape)
-            crowd_analysis = crowd_analyzer.analyze_crowd_density(urban_objects, frame.shape)
-            parking_analysis = parking_analyzer.analyze_parking_occupancy(urban_objects, frame)
-            
-            pedestrian_tracks = pedestrian_tracker.update_tracks(urban_objects)
-            pedestrian_analysis = pedestrian_tracker.analyze_pedestrian_flow(pedestrian_tracks)
-            
-            annotated_frame = visualizer.draw_detections(frame, urban_objects)
-            annotated_frame = visualizer.draw_traffic_analysis(annotated_frame, traffic_analysis)
-            annotated_frame = visualizer.draw_crowd_density(annotated_frame, crowd_analysis)
-            
+        for frame_index, ctx in enumerate(results, 1):
             if args.output:
-                out.write(annotated_frame)
+                out.write(ctx['annotated_frame'])
             
             if not args.headless:
-                cv2.imshow('SmartCity Vision', annotated_frame)
+                cv2.imshow('SmartCity Vision', ctx['annotated_frame'])
                 if cv2.waitKey(1) & 0xFF == ord('q'):
                     break
             
-            print(f"Traffic: {traffic_analysis['congestion_level']} | "
-                  f"Crowd: {crowd_analysis['density_level']} | "
-                  f"Parking: {parking_analysis['available_spots']} available")
+            print(f"Traffic: {ctx['traffic']['congestion_level']} | "
+                  f"Crowd: {ctx['crowd']['density_level']} | "
+                  f"Parking: {ctx['parking']['available_spots']} available")
+            
+            release_frame(ctx)
+            
+            if frame_index % stats_interval == 0:
+                if pipeline:
+                    print_pipeline_stats(pipeline)
+                if isinstance(detector, KeyframeDetector):
+                    print_keyframe_stats(detector)
+                if motion_gate:
+                    print_motion_stats(motion_gate)
+                print_traffic_counts(traffic_analyzer)
     
     except KeyboardInterrupt:
         print("Stopping...")
     
     finally:
+        if pipeline:
+            pipeline.stop()
+            print_pipeline_stats(pipeline)
+        if isinstance(detector, KeyframeDetector):
+            print_keyframe_stats(detector)
+        if motion_gate:
+            print_motion_stats(motion_gate)
+        print_traffic_counts(traffic_analyzer)
         video_processor.stop()
         if args.output:
             out.release()
@@ -6,6 +6,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from smartcity_vision.core.traffic_analyzer import TrafficAnalyzer
 from smartcity_vision.core.crowd_density import CrowdDensityAnalyzer
+from smartcity_vision.core.pedestrian_tracker import PedestrianTracker
+from smartcity_vision.core.parking_analyzer import ParkingAnalyzer
+from smartcity_vision.core.vehicle_counter import VehicleCounter, CountingLine, RollingCounter
+from smartcity_vision.core.speed_estimator import SpeedEstimator
+from smartcity_vision.utils.detection_batch import DetectionBatch
 
 class TestTrafficAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -34,6 +39,182 @@ class TestCrowdAnalyzer(unittest.TestCase):
         analysis = self.analyzer.analyze_crowd_density(self.sample_objects, (480, 640))
         self.assertIn('total_people', analysis)
         self.assertIn('density_level', analysis)
+    
+    def test_density_grid_hotspots(self):
+        analyzer = CrowdDensityAnalyzer(method='density_grid', cell_size=16)
+        analysis = analyzer.analyze_crowd_density(self.sample_objects, (480, 640))
+        
+        self.assertEqual(analysis['total_people'], 2)
+        self.assertEqual(analysis['density_map'].shape, (30, 40))
+        self.assertEqual(len(analysis['hotspots']), 2)
+        self.assertNotIn('total_density', analysis)
+        self.assertAlmostEqual(analysis['smoothed_people'], 2.0)
+        self.assertEqual(sorted(hotspot['people'] for hotspot in analysis['hotspots']), [1, 1])
+    
+    def test_density_grid_smoothing_keeps_whole_hotspot_counts(self):
+        analyzer = CrowdDensityAnalyzer(method='density_grid', cell_size=16, temporal_smoothing=0.5)
+        analyzer.analyze_crowd_density(self.sample_objects, (480, 640))
+        analysis = analyzer.analyze_crowd_density(self.sample_objects[:1], (480, 640))
+        
+        self.assertAlmostEqual(analysis['smoothed_people'], 1.5)
+        self.assertTrue(all(isinstance(hotspot['people'], int) for hotspot in analysis['hotspots']))
+        self.assertEqual(sorted(hotspot['smoothed_people'] for hotspot in analysis['hotspots']), [0.5, 1.0])
+    
+    def test_hotspot_people_match_across_methods(self):
+        grid = CrowdDensityAnalyzer(method='density_grid').analyze_crowd_density(self.sample_objects, (480, 640))
+        density_map = self.analyzer.analyze_crowd_density(self.sample_objects, (480, 640))
+        
+        self.assertEqual(sorted(hotspot['people'] for hotspot in density_map['hotspots']),
+                         sorted(hotspot['people'] for hotspot in grid['hotspots']))
+
+class TestPedestrianTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = PedestrianTracker(engine='sort')
+    
+    def make_people(self, offset, skip=()):
+        return [{'class_name': 'person', 'bbox': [10 + i * 40 + offset, 10, 30 + i * 40 + offset, 60]}
+                for i in range(4) if i not in skip]
+    
+    def test_ids_are_unique_per_frame(self):
+        tracks = self.tracker.update_tracks(self.make_people(0))
+        self.assertEqual(sorted(tracks.keys()), [0, 1, 2, 3])
+    
+    def test_track_survives_occlusion(self):
+        for frame in range(3):
+            self.tracker.update_tracks(self.make_people(frame * 2))
+        self.tracker.update_tracks(self.make_people(6, skip=(1,)))
+        tracks = self.tracker.update_tracks(self.make_people(8))
+        
+        self.assertEqual(sorted(tracks.keys()), [0, 1, 2, 3])
+        self.assertEqual(len(tracks[1]['trajectory']), 4)
+    
+    def test_config_sets_engine_and_trajectory_length(self):
+        tracker = PedestrianTracker({'tracking_engine': 'greedy', 'trajectory_length': 3, 'max_track_age': 5})
+        for frame in range(5):
+            tracks = tracker.update_tracks(self.make_people(frame * 2))
+        
+        self.assertIsNone(tracker.sort_tracker)
+        self.assertEqual(tracker.max_age, 5)
+        self.assertEqual(len(tracks[0]['trajectory']), 3)
+        self.assertEqual(PedestrianTracker().engine, 'sort')
+
+class TestParkingAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.sample_objects = [
+            {'class_name': 'car', 'bbox': [10, 10, 70, 50]},
+            {'class_name': 'truck', 'bbox': [300, 200, 420, 300]},
+            {'class_name': 'person', 'bbox': [500, 400, 520, 440]}
+        ]
+    
+    def test_indexed_occupancy_matches_loop(self):
+        indexed = ParkingAnalyzer(use_spatial_index=True)
+        looped = ParkingAnalyzer(use_spatial_index=False)
+        indexed.detect_parking_spots(self.frame)
+        looped.detect_parking_spots(self.frame)
+        
+        indexed_analysis = indexed.analyze_parking_occupancy(self.sample_objects, self.frame)
+        looped_analysis = looped.analyze_parking_occupancy(self.sample_objects, self.frame)
+        
+        self.assertEqual(indexed_analysis['occupied_spots'], looped_analysis['occupied_spots'])
+        for spot_id, spot in looped_analysis['spots_detail'].items():
+            self.assertEqual(indexed_analysis['spots_detail'][spot_id]['occupied'], spot['occupied'])
+            self.assertAlmostEqual(indexed_analysis['spots_detail'][spot_id]['confidence'], spot['confidence'])
+
+class TestDetectionBatch(unittest.TestCase):
+    def setUp(self):
+        self.objects = [
+            {'bbox': [10, 10, 30, 50], 'confidence': 0.9, 'class_id': 0, 'class_name': 'person'},
+            {'bbox': [100, 50, 180, 80], 'confidence': 0.8, 'class_id': 5, 'class_name': 'bus', 'track_id': 3},
+            {'bbox': [200, 200, 250, 230], 'confidence': 0.7, 'class_id': 2, 'class_name': 'car'}
+        ]
+    
+    def test_dict_view_round_trip(self):
+        batch = DetectionBatch.from_dicts(self.objects)
+        self.assertEqual(batch.to_dicts(), self.objects)
+        self.assertEqual(batch[1], self.objects[1])
+        self.assertEqual(batch.select(['car', 'bus']).to_dicts(), self.objects[1:])
+    
+    def test_from_tensor_applies_threshold(self):
+        detections = np.array([[0.6, 0.4, 10.7, 10.2, 0.9, 2], [5, 5, 20, 20, 0.3, 0]])
+        batch = DetectionBatch.from_tensor(detections, {0: 'person', 2: 'car'}, confidence_threshold=0.5)
+        self.assertEqual(batch.labels, ['car'])
+        self.assertEqual(batch[0]['bbox'], [0, 0, 10, 10])
+        np.testing.assert_allclose(batch.centers, [[5, 5]])
+    
+    def test_analyzers_accept_batches(self):
+        batch = DetectionBatch.from_dicts(self.objects)
+        traffic = TrafficAnalyzer().analyze_traffic_flow(batch, (480, 640))
+        crowd = CrowdDensityAnalyzer('counting').analyze_crowd_density(batch, (480, 640))
+        tracks = PedestrianTracker(engine='sort').update_tracks(batch)
+        
+        self.assertEqual(traffic['vehicle_count'], {'car': 1, 'bus': 1})
+        self.assertEqual(traffic, dict(TrafficAnalyzer().analyze_traffic_flow(self.objects, (480, 640)),
+                                       timestamp=traffic['timestamp']))
+        self.assertEqual(crowd['people_locations'], [[10, 10, 30, 50]])
+        self.assertEqual([track['bbox'] for track in tracks.values()], [[10, 10, 30, 50]])
+
+class TestVehicleCounter(unittest.TestCase):
+    def car(self, x, y):
+        return {'bbox': [x, y - 40, x + 60, y], 'confidence': 0.9, 'class_id': 2, 'class_name': 'car'}
+    
+    def test_stopped_vehicle_is_counted_once(self):
+        counter = VehicleCounter(lines=[CountingLine('stop', (0, 300), (640, 300), ('south', 'north'))])
+        events = []
+        for frame in range(200):
+            events += counter.update([self.car(100, min(250 + 5 * frame, 340))], timestamp=frame / 10)
+        
+        self.assertEqual([(event['target'], event['direction']) for event in events], [('stop', 'south')])
+        counts = counter.get_counts(timestamp=20)
+        self.assertEqual(counts['total']['vehicles'], {'car': 1})
+        self.assertEqual(counts['1m']['targets'], {'stop': {'car': {'south': 1}}})
+        self.assertEqual(counter.get_counts(timestamp=200)['1m']['targets'], {})
+    
+    def test_u_turn_counts_each_direction_once(self):
+        counter = VehicleCounter(lines=[CountingLine('stop', (0, 300), (640, 300), ('south', 'north'))])
+        path = list(range(270, 330, 4)) + list(range(330, 270, -4)) + list(range(270, 330, 4))
+        events = []
+        for frame, y in enumerate(path):
+            events += counter.update([self.car(100, y)], timestamp=1000 + frame / 10)
+        
+        self.assertEqual([(event['track_id'], event['direction']) for event in events], [(0, 'south'), (0, 'north')])
+        self.assertEqual(counter.get_counts()['1m']['targets'], {'stop': {'car': {'south': 1, 'north': 1}}})
+    
+    def test_rolling_counter_expires_old_buckets(self):
+        counter = RollingCounter(60)
+        counter.add(0)
+        counter.add(30)
+        self.assertEqual(counter.value(59), 2)
+        self.assertEqual(counter.value(61), 1)
+        self.assertEqual(counter.value(10 ** 6), 0)
+
+class TestSpeedEstimator(unittest.TestCase):
+    def test_calibrated_speeds_per_lane(self):
+        estimator = SpeedEstimator.from_config({
+            'meters_per_pixel': 0.05,
+            'lanes': [{'name': 'left', 'polygon': [[0, 0], [320, 0], [320, 480], [0, 480]]},
+                      {'name': 'right', 'polygon': [[320, 0], [640, 0], [640, 480], [320, 480]]}]
+        })
+        track_ids = np.arange(4)
+        start = np.array([[100, 0], [200, 0], [400, 0], [500, 0]], dtype=np.float64)
+        velocity = np.array([[0, 200], [0, 200], [0, 100], [0, 100]])
+        for frame in range(10):
+            speeds = estimator.update(track_ids, start + velocity * frame / 10, timestamp=frame / 10)
+        
+        np.testing.assert_allclose(speeds, [36, 36, 18, 18])
+        estimator.update(track_ids[:0], start[:0], timestamp=1.0, removed_ids=track_ids)
+        distributions = estimator.lane_distributions()
+        self.assertAlmostEqual(distributions['left']['completed']['p50'], 36)
+        self.assertEqual(distributions['right']['completed']['count'], 2)
+    
+    def test_traffic_analyzer_reports_speeds(self):
+        analyzer = TrafficAnalyzer({'speed': {'meters_per_pixel': 0.05}})
+        for frame in range(5):
+            car = {'bbox': [100, 100 + 20 * frame, 160, 140 + 20 * frame], 'class_id': 2, 'class_name': 'car'}
+            analysis = analyzer.analyze_traffic_flow([car], (480, 640), timestamp=frame / 10)
+        
+        self.assertAlmostEqual(analysis['average_speed'], 36)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
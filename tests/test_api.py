@@ -0,0 +1,221 @@
+import unittest
+import asyncio
+import gc
+import json
+import weakref
+import cv2
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.api.inference_service import InferenceService
+from smartcity_vision.api.ingest import ImageIngestor, PayloadTooLargeError, UnsupportedMediaError, image_dimensions
+from smartcity_vision.api.websocket_handler import ENCODERS, ClientConnection, WebSocketHandler
+from smartcity_vision.core.model_registry import ModelRegistry
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+
+class MemoryModel:
+    memory_bytes = 1024 * 1024
+
+def stub_model(model_type, model_path=None, confidence_threshold=0.5, repo_path=None):
+    detector = StubDetector(num_objects=3)
+    detector.model = MemoryModel()
+    return detector
+
+class TestInferenceService(unittest.TestCase):
+    def test_batches_go_through_the_registry(self):
+        registry = ModelRegistry(max_memory_mb=1.5, detector_factory=stub_model)
+        registry.register('a', 'faster_rcnn', model_path='a.pt')
+        registry.register('b', 'faster_rcnn', model_path='b.pt')
+        
+        async def scenario():
+            service = InferenceService(registry.get, max_wait=0.001)
+            service.start()
+            frame = np.zeros((120, 160, 3), dtype=np.uint8)
+            try:
+                for _ in range(3):
+                    await service.detect(frame, 'a')
+                hits = registry.stats()['models']['a']['hits']
+                evicted = weakref.ref(registry.entries['a'].detector)
+                objects = await service.detect(frame, 'b')
+            finally:
+                service.stop()
+            return hits, evicted, objects
+        
+        hits, evicted, objects = asyncio.run(scenario())
+        gc.collect()
+        
+        self.assertEqual(hits, 3)
+        self.assertEqual(len(objects), 3)
+        self.assertEqual(sorted(registry.stats()['models']), ['b'])
+        self.assertIsNone(evicted())
+
+class TestImageIngestor(unittest.TestCase):
+    def encode(self, width, height, extension='.jpg'):
+        return np.frombuffer(cv2.imencode(extension, np.zeros((height, width, 3), dtype=np.uint8))[1], np.uint8)
+    
+    def test_header_dimensions(self):
+        self.assertEqual(image_dimensions(self.encode(1920, 1080)), ('jpeg', (1920, 1080)))
+        self.assertEqual(image_dimensions(self.encode(320, 240, '.png')), ('png', (320, 240)))
+        self.assertEqual(image_dimensions(b'not an image'), (None, None))
+    
+    def test_reduced_decode_keeps_model_resolution(self):
+        ingestor = ImageIngestor(target_size=640)
+        payload = self.encode(2560, 1440)
+        ingested = ingestor.decode(payload, len(payload))
+        
+        self.assertEqual(ingested.scale, 4)
+        self.assertEqual(ingested.shape, (360, 640, 3))
+        self.assertEqual(ingested.source_shape, (1440, 2560, 3))
+    
+    def test_reduced_decode_reports_source_coordinates(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        import smartcity_vision.api.inference_service as inference_service
+        import smartcity_vision.api.ingest as ingest
+        from smartcity_vision.api.endpoints import router
+        
+        app = FastAPI()
+        app.include_router(router)
+        detector = StubDetector(num_objects=20)
+        inference_service._service = inference_service.InferenceService(lambda name: detector)
+        inference_service._service.start()
+        ingest._ingestor = ImageIngestor(target_size=640)
+        try:
+            payload = self.encode(2560, 1440).tobytes()
+            response = TestClient(app).post('/analyze/all?tasks=crowd,traffic',
+                                            files={'file': ('frame.jpg', payload, 'image/jpeg')})
+        finally:
+            inference_service._service.stop()
+            inference_service._service = None
+            ingest._ingestor = None
+        
+        analysis = response.json()
+        self.assertEqual(analysis['image_shape'], [1440, 2560, 3])
+        self.assertEqual(analysis['ingest']['scale'], 4)
+        self.assertGreater(max(hotspot['bbox'][2] for hotspot in analysis['crowd']['hotspots']), 640)
+    
+    def test_rejects_before_decoding(self):
+        ingestor = ImageIngestor(max_pixels=640 * 480)
+        payload = self.encode(1280, 720)
+        with self.assertRaises(PayloadTooLargeError):
+            ingestor.decode(payload, len(payload))
+        with self.assertRaises(UnsupportedMediaError):
+            ingestor.decode(np.zeros(64, dtype=np.uint8), 64)
+
+class RecordingSocket:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = []
+        self.close_reason = None
+    
+    async def accept(self):
+        pass
+    
+    async def close(self, code=1000, reason=None):
+        self.close_reason = reason
+    
+    async def send_text(self, payload):
+        await asyncio.sleep(self.latency)
+        self.messages.append(json.loads(payload))
+
+class TestWebSocketHandler(unittest.TestCase):
+    def test_queue_coalesces_and_drops_oldest(self):
+        async def scenario():
+            client = ClientConnection(RecordingSocket(), max_queue_size=2)
+            client.enqueue('a1', key='traffic/a')
+            client.enqueue('b1', key='traffic/b')
+            client.enqueue('a2', key='traffic/a')
+            client.enqueue('c1', key='traffic/c')
+            return list(client.pending.values()), client.stats
+        
+        pending, stats = asyncio.run(scenario())
+        self.assertEqual(pending, ['a2', 'c1'])
+        self.assertEqual((stats['coalesced'], stats['dropped']), (1, 1))
+    
+    def test_slow_client_does_not_delay_topic_subscribers(self):
+        async def scenario():
+            handler = WebSocketHandler()
+            slow, fast, other = RecordingSocket(latency=0.5), RecordingSocket(), RecordingSocket()
+            await handler.connect(slow)
+            await handler.connect(fast, ['traffic/*'])
+            await handler.connect(other, ['crowd/*'])
+            
+            self.assertEqual(handler.publish({'vehicles': 3}, 'traffic/camera_0'), 2)
+            await asyncio.sleep(0.05)
+            received = (len(slow.messages), fast.messages, other.messages)
+            for socket in list(handler.clients):
+                handler.disconnect(socket)
+            return received
+        
+        slow_count, fast_messages, other_messages = asyncio.run(scenario())
+        self.assertEqual(slow_count, 0)
+        self.assertEqual(fast_messages[0]['topic'], 'traffic/camera_0')
+        self.assertEqual(fast_messages[0]['data'], {'vehicles': 3})
+        self.assertEqual(other_messages, [])
+
+    def test_route_cache_is_bounded_and_skips_unsubscribed_topics(self):
+        async def scenario():
+            handler = WebSocketHandler(max_routes=2)
+            await handler.connect(RecordingSocket(), ['traffic/*'])
+            for index in range(5):
+                handler.publish({}, f"crowd/camera_{index}")
+            unrouted = list(handler.routes)
+            for index in range(3):
+                handler.publish({}, f"traffic/camera_{index}")
+            handler.publish({}, 'traffic/camera_1')
+            handler.publish({}, 'traffic/camera_3')
+            routed = list(handler.routes)
+            for socket in list(handler.clients):
+                handler.disconnect(socket)
+            return unrouted, routed
+        
+        unrouted, routed = asyncio.run(scenario())
+        self.assertEqual(unrouted, [])
+        self.assertEqual(routed, ['traffic/camera_1', 'traffic/camera_3'])
+    
+    def test_unavailable_encoding_is_rejected_at_connect(self):
+        async def scenario():
+            handler = WebSocketHandler()
+            socket = RecordingSocket()
+            encoders = dict(ENCODERS)
+            ENCODERS.pop('msgpack', None)
+            try:
+                client = await handler.connect(socket, encoding='msgpack')
+            finally:
+                ENCODERS.update(encoders)
+            return client, socket, handler.clients
+        
+        client, socket, clients = asyncio.run(scenario())
+        self.assertIsNone(client)
+        self.assertEqual(socket.close_reason, "msgpack is not installed")
+        self.assertEqual(clients, {})
+    
+    def test_socket_subscribe_protocol(self):
+        from fastapi import FastAPI, WebSocket
+        from fastapi.testclient import TestClient
+
+        handler = WebSocketHandler()
+        app = FastAPI()
+
+        @app.websocket("/ws")
+        async def websocket_endpoint(websocket: WebSocket):
+            await handler.serve(websocket, ['alerts/*'])
+
+        with TestClient(app).websocket_connect('/ws') as websocket:
+            websocket.send_text(json.dumps({'subscribe': 'traffic/camera_0'}))
+            websocket.send_text(json.dumps({'subscribe': ['crowd/*'], 'unsubscribe': 'alerts/*'}))
+            websocket.send_text(json.dumps({'subscribe': [1, 'parking/*']}))
+            error = json.loads(websocket.receive_text())
+            topics = next(iter(handler.clients.values())).topics
+
+            websocket.send_text(json.dumps({'subscribe': {'traffic': 1}}))
+            second_error = json.loads(websocket.receive_text())
+
+        self.assertIn('error', error)
+        self.assertIn('error', second_error)
+        self.assertEqual(topics, {'traffic/camera_0', 'crowd/*'})
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
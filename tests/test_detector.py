@@ -6,6 +6,12 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from smartcity_vision.core.object_detector import ObjectDetector
+from smartcity_vision.core.keyframe_detector import KeyframeDetector
+from smartcity_vision.core.motion_gate import MotionGate
+from smartcity_vision.core.region_detector import RegionDetector
+from smartcity_vision.core.batch_detector import MicroBatcher, QueueFullError
+from smartcity_vision.core.inference_backends import quantize_dynamic, split_model_type, to_yolo_input, yolo_postprocess
+from smartcity_vision.benchmarks.stub_detector import StubDetector
 
 class TestObjectDetector(unittest.TestCase):
     def setUp(self):
@@ -29,5 +35,175 @@ class TestObjectDetector(unittest.TestCase):
         filtered = self.detector.filter_urban_objects(test_objects)
         self.assertEqual(len(filtered), 2)
 
+class TestKeyframeDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = KeyframeDetector(StubDetector(num_objects=10), interval=4, adaptive=False)
+        self.sample_image = np.full((480, 640, 3), 100, dtype=np.uint8)
+    
+    def test_propagates_between_keyframes(self):
+        results = [self.detector.detect_objects(self.sample_image) for _ in range(8)]
+        propagated = [bool(objects) and objects[0]['propagated'] for objects in results]
+        
+        self.assertEqual(propagated, [False, True, True, True, False, True, True, True])
+        self.assertEqual(len(results[1]), 10)
+        self.assertLess(results[1][0]['confidence'], results[0][0]['confidence'])
+    
+    def test_scene_change_forces_detection(self):
+        self.detector.detect_objects(self.sample_image)
+        objects = self.detector.detect_objects(np.zeros_like(self.sample_image))
+        
+        self.assertFalse(objects[0]['propagated'])
+        self.assertEqual(self.detector.get_stats()['scene_changes'], 1)
+    
+    def test_from_config(self):
+        from smartcity_vision.utils.config_loader import ConfigLoader
+        config = ConfigLoader(os.path.join(os.path.dirname(__file__), '..', 'config.yaml'))
+        config.config['object_detection']['keyframe'] = {'interval': 3, 'max_interval': 9}
+        detector = KeyframeDetector.from_config(StubDetector(), config)
+        
+        self.assertEqual((detector.interval, detector.min_interval, detector.max_interval), (3, 1, 9))
+        self.assertTrue(detector.adaptive)
+
+class TestMotionGate(unittest.TestCase):
+    def setUp(self):
+        self.gate = MotionGate(max_staleness=5)
+        self.sample_image = np.full((480, 640, 3), 100, dtype=np.uint8)
+    
+    def test_static_frames_are_skipped_until_stale(self):
+        decisions = [self.gate.update(self.sample_image)['detect'] for _ in range(6)]
+        
+        self.assertEqual(decisions, [True, False, False, False, False, True])
+        self.assertEqual(self.gate.get_stats('default')['forced'], 1)
+    
+    def test_motion_reports_changed_region(self):
+        self.gate.update(self.sample_image)
+        frame = self.sample_image.copy()
+        cv2.rectangle(frame, (200, 100), (260, 180), (255, 255, 255), -1)
+        result = self.gate.update(frame)
+        
+        self.assertTrue(result['detect'])
+        x1, y1, x2, y2 = result['regions'][0]
+        self.assertTrue(x1 <= 200 and y1 <= 100 and x2 >= 260 and y2 >= 180)
+
+class BlobDetector:
+    model_type = 'blob'
+    
+    def detect_objects(self, image):
+        mask = (cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) > 200).astype(np.uint8)
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        return [{'bbox': [int(x), int(y), int(x + w), int(y + h)], 'confidence': 0.9,
+                 'class_id': 1, 'class_name': 'person'} for x, y, w, h, _ in stats[1:num_labels]]
+    
+    def detect_objects_batch(self, frames):
+        return [self.detect_objects(frame) for frame in frames]
+    
+    def filter_urban_objects(self, objects, target_classes=None):
+        return objects
+
+class OverlapDetector(BlobDetector):
+    def detect_objects(self, image):
+        if image[0, 0, 0] != 255:
+            return []
+        return [{'bbox': [100, 100, 300, 250], 'confidence': 0.9, 'class_id': 2, 'class_name': 'car'},
+                {'bbox': [120, 150, 200, 240], 'confidence': 0.8, 'class_id': 2, 'class_name': 'car'}]
+
+class TestRegionDetector(unittest.TestCase):
+    def setUp(self):
+        self.sample_image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        self.boxes = [[100, 100, 140, 180], [600, 560, 680, 700], [1500, 900, 1560, 1000]]
+        for x1, y1, x2, y2 in self.boxes:
+            cv2.rectangle(self.sample_image, (x1, y1), (x2 - 1, y2 - 1), (255, 255, 255), -1)
+    
+    def test_tiled_detections_are_merged(self):
+        detector = RegionDetector(BlobDetector(), tile_size=640)
+        objects = detector.detect_objects(self.sample_image)
+        
+        self.assertEqual(sorted(obj['bbox'] for obj in objects), self.boxes)
+        self.assertGreater(detector.get_stats()['crops_per_frame'], 1)
+    
+    def test_overlapping_objects_within_a_tile_survive(self):
+        image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        image[0, 0] = 255
+        objects = RegionDetector(OverlapDetector(), tile_size=640).detect_objects(image)
+        
+        self.assertEqual(sorted(obj['bbox'] for obj in objects), [[100, 100, 300, 250], [120, 150, 200, 240]])
+    
+    def test_roi_limits_processed_area(self):
+        detector = RegionDetector(BlobDetector(), rois=[[[400, 400], [1000, 400], [1000, 800], [400, 800]]])
+        objects = detector.detect_objects(self.sample_image)
+        
+        self.assertEqual([obj['bbox'] for obj in objects], [self.boxes[1]])
+        self.assertLess(detector.get_stats()['processed_pixel_ratio'], 0.2)
+
+    def test_motion_regions_keep_unchanged_detections(self):
+        detector = RegionDetector(BlobDetector(), rois=[[[0, 0], [1000, 0], [1000, 1080], [0, 1080]]])
+        previous = detector.detect_objects(self.sample_image)
+        moved = self.sample_image.copy()
+        moved[560:700, 600:680] = 0
+        moved[560:700, 620:700] = 255
+        objects = detector.detect_changed(moved, [[560, 520, 760, 740], [1400, 850, 1700, 1050]], previous)
+        
+        self.assertEqual(sorted(obj['bbox'] for obj in objects), [self.boxes[0], [620, 560, 700, 700]])
+        self.assertEqual(detector.get_stats()['crops_per_frame'], 1)
+
+class TestInferenceBackends(unittest.TestCase):
+    def test_split_model_type(self):
+        self.assertEqual(split_model_type('yolov5_onnx'), ('yolov5', 'onnx'))
+        self.assertEqual(split_model_type('faster_rcnn_torchscript'), ('faster_rcnn', 'torchscript'))
+        self.assertEqual(split_model_type('faster_rcnn'), ('faster_rcnn', None))
+    
+    def test_yolo_postprocess_maps_to_frame_coordinates(self):
+        image = np.zeros((360, 1280, 3), dtype=np.uint8)
+        inputs, transforms = to_yolo_input([image], 640)
+        
+        prediction = np.zeros((1, 2, 7), dtype=np.float32)
+        prediction[0, 0] = [320, 320, 64, 32, 0.9, 0.1, 0.95]
+        prediction[0, 1] = [322, 320, 64, 32, 0.8, 0.1, 0.95]
+        detections = yolo_postprocess(prediction, transforms, confidence_threshold=0.5)[0]
+        
+        self.assertEqual(inputs.shape, (1, 3, 640, 640))
+        self.assertEqual(len(detections), 1)
+        np.testing.assert_allclose(detections[0, :4].numpy(), [576, 148, 704, 212], atol=1)
+        self.assertEqual(int(detections[0, 5]), 1)
+    
+    def test_dynamic_quantization_replaces_linear_layers(self):
+        import torch
+        model = torch.nn.Sequential(torch.nn.Conv2d(3, 8, 3), torch.nn.Flatten(), torch.nn.Linear(8, 4))
+        quantized = quantize_dynamic(model)
+        
+        self.assertIsInstance(quantized[2], torch.ao.nn.quantized.dynamic.Linear)
+        self.assertEqual(quantized(torch.zeros(1, 3, 3, 3)).shape, (1, 4))
+    
+    def test_dynamic_quantization_rejects_conv_only_models(self):
+        import torch
+        model = torch.nn.Sequential(torch.nn.Conv2d(3, 8, 3), torch.nn.SiLU(), torch.nn.Conv2d(8, 8, 1))
+        with self.assertRaisesRegex(ValueError, 'onnx backend'):
+            quantize_dynamic(model, 'yolov5')
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_requests_share_a_batch(self):
+        batcher = MicroBatcher(StubDetector(num_objects=3, inference_time=0.01), max_batch_size=4, max_wait=0.05)
+        batcher.start()
+        try:
+            futures = [batcher.submit(np.zeros((120, 160, 3), dtype=np.uint8)) for _ in range(4)]
+            results = [future.result(timeout=5) for future in futures]
+        finally:
+            batcher.stop()
+        
+        self.assertTrue(all(len(objects) == 3 for objects in results))
+        self.assertEqual(batcher.get_stats()['batches_processed'], 1)
+    
+    def test_full_queue_is_rejected_with_retry_hint(self):
+        batcher = MicroBatcher(StubDetector(), max_batch_size=2, max_queue_size=2)
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        futures = [batcher.submit(frame), batcher.submit(frame)]
+        
+        with self.assertRaises(QueueFullError) as context:
+            batcher.submit(frame)
+        self.assertGreater(context.exception.retry_after, 0)
+        
+        batcher.stop()
+        self.assertTrue(all(isinstance(future.exception(), RuntimeError) for future in futures))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import unittest
+import time
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.core.detector_pool import DetectorPool, partition_cpus
+from smartcity_vision.utils.shared_frames import SharedFrameChannel
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+
+class TestDetectorPool(unittest.TestCase):
+    def test_partition_cpus(self):
+        self.assertEqual(partition_cpus(2, range(8)), [[0, 1, 2, 3], [4, 5, 6, 7]])
+        self.assertEqual(partition_cpus(3, [0, 1]), [[0], [1], [0]])
+    
+    def test_cameras_are_sharded_across_workers(self):
+        pool = DetectorPool(2, StubDetector, {'num_objects': 5}, filter_urban=True)
+        pool.start(timeout=120)
+        try:
+            frames = {camera_id: np.zeros((240, 320, 3), dtype=np.uint8) for camera_id in ('a', 'b', 'c')}
+            results = pool.detect_all(frames)
+            stats = pool.get_stats()
+        finally:
+            pool.stop()
+        
+        self.assertEqual(sorted(results), ['a', 'b', 'c'])
+        self.assertTrue(all(len(objects) == 5 for objects in results.values()))
+        self.assertEqual(sorted(len(worker['cameras']) for worker in stats['workers'].values()), [1, 2])
+    
+    def test_workers_read_shared_frames(self):
+        channel = SharedFrameChannel((240, 320, 3), num_slots=2)
+        pool = DetectorPool(1, StubDetector, {'num_objects': 5}, channels=[channel])
+        pool.start(timeout=120)
+        try:
+            ref = channel.write(np.zeros((240, 320, 3), dtype=np.uint8), sequence=1, timestamp=0.0)
+            objects = pool.submit(ref, 'a').result(timeout=30)
+            refcount = channel.refcount(ref.slot)
+        finally:
+            pool.stop()
+            channel.close()
+            channel.unlink()
+        
+        self.assertEqual(len(objects), 5)
+        self.assertEqual(refcount, 0)
+    
+    def wait_until_ready(self, pool, timeout=120):
+        deadline = time.perf_counter() + timeout
+        while not all(worker.ready or worker.failed for worker in pool.workers):
+            self.assertLess(time.perf_counter(), deadline)
+            time.sleep(0.05)
+    
+    def test_dead_worker_fails_its_frames_and_restarts(self):
+        pool = DetectorPool(1, StubDetector, {'num_objects': 5, 'inference_time': 1.0})
+        pool.start(timeout=120)
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        try:
+            future = pool.submit(frame, 'a')
+            time.sleep(0.2)
+            pool.workers[0].process.kill()
+            error = future.exception(timeout=30)
+            
+            self.wait_until_ready(pool)
+            objects = pool.submit(frame, 'a').result(timeout=30)
+            stats = pool.get_stats()['workers'][0]
+        finally:
+            pool.stop()
+        
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(len(objects), 5)
+        self.assertEqual((stats['restarts'], stats['pending'], stats['alive']), (1, 0, True))
+    
+    def test_cameras_move_off_a_worker_that_cannot_restart(self):
+        pool = DetectorPool(2, StubDetector, {'num_objects': 5}, max_restarts=0)
+        pool.start(timeout=120)
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        try:
+            pool.detect_all({'a': frame, 'b': frame})
+            dead = pool.workers[pool.assignments['a']]
+            dead.process.kill()
+            dead.process.join()
+            deadline = time.perf_counter() + 10
+            while not dead.failed and time.perf_counter() < deadline:
+                time.sleep(0.05)
+            
+            results = pool.detect_all({'a': frame, 'b': frame})
+            stats = pool.get_stats()['workers']
+        finally:
+            pool.stop()
+        
+        self.assertEqual(sorted(results), ['a', 'b'])
+        self.assertFalse(stats[dead.index]['alive'])
+        self.assertEqual(stats[dead.index]['cameras'], [])
+        self.assertEqual(stats[1 - dead.index]['cameras'], ['a', 'b'])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
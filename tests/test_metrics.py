@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.utils.metrics import MetricsRegistry, instrument_components, instrument_video_processor
+from smartcity_vision.utils.video_processor import VideoProcessor
+
+class TestMetrics(unittest.TestCase):
+    def test_frame_totals_are_counters(self):
+        registry = MetricsRegistry(enabled=True)
+        processor = VideoProcessor(ring_slots=2)
+        processor.frames_captured = 7
+        instrument_video_processor(processor, 'cam', registry)
+        output = registry.render_prometheus()
+        
+        self.assertIn('# TYPE smartcity_video_frames_captured_total counter', output)
+        self.assertIn('smartcity_video_frames_captured_total{camera="cam"} 7', output)
+        self.assertIn('# TYPE smartcity_video_queue_depth gauge', output)
+    
+    def test_instrumenting_a_class_times_every_instance(self):
+        class Analyzer:
+            def analyze_traffic_flow(self, objects, frame_shape):
+                return len(objects)
+        
+        registry = MetricsRegistry(enabled=True)
+        instrument_components(traffic_analyzer=Analyzer, registry=registry)
+        instrument_components(traffic_analyzer=Analyzer, registry=registry)
+        results = [Analyzer().analyze_traffic_flow([1, 2], (4, 4)) for _ in range(3)]
+        
+        self.assertEqual(results, [2, 2, 2])
+        self.assertIn('smartcity_stage_duration_seconds_count{stage="traffic"} 3', registry.render_prometheus())
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import unittest
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.core.model_registry import ModelRegistry
+from smartcity_vision.benchmarks.stub_detector import StubDetector
+
+class StubModel:
+    def __init__(self, memory_bytes):
+        self.memory_bytes = memory_bytes
+
+class StubFactory:
+    def __init__(self, load_time=0.0):
+        self.load_time = load_time
+        self.loads = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, model_type, model_path=None, confidence_threshold=0.5, repo_path=None, memory_mb=1):
+        time.sleep(self.load_time)
+        with self.lock:
+            self.loads.append(model_path)
+        detector = StubDetector(confidence_threshold=confidence_threshold)
+        detector.model = StubModel(memory_mb * 1024 * 1024)
+        return detector
+
+def build_registry(names, factory, max_memory_mb=None):
+    registry = ModelRegistry(max_memory_mb=max_memory_mb, detector_factory=factory)
+    for name in names:
+        registry.register(name, 'faster_rcnn', model_path=f"{name}.pt")
+    return registry
+
+class TestModelRegistry(unittest.TestCase):
+    def test_models_load_once_and_are_reused(self):
+        factory = StubFactory()
+        registry = build_registry(['a'], factory)
+        
+        first = registry.get('a')
+        self.assertIs(registry.get('a'), first)
+        self.assertIs(registry.get('a'), first)
+        
+        stats = registry.stats()
+        self.assertEqual(factory.loads, ['a.pt'])
+        self.assertEqual((stats['misses'], stats['models']['a']['hits']), (1, 2))
+    
+    def test_concurrent_gets_share_one_load(self):
+        factory = StubFactory(load_time=0.05)
+        registry = build_registry(['a'], factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('a'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(factory.loads, ['a.pt'])
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(detector is results[0] for detector in results))
+    
+    def test_least_recently_used_model_is_evicted_under_the_cap(self):
+        factory = StubFactory()
+        registry = build_registry(['a', 'b', 'c'], factory, max_memory_mb=2.5)
+        registry.get('a')
+        registry.get('b')
+        registry.get('a')
+        registry.get('c')
+        
+        stats = registry.stats()
+        self.assertEqual(sorted(stats['models']), ['a', 'c'])
+        self.assertEqual(stats['evictions'], 1)
+        self.assertAlmostEqual(stats['resident_memory_mb'], 2.0)
+        
+        registry.get('b')
+        self.assertEqual(factory.loads, ['a.pt', 'b.pt', 'c.pt', 'b.pt'])
+    
+    def test_stats_fields(self):
+        registry = build_registry(['a'], StubFactory(), max_memory_mb=64)
+        registry.get('a')
+        stats = registry.stats()
+        model = stats['models']['a']
+        
+        self.assertEqual(model['model_type'], 'stub')
+        self.assertEqual(model['memory_mb'], 1.0)
+        self.assertGreaterEqual(model['load_time'], 0)
+        self.assertLessEqual(model['loaded_at'], model['last_used'])
+        self.assertEqual((stats['loaded_models'], stats['max_memory_mb']), (1, 64))
+    
+    def test_requires_local_weights(self):
+        factory = StubFactory()
+        registry = ModelRegistry(detector_factory=factory)
+        registry.register('hub', 'yolov5')
+        registry.register('no_repo', 'yolov5', model_path='yolov5s.pt')
+        registry.register('rcnn', 'faster_rcnn')
+        
+        for name in ('hub', 'no_repo', 'rcnn'):
+            with self.assertRaises(ValueError):
+                registry.get(name)
+        self.assertEqual(factory.loads, [])
+
+if __name__ == '__main__':
+    unittest.main()
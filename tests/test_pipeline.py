@@ -0,0 +1,85 @@
+import unittest
+import itertools
+import time
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.utils.pipeline import Pipeline, PipelineStage, parallel_stage
+
+def slow(duration, func=lambda item: item):
+    def run(item):
+        time.sleep(duration)
+        return func(item)
+    return run
+
+class TestPipeline(unittest.TestCase):
+    def test_output_keeps_source_order_after_parallel_stages(self):
+        def jitter(item):
+            time.sleep(0.01 * (item['index'] % 3))
+            return item['index']
+        
+        analyze = parallel_stage({'square': lambda item: jitter(item) ** 2, 'double': lambda item: jitter(item) * 2})
+        pipeline = Pipeline([
+            PipelineStage('detect', slow(0.002)),
+            PipelineStage('analyze', analyze)
+        ])
+        results = list(pipeline.run({'index': index} for index in range(12)))
+        pipeline.stop()
+        
+        self.assertEqual([item['index'] for item in results], list(range(12)))
+        self.assertEqual([item['square'] for item in results], [index ** 2 for index in range(12)])
+        self.assertEqual([item['double'] for item in results], [index * 2 for index in range(12)])
+    
+    def test_block_backpressure_keeps_every_item(self):
+        pipeline = Pipeline([PipelineStage('slow', slow(0.01), queue_size=1, policy='block')])
+        results = list(pipeline.run(iter(range(10))))
+        
+        self.assertEqual(results, list(range(10)))
+        self.assertEqual(pipeline.get_stats()['slow']['dropped'], 0)
+    
+    def test_drop_oldest_backpressure_discards_stale_items(self):
+        discarded = []
+        pipeline = Pipeline([PipelineStage('slow', slow(0.02), queue_size=1, policy='drop_oldest')],
+                            on_discard=discarded.append)
+        results = list(pipeline.run(iter(range(20))))
+        stats = pipeline.get_stats()['slow']
+        
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(results, sorted(results))
+        self.assertEqual(sorted(results + discarded), list(range(20)))
+        self.assertEqual(len(discarded), stats['dropped'])
+        self.assertEqual(results[-1], 19)
+    
+    def test_stage_errors_are_logged_and_discarded(self):
+        def fail_on_three(item):
+            if item == 3:
+                raise ValueError("bad item")
+            return item
+        
+        discarded = []
+        pipeline = Pipeline([PipelineStage('analyze', fail_on_three)], on_discard=discarded.append)
+        with self.assertLogs('smartcity_vision.utils.pipeline', 'ERROR') as logs:
+            results = list(pipeline.run(iter(range(6))))
+        
+        self.assertEqual(results, [0, 1, 2, 4, 5])
+        self.assertEqual(discarded, [3])
+        self.assertEqual(pipeline.get_stats()['analyze']['errors'], 1)
+        self.assertIn('analyze', logs.output[0])
+    
+    def test_stop_ends_the_feed_and_shuts_down_parallel_stages(self):
+        analyze = parallel_stage({'value': lambda item: item['index']})
+        pipeline = Pipeline([PipelineStage('analyze', analyze)])
+        results = pipeline.run({'index': index} for index in itertools.count())
+        
+        first = [next(results)['value'] for _ in range(3)]
+        pipeline.stop()
+        pipeline.feeder.join(timeout=5)
+        
+        self.assertEqual(first, [0, 1, 2])
+        self.assertFalse(pipeline.feeder.is_alive())
+        with self.assertRaises(RuntimeError):
+            analyze({'index': 0})
+
+if __name__ == '__main__':
+    unittest.main()
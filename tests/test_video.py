@@ -0,0 +1,231 @@
+import unittest
+import time
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.utils.frame_broadcast import FrameBroadcast
+from smartcity_vision.utils.frame_scheduler import FrameScheduler
+from smartcity_vision.utils.frame_buffer import FrameRingBuffer, BORROWED, FREE, READY
+from smartcity_vision.utils.shared_frames import SharedFrameChannel, SharedFrameRingBuffer
+from smartcity_vision.utils.video_processor import VideoProcessor
+
+class TestFrameBroadcast(unittest.TestCase):
+    def test_viewers_share_one_encode_per_quality(self):
+        broadcast = FrameBroadcast(quality_levels=(50, 85))
+        broadcast.publish(np.zeros((48, 64, 3), dtype=np.uint8))
+        
+        sequence, first = broadcast.jpeg(80)
+        _, second = broadcast.jpeg(90)
+        _, low = broadcast.jpeg(40)
+        
+        self.assertEqual(sequence, 1)
+        self.assertIs(first, second)
+        self.assertIsNot(first, low)
+        self.assertEqual(broadcast.get_stats()['encodes'], 2)
+    
+    def test_wait_skips_to_latest_frame(self):
+        broadcast = FrameBroadcast()
+        for value in range(3):
+            broadcast.publish(np.full((8, 8, 3), value, dtype=np.uint8))
+        
+        self.assertEqual(broadcast.wait(0, timeout=0.1), 3)
+        self.assertIsNone(broadcast.wait(3, timeout=0.01))
+        broadcast.close()
+        self.assertIsNone(broadcast.wait(3, timeout=1.0))
+    
+    def test_producers_wait_for_a_viewer(self):
+        broadcast = FrameBroadcast()
+        self.assertFalse(broadcast.wait_for_viewers(timeout=0.01))
+        
+        broadcast.add_viewer()
+        self.assertTrue(broadcast.wait_for_viewers(timeout=0.01))
+        broadcast.remove_viewer()
+        broadcast.close()
+        self.assertFalse(broadcast.wait_for_viewers(timeout=1.0))
+
+class FakeCapture:
+    def __init__(self, num_frames):
+        self.remaining = num_frames
+    
+    def grab(self):
+        self.remaining -= 1
+        return self.remaining >= 0
+    
+    def read(self, frame=None):
+        if not self.grab():
+            return False, None
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+class TestFrameRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = FrameRingBuffer(num_slots=2)
+    
+    def write_frame(self, sequence):
+        slot = self.buffer.acquire_write_slot()
+        if slot is None:
+            return None
+        self.buffer.write(slot, lambda frame: (True, np.full((4, 4, 3), sequence, dtype=np.uint8)))
+        self.buffer.commit(slot, float(sequence), sequence)
+        return slot
+    
+    def test_borrow_and_release(self):
+        slot = self.write_frame(1)
+        self.assertEqual(slot.state, READY)
+        
+        borrowed = self.buffer.borrow(block=False)
+        self.assertIs(borrowed, slot)
+        self.assertEqual(borrowed.state, BORROWED)
+        self.assertIsNone(self.buffer.borrow(block=False))
+        
+        self.buffer.release(borrowed)
+        self.assertEqual(borrowed.state, FREE)
+        self.assertIs(self.buffer.acquire_write_slot(), borrowed)
+    
+    def test_unread_frames_are_overwritten_oldest_first(self):
+        first, second = self.write_frame(1), self.write_frame(2)
+        third = self.write_frame(3)
+        
+        self.assertIs(third, first)
+        self.assertEqual(self.buffer.get_stats()['overwritten'], 1)
+        self.assertEqual([self.buffer.borrow(block=False).sequence for _ in range(2)], [2, 3])
+    
+    def test_borrowed_slots_are_never_overwritten(self):
+        self.write_frame(1)
+        self.write_frame(2)
+        held = [self.buffer.borrow(block=False), self.buffer.borrow(block=False)]
+        
+        self.assertIsNone(self.write_frame(3))
+        self.assertEqual(self.buffer.get_stats()['dropped'], 1)
+        self.assertEqual([(slot.sequence, slot.state) for slot in held], [(1, BORROWED), (2, BORROWED)])
+    
+    def test_dropped_frames_are_not_counted_as_captured(self):
+        processor = VideoProcessor(ring_slots=1)
+        processor.cap = FakeCapture(3)
+        processor.running = True
+        callbacks = []
+        processor.add_frame_callback(lambda p: callbacks.append(p.finished))
+        
+        self.assertTrue(processor._capture_into_ring_buffer())
+        packet = processor.read_packet(block=False, borrow=True)
+        processor._capture_frames()
+        
+        self.assertEqual((processor.frames_captured, processor.frames_dropped), (0, 2))
+        self.assertEqual(callbacks, [True])
+        self.assertEqual(packet['slot'].state, BORROWED)
+
+class LargeFrameCapture(FakeCapture):
+    def read(self, frame=None):
+        if not self.grab():
+            return False, None
+        return True, np.zeros((8, 8, 3), dtype=np.uint8)
+
+class TestSharedFrameChannel(unittest.TestCase):
+    def setUp(self):
+        self.channel = SharedFrameChannel((4, 4, 3), num_slots=2)
+    
+    def tearDown(self):
+        self.channel.close()
+        self.channel.unlink()
+    
+    def test_held_slots_are_not_overwritten(self):
+        first = self.channel.write(np.full((4, 4, 3), 1, dtype=np.uint8), 1, 0.0)
+        second = self.channel.write(np.full((4, 4, 3), 2, dtype=np.uint8), 2, 0.0)
+        
+        self.assertIsNone(self.channel.write(np.full((4, 4, 3), 3, dtype=np.uint8), 3, 0.0))
+        self.assertEqual(self.channel.get_stats()['dropped'], 1)
+        
+        self.channel.release(first)
+        third = self.channel.write(np.full((4, 4, 3), 3, dtype=np.uint8), 3, 0.0)
+        self.assertEqual(third.slot, first.slot)
+        self.assertTrue((self.channel.view(second) == 2).all())
+    
+    def test_stale_reference_is_rejected(self):
+        ref = self.channel.write(np.zeros((4, 4, 3), dtype=np.uint8), 1, 0.0)
+        self.channel.release(ref)
+        self.channel.write(np.ones((4, 4, 3), dtype=np.uint8), 2, 0.0)
+        self.channel.write(np.ones((4, 4, 3), dtype=np.uint8), 3, 0.0)
+        
+        self.assertIsNone(self.channel.view(ref))
+        self.assertIsNone(self.channel.retain(ref.slot, ref.sequence))
+    
+    def test_oversized_frames_stop_capture_with_an_error(self):
+        processor = VideoProcessor(camera_id='cam', shared_slots=2)
+        processor.ring_buffer = SharedFrameRingBuffer((4, 4, 3), num_slots=2)
+        processor.cap = LargeFrameCapture(3)
+        processor.running = True
+        try:
+            with self.assertLogs('smartcity_vision.utils.video_processor', 'ERROR') as logs:
+                processor._capture_frames()
+            stats = processor.ring_buffer.get_stats()
+        finally:
+            processor.ring_buffer.destroy()
+        
+        self.assertTrue(processor.finished)
+        self.assertIsInstance(processor.error, ValueError)
+        self.assertIn('(8, 8, 3)', logs.output[0])
+        self.assertEqual((stats['ready'], stats['shared_held']), (0, 0))
+
+class FakeSource:
+    def __init__(self, num_frames=None, last_capture_time=None):
+        self.remaining = num_frames
+        self.sequence = 0
+        self.start_time = time.time()
+        self.last_capture_time = last_capture_time if last_capture_time is not None else self.start_time
+        self.frames_captured = 0
+        self.finished = False
+        self.callbacks = []
+    
+    def add_frame_callback(self, callback):
+        self.callbacks.append(callback)
+    
+    def has_frames(self):
+        return self.remaining is None or self.remaining > 0
+    
+    def read_latest(self, borrow=False):
+        if not self.has_frames():
+            self.finished = True
+            return None, 0
+        if self.remaining is not None:
+            self.remaining -= 1
+        self.sequence += 1
+        self.frames_captured += 1
+        return {'frame': np.zeros((4, 4, 3), dtype=np.uint8), 'sequence': self.sequence}, 0
+
+class TestFrameScheduler(unittest.TestCase):
+    def test_round_robin_is_fair_under_a_frame_limit(self):
+        scheduler = FrameScheduler({cam_id: FakeSource() for cam_id in ('a', 'b', 'c')})
+        order = [packet['camera_id'] for _ in range(6) for packet in scheduler.poll(max_frames=2)]
+        
+        self.assertEqual(order, ['a', 'b', 'c', 'a', 'b', 'c'] * 2)
+        self.assertEqual(set(scheduler.delivered.values()), {4})
+    
+    def test_per_camera_fps_limit(self):
+        scheduler = FrameScheduler({'limited': FakeSource(), 'free': FakeSource(num_frames=3)}, target_fps={'limited': 5})
+        for _ in range(3):
+            scheduler.poll()
+        
+        self.assertEqual(scheduler.delivered, {'limited': 1, 'free': 3})
+        packets = scheduler.wait(timeout=1.0)
+        self.assertEqual([packet['camera_id'] for packet in packets], ['limited'])
+        self.assertEqual(scheduler.get_camera_status()['limited']['target_fps'], 5)
+    
+    def test_stale_and_finished_cameras_are_reported(self):
+        sources = {
+            'live': FakeSource(),
+            'frozen': FakeSource(last_capture_time=time.time() - 10),
+            'ended': FakeSource(num_frames=1)
+        }
+        scheduler = FrameScheduler(sources, stale_timeout=2.0)
+        scheduler.poll()
+        scheduler.poll()
+        
+        self.assertEqual(sorted(scheduler.get_stale_cameras()), ['ended', 'frozen'])
+        status = scheduler.get_camera_status()
+        self.assertTrue(status['ended']['finished'])
+        self.assertFalse(status['live']['stale'])
+        self.assertGreater(status['frozen']['frame_age'], 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
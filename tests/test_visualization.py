@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from smartcity_vision.utils.visualization import RenderPlan, Visualization
+
+class TestVisualization(unittest.TestCase):
+    def setUp(self):
+        self.visualization = Visualization(text_cache_size=2)
+        self.sample_image = np.zeros((240, 320, 3), dtype=np.uint8)
+        self.objects = [{'bbox': [50, 60, 150, 200], 'class_name': 'car', 'confidence': 0.9}]
+    
+    def test_render_copies_unless_in_place(self):
+        result = self.visualization.draw_detections(self.sample_image, self.objects)
+        
+        self.assertFalse(self.sample_image.any())
+        self.assertIsNot(result, self.sample_image)
+        self.assertTrue(result.any())
+        
+        result = self.visualization.draw_detections(self.sample_image, self.objects, in_place=True)
+        self.assertIs(result, self.sample_image)
+        self.assertTrue(self.sample_image.any())
+    
+    def test_plans_render_like_direct_drawing(self):
+        plan = self.visualization.plan_detections(RenderPlan(), self.objects)
+        plan.extend(self.visualization.plan_crowd_density(RenderPlan(), {'total_people': 3, 'density_level': 'Low'}))
+        expected = self.visualization.draw_crowd_density(
+            self.visualization.draw_detections(self.sample_image, self.objects),
+            {'total_people': 3, 'density_level': 'Low'})
+        
+        np.testing.assert_array_equal(self.visualization.render(self.sample_image, plan), expected)
+    
+    def test_text_size_cache_evicts_least_recently_used(self):
+        first = self.visualization.measure_text('car: 0.90', 0.5, 2)
+        self.visualization.measure_text('person: 0.80', 0.5, 2)
+        self.assertEqual(self.visualization.measure_text('car: 0.90', 0.5, 2), first)
+        self.visualization.measure_text('bus: 0.70', 0.5, 2)
+        
+        cached = [key[0] for key in self.visualization.text_size_cache]
+        self.assertEqual(cached, ['car: 0.90', 'bus: 0.70'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,11 @@
 from .config_loader import ConfigLoader
 from .video_processor import VideoProcessor
 from .geo_utils import GeoUtils
-from .visualization import Visualization
\ No newline at end of file
+from .visualization import Visualization, RenderPlan
+from .pipeline import Pipeline, PipelineStage
+from .frame_scheduler import FrameScheduler
+from .frame_buffer import FrameRingBuffer
+from .frame_broadcast import FrameBroadcast
+from .shared_frames import SharedFrameChannel, SharedFrameRingBuffer
+from .metrics import MetricsRegistry, metrics
+from .detection_batch import DetectionBatch
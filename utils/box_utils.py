@@ -0,0 +1,60 @@
+import numpy as np
+
+def to_box_array(bboxes):
+    boxes = np.asarray(bboxes, dtype=np.float64)
+    return boxes.reshape(-1, 4)
+
+def box_areas(boxes):
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+def box_centers(boxes):
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+def box_intersection_matrix(boxes1, boxes2):
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+    return np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+def box_iou_matrix(boxes1, boxes2):
+    if len(boxes1) == 0 or len(boxes2) == 0:
+        return np.zeros((len(boxes1), len(boxes2)))
+
+    intersection = box_intersection_matrix(boxes1, boxes2)
+    union = box_areas(boxes1)[:, None] + box_areas(boxes2)[None, :] - intersection
+
+    iou = np.zeros_like(intersection)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+def box_ios_matrix(boxes1, boxes2):
+    if len(boxes1) == 0 or len(boxes2) == 0:
+        return np.zeros((len(boxes1), len(boxes2)))
+
+    intersection = box_intersection_matrix(boxes1, boxes2)
+    smaller = np.minimum(box_areas(boxes1)[:, None], box_areas(boxes2)[None, :])
+
+    ios = np.zeros_like(intersection)
+    np.divide(intersection, smaller, out=ios, where=smaller > 0)
+    return ios
+
+def non_max_suppression(boxes, scores, labels=None, threshold=0.5, metric='iou', groups=None):
+    overlap_matrix = box_ios_matrix if metric == 'ios' else box_iou_matrix
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    if not len(order):
+        return order
+
+    overlaps = overlap_matrix(boxes[order], boxes[order])
+    if labels is not None:
+        labels = np.asarray(labels)[order]
+        overlaps = np.where(labels[:, None] == labels[None, :], overlaps, 0)
+    if groups is not None:
+        groups = np.asarray(groups)[order]
+        overlaps = np.where(groups[:, None] != groups[None, :], overlaps, 0)
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    for i in range(len(order)):
+        if not suppressed[i]:
+            suppressed[i + 1:] |= overlaps[i, i + 1:] > threshold
+    return order[~suppressed]
@@ -0,0 +1,149 @@
+import numpy as np
+
+from .box_utils import to_box_array, box_areas, box_centers
+
+URBAN_CLASSES = ('person', 'car', 'bus', 'truck', 'motorcycle', 'bicycle')
+VEHICLE_CLASSES = ('car', 'bus', 'truck', 'motorcycle')
+PARKING_CLASSES = ('car', 'bus', 'truck')
+CORE_FIELDS = ('bbox', 'confidence', 'class_id', 'class_name')
+
+class DetectionBatch:
+    def __init__(self, boxes=None, scores=None, class_ids=None, class_names=None, fields=None):
+        self.boxes = to_box_array(boxes if boxes is not None else [])
+        self.scores = np.asarray(scores if scores is not None else [], dtype=np.float64).reshape(-1)
+        self.class_ids = np.asarray(class_ids if class_ids is not None else [], dtype=np.int64).reshape(-1)
+        if isinstance(class_names, dict):
+            self.class_names = class_names
+        else:
+            self.class_names = dict(enumerate(class_names or []))
+        self.fields = fields or {}
+
+    @classmethod
+    def from_tensor(cls, detections, class_names, confidence_threshold=0.0):
+        detections = np.asarray(detections.cpu().numpy() if hasattr(detections, 'cpu') else detections)
+        detections = detections.reshape(-1, 6)
+        detections = detections[detections[:, 4] >= confidence_threshold]
+        return cls(detections[:, :4].astype(np.int64), detections[:, 4], detections[:, 5].astype(np.int64), class_names)
+
+    @classmethod
+    def from_rcnn(cls, prediction, class_names, confidence_threshold=0.0):
+        scores = prediction['scores'].cpu().numpy()
+        keep = scores >= confidence_threshold
+        return cls(prediction['boxes'].cpu().numpy()[keep].astype(np.int64), scores[keep],
+                   prediction['labels'].cpu().numpy()[keep], class_names)
+
+    @classmethod
+    def from_dicts(cls, objects, class_names=None):
+        objects = list(objects)
+        class_names = dict(class_names or {})
+        name_ids = {name: class_id for class_id, name in class_names.items()}
+        class_ids = []
+        fields = {}
+        for index, obj in enumerate(objects):
+            class_id = obj.get('class_id')
+            if class_id is None:
+                class_id = name_ids.setdefault(obj['class_name'], -1 - len(name_ids))
+            class_names.setdefault(class_id, obj['class_name'])
+            class_ids.append(class_id)
+            for key, value in obj.items():
+                if key not in CORE_FIELDS:
+                    fields.setdefault(key, [None] * len(objects))[index] = value
+
+        return cls([obj['bbox'] for obj in objects], [obj.get('confidence', 1.0) for obj in objects],
+                   class_ids, class_names, fields)
+
+    @classmethod
+    def coerce(cls, objects):
+        if isinstance(objects, cls):
+            return objects
+        return cls.from_dicts(objects)
+
+    @classmethod
+    def concatenate(cls, batches):
+        batches = [cls.coerce(batch) for batch in batches]
+        class_names = {}
+        for batch in batches:
+            class_names.update(batch.class_names)
+
+        fields = {}
+        offset = 0
+        total = sum(len(batch) for batch in batches)
+        for batch in batches:
+            for key, values in batch.fields.items():
+                fields.setdefault(key, [None] * total)[offset:offset + len(batch)] = values
+            offset += len(batch)
+
+        return cls(np.concatenate([batch.boxes for batch in batches]) if batches else None,
+                   np.concatenate([batch.scores for batch in batches]) if batches else None,
+                   np.concatenate([batch.class_ids for batch in batches]) if batches else None,
+                   class_names, fields)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.to_dicts([range(len(self))[index]])[0]
+
+        positions = np.arange(len(self))[index]
+        fields = {key: [values[i] for i in positions.tolist()] for key, values in self.fields.items()}
+        return DetectionBatch(self.boxes[index], self.scores[index], self.class_ids[index], self.class_names, fields)
+
+    def __repr__(self):
+        return f"DetectionBatch({len(self)} detections)"
+
+    @property
+    def labels(self):
+        return [self.class_names.get(class_id, str(class_id)) for class_id in self.class_ids.tolist()]
+
+    @property
+    def centers(self):
+        return box_centers(self.boxes)
+
+    @property
+    def areas(self):
+        return box_areas(self.boxes)
+
+    def scale(self, factor):
+        if factor == 1:
+            return self
+        return DetectionBatch(self.boxes * factor, self.scores, self.class_ids, self.class_names, self.fields)
+
+    def ids_for(self, names):
+        names = set(names)
+        return np.array([class_id for class_id, name in self.class_names.items() if name in names], dtype=np.int64)
+
+    def class_mask(self, names):
+        return np.isin(self.class_ids, self.ids_for(names))
+
+    def select(self, names):
+        return self[self.class_mask(names)]
+
+    def count_by_class(self):
+        class_ids, counts = np.unique(self.class_ids, return_counts=True)
+        return {self.class_names.get(class_id, str(class_id)): count
+                for class_id, count in zip(class_ids.tolist(), counts.tolist())}
+
+    def to_dicts(self, positions=None):
+        positions = list(range(len(self))) if positions is None else list(positions)
+
+        objects = []
+        for box, position in zip(self.boxes[positions].astype(int).tolist(), positions):
+            class_id = int(self.class_ids[position])
+            obj = {
+                'bbox': box,
+                'confidence': float(self.scores[position]),
+                'class_id': class_id,
+                'class_name': self.class_names.get(class_id, str(class_id))
+            }
+            for key, values in self.fields.items():
+                if values[position] is not None:
+                    obj[key] = values[position]
+            objects.append(obj)
+        return objects
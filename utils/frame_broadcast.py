@@ -0,0 +1,86 @@
+import threading
+import time
+
+import cv2
+
+class FrameBroadcast:
+    def __init__(self, quality_levels=(50, 70, 85)):
+        self.quality_levels = tuple(sorted(quality_levels))
+        self.condition = threading.Condition()
+        self.encode_lock = threading.Lock()
+        self.frame = None
+        self.timestamp = None
+        self.sequence = 0
+        self.encoded = {}
+        self.viewers = 0
+        self.closed = False
+        self.frames_published = 0
+        self.encodes = 0
+        self.frames_served = 0
+
+    def snap_quality(self, quality):
+        return min(self.quality_levels, key=lambda level: abs(level - quality))
+
+    def publish(self, frame, timestamp=None):
+        with self.condition:
+            self.frame = frame
+            self.timestamp = time.time() if timestamp is None else timestamp
+            self.sequence += 1
+            self.encoded = {}
+            self.frames_published += 1
+            self.condition.notify_all()
+
+    def wait(self, after_sequence=0, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > after_sequence or self.closed, timeout)
+            if self.closed or self.sequence <= after_sequence:
+                return None
+            return self.sequence
+
+    def jpeg(self, quality):
+        quality = self.snap_quality(quality)
+        with self.condition:
+            frame, sequence, encoded = self.frame, self.sequence, self.encoded
+        if frame is None:
+            return sequence, None
+
+        payload = encoded.get(quality)
+        if payload is None:
+            with self.encode_lock:
+                payload = encoded.get(quality)
+                if payload is None:
+                    payload = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+                    encoded[quality] = payload
+                    self.encodes += 1
+        self.frames_served += 1
+        return sequence, payload
+
+    def add_viewer(self):
+        with self.condition:
+            self.viewers += 1
+            self.condition.notify_all()
+
+    def wait_for_viewers(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.viewers > 0 or self.closed, timeout)
+            return self.viewers > 0 and not self.closed
+
+    def remove_viewer(self):
+        with self.condition:
+            self.viewers -= 1
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                'viewers': self.viewers,
+                'sequence': self.sequence,
+                'frames_published': self.frames_published,
+                'encodes': self.encodes,
+                'frames_served': self.frames_served,
+                'quality_levels': list(self.quality_levels)
+            }
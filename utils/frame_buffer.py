@@ -0,0 +1,118 @@
+import threading
+from collections import deque
+
+FREE = 'free'
+WRITING = 'writing'
+READY = 'ready'
+BORROWED = 'borrowed'
+
+class FrameSlot:
+    def __init__(self, index):
+        self.index = index
+        self.frame = None
+        self.timestamp = None
+        self.sequence = None
+        self.state = FREE
+
+class FrameRingBuffer:
+    def __init__(self, num_slots=8):
+        self.slots = [FrameSlot(i) for i in range(num_slots)]
+        self.ready = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.frames_written = 0
+        self.dropped = 0
+        self.overwritten = 0
+        self.skipped = 0
+        self.reallocations = 0
+
+    def acquire_write_slot(self):
+        with self.condition:
+            for slot in self.slots:
+                if slot.state == FREE:
+                    slot.state = WRITING
+                    return slot
+
+            if self.ready:
+                slot = self.slots[self.ready.popleft()]
+                slot.state = WRITING
+                self.overwritten += 1
+                return slot
+
+            self.dropped += 1
+            return None
+
+    def write(self, slot, reader):
+        ret, frame = reader(slot.frame)
+        if ret and frame is not slot.frame:
+            if slot.frame is not None:
+                self.reallocations += 1
+            slot.frame = frame
+        return ret
+
+    def commit(self, slot, timestamp, sequence):
+        with self.condition:
+            slot.timestamp = timestamp
+            slot.sequence = sequence
+            slot.state = READY
+            self.ready.append(slot.index)
+            self.frames_written += 1
+            self.condition.notify()
+
+    def abort(self, slot):
+        with self.condition:
+            slot.state = FREE
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def borrow(self, block=True, timeout=None):
+        with self.condition:
+            if block and not self.ready:
+                self.condition.wait_for(lambda: self.ready or self.closed, timeout)
+            if not self.ready:
+                return None
+
+            slot = self.slots[self.ready.popleft()]
+            slot.state = BORROWED
+            return slot
+
+    def borrow_latest(self):
+        with self.condition:
+            skipped = 0
+            while len(self.ready) > 1:
+                self.slots[self.ready.popleft()].state = FREE
+                skipped += 1
+            self.skipped += skipped
+
+            if not self.ready:
+                return None, skipped
+
+            slot = self.slots[self.ready.popleft()]
+            slot.state = BORROWED
+            return slot, skipped
+
+    def release(self, slot):
+        with self.condition:
+            if slot.state == BORROWED:
+                slot.state = FREE
+
+    def has_frames(self):
+        return bool(self.ready)
+
+    def get_stats(self):
+        with self.condition:
+            states = [slot.state for slot in self.slots]
+            return {
+                'num_slots': len(self.slots),
+                'queue_depth': len(self.ready),
+                'ready': states.count(READY),
+                'borrowed': states.count(BORROWED),
+                'frames_written': self.frames_written,
+                'dropped': self.dropped,
+                'overwritten': self.overwritten,
+                'skipped': self.skipped,
+                'reallocations': self.reallocations
+            }
@@ -0,0 +1,111 @@
+import threading
+import time
+
+class FrameScheduler:
+    def __init__(self, processors, target_fps=None, stale_timeout=2.0, borrow_frames=False):
+        self.processors = processors
+        self.borrow_frames = borrow_frames
+        self.camera_ids = list(processors.keys())
+        self.stale_timeout = stale_timeout
+        self.frame_ready = threading.Event()
+        self.next_start = 0
+
+        if isinstance(target_fps, dict):
+            self.target_fps = dict(target_fps)
+        else:
+            self.target_fps = {cam_id: target_fps for cam_id in self.camera_ids}
+
+        self.next_due = {cam_id: 0.0 for cam_id in self.camera_ids}
+        self.delivered = {cam_id: 0 for cam_id in self.camera_ids}
+        self.skipped = {cam_id: 0 for cam_id in self.camera_ids}
+        self.last_delivered_sequence = {cam_id: None for cam_id in self.camera_ids}
+
+        for processor in processors.values():
+            processor.add_frame_callback(self._on_frame)
+
+    def _on_frame(self, processor):
+        self.frame_ready.set()
+
+    def poll(self, max_frames=None):
+        now = time.time()
+        count = len(self.camera_ids)
+        order = [self.camera_ids[(self.next_start + i) % count] for i in range(count)]
+
+        packets = []
+        for cam_id in order:
+            if max_frames is not None and len(packets) >= max_frames:
+                break
+            if now < self.next_due[cam_id]:
+                continue
+
+            packet, skipped = self.processors[cam_id].read_latest(self.borrow_frames)
+            if packet is None:
+                continue
+
+            packet['camera_id'] = cam_id
+            packets.append(packet)
+            self.skipped[cam_id] += skipped
+            self.delivered[cam_id] += 1
+            self.last_delivered_sequence[cam_id] = packet['sequence']
+
+            fps = self.target_fps.get(cam_id)
+            if fps:
+                interval = 1.0 / fps
+                base = self.next_due[cam_id] if now - self.next_due[cam_id] < interval else now
+                self.next_due[cam_id] = base + interval
+
+        if packets and count:
+            last_index = self.camera_ids.index(packets[-1]['camera_id'])
+            self.next_start = (last_index + 1) % count
+        return packets
+
+    def wait(self, timeout=None, max_frames=None):
+        deadline = None if timeout is None else time.time() + timeout
+
+        while True:
+            self.frame_ready.clear()
+            packets = self.poll(max_frames)
+            if packets:
+                return packets
+
+            if all(processor.finished and not processor.has_frames() for processor in self.processors.values()):
+                return []
+
+            now = time.time()
+            wait_time = None if deadline is None else deadline - now
+            if wait_time is not None and wait_time <= 0:
+                return []
+
+            pending_due = [self.next_due[cam_id] - now for cam_id in self.camera_ids
+                           if self.processors[cam_id].has_frames() and self.next_due[cam_id] > now]
+            if pending_due:
+                wait_time = min(pending_due) if wait_time is None else min(wait_time, min(pending_due))
+
+            self.frame_ready.wait(wait_time)
+
+    def get_stale_cameras(self):
+        now = time.time()
+        stale = []
+        for cam_id, processor in self.processors.items():
+            last_activity = processor.last_capture_time or processor.start_time
+            if processor.finished or last_activity is None or now - last_activity > self.stale_timeout:
+                stale.append(cam_id)
+        return stale
+
+    def get_camera_status(self):
+        now = time.time()
+        stale = set(self.get_stale_cameras())
+        status = {}
+        for cam_id, processor in self.processors.items():
+            last_capture = processor.last_capture_time
+            status[cam_id] = {
+                'stale': cam_id in stale,
+                'finished': processor.finished,
+                'frame_age': now - last_capture if last_capture is not None else None,
+                'frames_captured': processor.frames_captured,
+                'frames_delivered': self.delivered[cam_id],
+                'frames_skipped': self.skipped[cam_id],
+                'last_sequence': self.last_delivered_sequence[cam_id],
+                'target_fps': self.target_fps.get(cam_id)
+            }
+        return status
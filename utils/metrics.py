@@ -0,0 +1,203 @@
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+class Counter:
+    def __init__(self, callback=None):
+        self.value = 0
+        self.callback = callback
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [(name, labels, self.callback() if self.callback else self.value)]
+
+class Gauge:
+    def __init__(self, callback=None):
+        self.value = 0
+        self.callback = callback
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, labels):
+        value = self.callback() if self.callback else self.value
+        return [(name, labels, value)]
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels):
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            samples.append((f'{name}_bucket', labels + (('le', repr(bound)),), cumulative))
+        cumulative += counts[-1]
+        samples.append((f'{name}_bucket', labels + (('le', '+Inf'),), cumulative))
+        samples.append((f'{name}_sum', labels, total))
+        samples.append((f'{name}_count', labels, cumulative))
+        return samples
+
+class MetricsRegistry:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def _get(self, metric_type, name, help_text, labels, factory):
+        label_key = tuple(sorted((labels or {}).items()))
+        with self.lock:
+            family = self.families.setdefault(name, {'type': metric_type, 'help': help_text, 'children': {}})
+            metric = family['children'].get(label_key)
+            if metric is None:
+                metric = factory()
+                family['children'][label_key] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=None, callback=None):
+        return self._get('counter', name, help_text, labels, lambda: Counter(callback))
+
+    def gauge(self, name, help_text, labels=None, callback=None):
+        return self._get('gauge', name, help_text, labels, lambda: Gauge(callback))
+
+    def histogram(self, name, help_text, labels=None, buckets=DEFAULT_BUCKETS):
+        return self._get('histogram', name, help_text, labels, lambda: Histogram(buckets))
+
+    def render_prometheus(self):
+        with self.lock:
+            families = [(name, dict(family), dict(family['children'])) for name, family in self.families.items()]
+
+        lines = []
+        for name, family, children in sorted(families):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, metric in children.items():
+                for sample_name, sample_labels, value in metric.samples(name, labels):
+                    lines.append(f"{sample_name}{format_labels(sample_labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+def instrument(obj, method_name, stage, registry=None):
+    registry = registry or metrics
+    if obj is None or not registry.enabled:
+        return obj
+
+    method = getattr(obj, method_name, None)
+    if method is None or getattr(method, '_instrumented', False):
+        return obj
+
+    histogram = registry.histogram('smartcity_stage_duration_seconds', 'Time spent in each processing stage',
+                                   {'stage': stage})
+    errors = registry.counter('smartcity_stage_errors_total', 'Exceptions raised by each processing stage',
+                              {'stage': stage})
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start_time)
+
+    wrapper._instrumented = True
+    setattr(obj, method_name, wrapper)
+    return obj
+
+def instrument_video_processor(processor, camera_id='default', registry=None):
+    registry = registry or metrics
+    if processor is None or not registry.enabled:
+        return processor
+
+    labels = {'camera': camera_id}
+    registry.gauge('smartcity_video_queue_depth', 'Frames waiting in the capture buffer', labels,
+                   lambda: processor.get_buffer_stats()['queue_depth'])
+    registry.counter('smartcity_video_frames_captured_total', 'Frames captured from the source', labels,
+                     lambda: processor.frames_captured)
+    registry.counter('smartcity_video_frames_dropped_total', 'Frames dropped because the capture buffer was full',
+                     labels, lambda: processor.get_buffer_stats()['dropped'])
+    registry.counter('smartcity_video_frames_overwritten_total', 'Unread frames overwritten by newer ones', labels,
+                     lambda: processor.get_buffer_stats().get('overwritten', 0))
+    return processor
+
+def instrument_components(detector=None, traffic_analyzer=None, crowd_analyzer=None, parking_analyzer=None,
+                          pedestrian_tracker=None, visualizer=None, registry=None):
+    columnar = hasattr(detector, 'detect')
+    instrument(detector, 'detect' if columnar else 'detect_objects', 'detect', registry)
+    instrument(detector, 'detect_batch' if columnar else 'detect_objects_batch', 'detect_batch', registry)
+    instrument(traffic_analyzer, 'analyze_traffic_flow', 'traffic', registry)
+    instrument(crowd_analyzer, 'analyze_crowd_density', 'crowd', registry)
+    instrument(parking_analyzer, 'analyze_parking_occupancy', 'parking', registry)
+    instrument(pedestrian_tracker, 'update_tracks', 'pedestrian', registry)
+    instrument(visualizer, 'render', 'render', registry)
+
+def instrument_pipeline(pipeline, registry=None):
+    registry = registry or metrics
+    if pipeline is None or not registry.enabled:
+        return pipeline
+
+    for stage in pipeline.stages:
+        labels = {'stage': stage.name}
+        registry.gauge('smartcity_pipeline_queue_depth', 'Items waiting in front of each pipeline stage', labels,
+                       stage.input_queue.qsize)
+        registry.counter('smartcity_pipeline_processed_total', 'Items processed by each pipeline stage', labels,
+                         lambda stage=stage: stage.processed)
+        registry.counter('smartcity_pipeline_dropped_total', 'Items dropped by backpressure in front of each stage',
+                         labels, lambda stage=stage: stage.input_queue.dropped)
+    return pipeline
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = metrics
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+
+        body = self.registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port=9100, host='0.0.0.0'):
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
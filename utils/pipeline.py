@@ -0,0 +1,183 @@
+import logging
+import threading
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+class StageQueue:
+    def __init__(self, maxsize=8, policy='block'):
+        if policy not in ('block', 'drop_oldest'):
+            raise ValueError("Unsupported backpressure policy")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    def put(self, item, on_drop=None):
+        if self.policy == 'block' or item[1] is _END:
+            self.queue.put(item)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                if dropped[1] is _END:
+                    self.queue.put(dropped)
+                    continue
+                self.dropped += 1
+                if on_drop:
+                    on_drop(dropped)
+
+    def get(self):
+        return self.queue.get()
+
+    def qsize(self):
+        return self.queue.qsize()
+
+class PipelineStage:
+    def __init__(self, name, func, queue_size=8, policy='block'):
+        self.name = name
+        self.func = func
+        self.input_queue = StageQueue(queue_size, policy)
+        self.processed = 0
+        self.busy_time = 0.0
+        self.max_queue_depth = 0
+        self.errors = 0
+        self.last_error = None
+        self.thread = None
+
+    def get_stats(self, elapsed):
+        return {
+            'processed': self.processed,
+            'throughput': self.processed / elapsed if elapsed > 0 else 0,
+            'avg_latency': self.busy_time / self.processed if self.processed else 0,
+            'utilization': self.busy_time / elapsed if elapsed > 0 else 0,
+            'queue_depth': self.input_queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'dropped': self.input_queue.dropped,
+            'errors': self.errors
+        }
+
+class Pipeline:
+    def __init__(self, stages, output_queue_size=8, on_discard=None):
+        self.stages = stages
+        self.on_discard = on_discard
+        self.output_queue = StageQueue(output_queue_size, 'block')
+        self.dropped_sequences = set()
+        self.drop_lock = threading.Lock()
+        self.start_time = None
+        self.feeder = None
+        self.stop_event = threading.Event()
+
+    def _discard(self, entry):
+        sequence, item = entry
+        with self.drop_lock:
+            self.dropped_sequences.add(sequence)
+        if self.on_discard:
+            self.on_discard(item)
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        next_queue = self.stages[index + 1].input_queue if index + 1 < len(self.stages) else self.output_queue
+
+        while True:
+            sequence, item = stage.input_queue.get()
+            if item is _END:
+                next_queue.put((sequence, _END))
+                break
+
+            start_time = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                stage.errors += 1
+                if not self.stop_event.is_set():
+                    if repr(e) != stage.last_error:
+                        logger.exception("Pipeline stage %s failed on item %d", stage.name, sequence)
+                    else:
+                        logger.debug("Pipeline stage %s failed on item %d: %r", stage.name, sequence, e)
+                stage.last_error = repr(e)
+                result = None
+            stage.busy_time += time.perf_counter() - start_time
+            stage.processed += 1
+
+            if result is None:
+                self._discard((sequence, item))
+                continue
+            next_queue.put((sequence, result), self._discard)
+
+    def _feed(self, source):
+        first_queue = self.stages[0].input_queue
+        sequence = 0
+        for item in source:
+            if item is None or self.stop_event.is_set():
+                break
+            first_queue.put((sequence, item), self._discard)
+            sequence += 1
+            for stage in self.stages:
+                stage.max_queue_depth = max(stage.max_queue_depth, stage.input_queue.qsize())
+        first_queue.put((sequence, _END))
+
+    def run(self, source):
+        self.start_time = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            stage.thread = threading.Thread(target=self._run_stage, args=(index,), daemon=True)
+            stage.thread.start()
+
+        self.feeder = threading.Thread(target=self._feed, args=(source,), daemon=True)
+        self.feeder.start()
+
+        next_sequence = 0
+        pending = {}
+        while True:
+            sequence, item = self.output_queue.get()
+            if item is _END:
+                break
+            pending[sequence] = item
+
+            while True:
+                if next_sequence in pending:
+                    yield pending.pop(next_sequence)
+                    next_sequence += 1
+                    continue
+                with self.drop_lock:
+                    if next_sequence in self.dropped_sequences:
+                        self.dropped_sequences.discard(next_sequence)
+                        next_sequence += 1
+                        continue
+                break
+
+        for sequence in sorted(pending):
+            yield pending[sequence]
+
+    def stop(self):
+        self.stop_event.set()
+        for stage in self.stages:
+            close = getattr(stage.func, 'close', None)
+            if close is not None:
+                close()
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+        return {stage.name: stage.get_stats(elapsed) for stage in self.stages}
+
+def parallel_stage(tasks, max_workers=None):
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks))
+
+    def run(item):
+        futures = {name: executor.submit(task, item) for name, task in tasks.items()}
+        for name, future in futures.items():
+            item[name] = future.result()
+        return item
+
+    run.close = lambda: executor.shutdown(wait=False, cancel_futures=True)
+    return run
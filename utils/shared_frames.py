@@ -0,0 +1,201 @@
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .frame_buffer import FrameRingBuffer, FREE, WRITING
+
+SEQUENCE, REFCOUNT, HEIGHT, WIDTH, CHANNELS = range(5)
+INVALID_SEQUENCE = -1
+HEADER_ALIGNMENT = 64
+
+class FrameRef:
+    __slots__ = ('channel', 'slot', 'sequence', 'shape', 'timestamp')
+
+    def __init__(self, channel, slot, sequence, shape, timestamp):
+        self.channel = channel
+        self.slot = slot
+        self.sequence = sequence
+        self.shape = shape
+        self.timestamp = timestamp
+
+    def __getstate__(self):
+        return (self.channel, self.slot, self.sequence, self.shape, self.timestamp)
+
+    def __setstate__(self, state):
+        self.channel, self.slot, self.sequence, self.shape, self.timestamp = state
+
+    def __repr__(self):
+        return f"FrameRef({self.channel!r}, slot={self.slot}, sequence={self.sequence})"
+
+class SharedFrameChannel:
+    def __init__(self, frame_shape, num_slots=8, name=None, lock=None, create=True):
+        self.frame_shape = tuple(frame_shape)
+        self.num_slots = num_slots
+        self.slot_bytes = int(np.prod(self.frame_shape))
+        self.lock = lock or multiprocessing.get_context('spawn').Lock()
+        self.owner = create
+
+        meta_bytes = num_slots * 5 * 8
+        timestamp_bytes = num_slots * 8
+        self.data_offset = -(-(meta_bytes + timestamp_bytes) // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+        size = self.data_offset + num_slots * self.slot_bytes
+
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        self.meta = np.ndarray((num_slots, 5), dtype=np.int64, buffer=self.shm.buf)
+        self.timestamps = np.ndarray((num_slots,), dtype=np.float64, buffer=self.shm.buf, offset=meta_bytes)
+        self.data = np.ndarray((num_slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf,
+                               offset=self.data_offset)
+
+        if create:
+            self.meta[:] = 0
+            self.meta[:, SEQUENCE] = INVALID_SEQUENCE
+            self.timestamps[:] = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.stale_reads = 0
+
+    def __getstate__(self):
+        return {'frame_shape': self.frame_shape, 'num_slots': self.num_slots, 'name': self.name, 'lock': self.lock}
+
+    def __setstate__(self, state):
+        self.__init__(state['frame_shape'], state['num_slots'], state['name'], state['lock'], create=False)
+
+    def slot_view(self, index, shape=None):
+        shape = tuple(shape or self.frame_shape)
+        return self.data[index, :int(np.prod(shape))].reshape(shape)
+
+    def claim(self, index):
+        with self.lock:
+            if self.meta[index, REFCOUNT] != 0:
+                return False
+            self.meta[index, SEQUENCE] = INVALID_SEQUENCE
+            return True
+
+    def publish(self, index, sequence, shape, timestamp, holders=0):
+        with self.lock:
+            self.meta[index, HEIGHT:CHANNELS + 1] = (list(shape) + [1])[:3]
+            self.timestamps[index] = timestamp
+            self.meta[index, REFCOUNT] = holders
+            self.meta[index, SEQUENCE] = sequence
+            self.written += 1
+
+    def write(self, frame, sequence, timestamp, holders=1):
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit in {self.slot_bytes} byte slots")
+
+        with self.lock:
+            candidates = np.flatnonzero(self.meta[:, REFCOUNT] == 0)
+            if not len(candidates):
+                self.dropped += 1
+                return None
+            index = int(candidates[np.argmin(self.meta[candidates, SEQUENCE])])
+            self.meta[index, SEQUENCE] = INVALID_SEQUENCE
+            self.meta[index, REFCOUNT] = -1
+
+        np.copyto(self.slot_view(index, frame.shape), frame)
+        self.publish(index, sequence, frame.shape, timestamp, holders)
+        return FrameRef(self.name, index, sequence, frame.shape, timestamp)
+
+    def retain(self, index, sequence):
+        with self.lock:
+            if self.meta[index, SEQUENCE] != sequence or self.meta[index, REFCOUNT] < 0:
+                return None
+            self.meta[index, REFCOUNT] += 1
+            shape = tuple(int(value) for value in self.meta[index, HEIGHT:CHANNELS + 1])
+            return FrameRef(self.name, index, sequence, shape, float(self.timestamps[index]))
+
+    def view(self, ref):
+        with self.lock:
+            valid = self.meta[ref.slot, SEQUENCE] == ref.sequence and self.meta[ref.slot, REFCOUNT] > 0
+        if not valid:
+            self.stale_reads += 1
+            return None
+        return self.slot_view(ref.slot, ref.shape)
+
+    def release(self, ref):
+        with self.lock:
+            if self.meta[ref.slot, SEQUENCE] == ref.sequence and self.meta[ref.slot, REFCOUNT] > 0:
+                self.meta[ref.slot, REFCOUNT] -= 1
+
+    def refcount(self, index):
+        return int(self.meta[index, REFCOUNT])
+
+    def close(self):
+        self.meta = self.timestamps = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+    def get_stats(self):
+        with self.lock:
+            refcounts = self.meta[:, REFCOUNT].copy()
+        return {
+            'name': self.name,
+            'num_slots': self.num_slots,
+            'slot_bytes': self.slot_bytes,
+            'held': int((refcounts > 0).sum()),
+            'written': self.written,
+            'dropped': self.dropped,
+            'stale_reads': self.stale_reads
+        }
+
+class SharedFrameRingBuffer(FrameRingBuffer):
+    def __init__(self, frame_shape, num_slots=8, lock=None):
+        super().__init__(num_slots)
+        self.channel = SharedFrameChannel(frame_shape, num_slots, lock=lock)
+        for slot in self.slots:
+            slot.frame = self.channel.slot_view(slot.index)
+
+    def acquire_write_slot(self):
+        with self.condition:
+            for slot in self.slots:
+                if slot.state == FREE and self.channel.claim(slot.index):
+                    slot.state = WRITING
+                    return slot
+
+            for position, index in enumerate(self.ready):
+                if self.channel.claim(index):
+                    del self.ready[position]
+                    slot = self.slots[index]
+                    slot.state = WRITING
+                    self.overwritten += 1
+                    return slot
+
+            self.dropped += 1
+            return None
+
+    def write(self, slot, reader):
+        ret, frame = reader(slot.frame)
+        if ret and frame is not slot.frame:
+            if frame.nbytes > self.channel.slot_bytes:
+                raise ValueError(f"Frame of shape {frame.shape} does not fit in shared slots sized for "
+                                 f"{self.channel.frame_shape}")
+            slot.frame = self.channel.slot_view(slot.index, frame.shape)
+            np.copyto(slot.frame, frame)
+            self.reallocations += 1
+        return ret
+
+    def commit(self, slot, timestamp, sequence):
+        self.channel.publish(slot.index, sequence, slot.frame.shape, timestamp)
+        super().commit(slot, timestamp, sequence)
+
+    def share(self, slot):
+        return self.channel.retain(slot.index, slot.sequence)
+
+    def destroy(self):
+        self.channel.close()
+        self.channel.unlink()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['shared_held'] = self.channel.get_stats()['held']
+        return stats
@@ -1,21 +1,50 @@
 import cv2
+import logging
 import numpy as np
 import threading
 import queue
 import time
 
+from .frame_scheduler import FrameScheduler
+from .frame_buffer import FrameRingBuffer
+from .shared_frames import SharedFrameRingBuffer
+
+DROPPED = 'dropped'
+
+logger = logging.getLogger(__name__)
+
 class VideoProcessor:
-    def __init__(self, source=0, buffer_size=64):
+    def __init__(self, source=0, buffer_size=64, camera_id=None, ring_slots=None, shared_slots=None):
         self.source = source
+        self.shared_slots = shared_slots
+        self.camera_id = camera_id
         self.buffer_size = buffer_size
         self.frame_queue = queue.Queue(maxsize=buffer_size)
+        self.ring_buffer = FrameRingBuffer(ring_slots) if ring_slots else None
+        self.frames_dropped = 0
         self.running = False
+        self.finished = False
         self.thread = None
         self.cap = None
+        self.frames_captured = 0
+        self.start_time = None
+        self.last_capture_time = None
+        self.error = None
+        self.frame_callbacks = []
+    
+    def add_frame_callback(self, callback):
+        self.frame_callbacks.append(callback)
         
     def start(self):
         self.running = True
+        self.finished = False
+        self.start_time = time.time()
         self.cap = cv2.VideoCapture(self.source)
+        if self.shared_slots:
+            width, height = self.get_frame_size()
+            if not width or not height:
+                width, height = 1920, 1080
+            self.ring_buffer = SharedFrameRingBuffer((height, width, 3), self.shared_slots)
         self.thread = threading.Thread(target=self._capture_frames)
         self.thread.start()
     
@@ -25,26 +54,153 @@ class VideoProcessor:
             self.thread.join()
         if self.cap:
             self.cap.release()
+        if self.shared_channel is not None:
+            self.ring_buffer.destroy()
+    
+    @property
+    def shared_channel(self):
+        return getattr(self.ring_buffer, 'channel', None)
+    
+    def share(self, packet):
+        return self.ring_buffer.share(packet['slot'])
     
     def _capture_frames(self):
         while self.running:
-            ret, frame = self.cap.read()
+            if self.ring_buffer is not None:
+                ret = self._capture_into_ring_buffer()
+            else:
+                ret = self._capture_into_queue()
             if not ret:
                 break
+            if ret is DROPPED:
+                self.frames_dropped += 1
+                continue
             
-            if self.frame_queue.full():
-                try:
-                    self.frame_queue.get_nowait()
-                except queue.Empty:
-                    pass
+            self.frames_captured += 1
             
-            self.frame_queue.put(frame)
+            for callback in self.frame_callbacks:
+                callback(self)
+        
+        self.finished = True
+        if self.ring_buffer is not None:
+            self.ring_buffer.close()
+        for callback in self.frame_callbacks:
+            callback(self)
+    
+    def _capture_into_queue(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return False
+        
+        timestamp = time.time()
+        
+        if self.frame_queue.full():
+            try:
+                self.frame_queue.get_nowait()
+                self.frames_dropped += 1
+            except queue.Empty:
+                pass
+        
+        self.frame_queue.put((frame, timestamp, self.frames_captured))
+        self.last_capture_time = timestamp
+        return True
+    
+    def _capture_into_ring_buffer(self):
+        slot = self.ring_buffer.acquire_write_slot()
+        if slot is None:
+            return DROPPED if self.cap.grab() else False
+        
+        try:
+            written = self.ring_buffer.write(slot, self.cap.read)
+        except ValueError as e:
+            self.ring_buffer.abort(slot)
+            self.error = e
+            logger.error("Stopping capture for %s: %s", self.camera_id or self.source, e)
+            return False
+        
+        if not written:
+            self.ring_buffer.abort(slot)
+            return False
+        
+        timestamp = time.time()
+        self.ring_buffer.commit(slot, timestamp, self.frames_captured)
+        self.last_capture_time = timestamp
+        return True
     
     def read(self):
+        packet = self.read_packet(timeout=1.0)
+        return packet['frame'] if packet else None
+    
+    def read_packet(self, block=True, timeout=None, borrow=False):
+        if self.ring_buffer is not None:
+            return self._slot_packet(self.ring_buffer.borrow(block, timeout), borrow)
+        
         try:
-            return self.frame_queue.get(timeout=1.0)
+            frame, timestamp, sequence = self.frame_queue.get(block, timeout)
         except queue.Empty:
             return None
+        
+        return {
+            'camera_id': self.camera_id,
+            'frame': frame,
+            'timestamp': timestamp,
+            'sequence': sequence
+        }
+    
+    def _slot_packet(self, slot, borrow):
+        if slot is None:
+            return None
+        
+        packet = {
+            'camera_id': self.camera_id,
+            'frame': slot.frame if borrow else slot.frame.copy(),
+            'timestamp': slot.timestamp,
+            'sequence': slot.sequence
+        }
+        
+        if borrow:
+            packet['slot'] = slot
+        else:
+            self.ring_buffer.release(slot)
+        return packet
+    
+    def release(self, packet):
+        slot = packet.pop('slot', None)
+        if slot is not None:
+            self.ring_buffer.release(slot)
+    
+    def read_latest(self, borrow=False):
+        if self.ring_buffer is not None:
+            slot, skipped = self.ring_buffer.borrow_latest()
+            return self._slot_packet(slot, borrow), skipped
+        
+        latest = None
+        skipped = 0
+        while True:
+            packet = self.read_packet(block=False)
+            if packet is None:
+                break
+            if latest is not None:
+                skipped += 1
+            latest = packet
+        
+        return latest, skipped
+    
+    def has_frames(self):
+        if self.ring_buffer is not None:
+            return self.ring_buffer.has_frames()
+        return not self.frame_queue.empty()
+    
+    def get_buffer_stats(self):
+        if self.ring_buffer is not None:
+            return self.ring_buffer.get_stats()
+        
+        return {
+            'queue_depth': self.frame_queue.qsize(),
+            'capacity': self.buffer_size,
+            'frames_written': self.frames_captured,
+            'dropped': self.frames_dropped
+        }
     
     def get_frame_size(self):
         if self.cap:
@@ -54,12 +210,17 @@ class VideoProcessor:
         return (640, 480)
 
 class MultiCameraProcessor:
-    def __init__(self, camera_sources):
+    def __init__(self, camera_sources, target_fps=None, stale_timeout=2.0, ring_slots=None, borrow_frames=False,
+                 shared_slots=None):
         self.camera_sources = camera_sources
         self.processors = {}
         
         for cam_id, source in camera_sources.items():
-            self.processors[cam_id] = VideoProcessor(source)
+            self.processors[cam_id] = VideoProcessor(source, camera_id=cam_id, ring_slots=ring_slots,
+                                                     shared_slots=shared_slots)
+        
+        self.scheduler = FrameScheduler(self.processors, target_fps=target_fps, stale_timeout=stale_timeout,
+                                        borrow_frames=borrow_frames)
     
     def start_all(self):
         for processor in self.processors.values():
@@ -69,10 +230,21 @@ class MultiCameraProcessor:
         for processor in self.processors.values():
             processor.stop()
     
-    def read_all(self):
-        frames = {}
-        for cam_id, processor in self.processors.items():
-            frame = processor.read()
-            if frame is not None:
-                frames[cam_id] = frame
-        return frames
\ No newline at end of file
+    def read_all(self, timeout=1.0):
+        packets = self.scheduler.wait(timeout)
+        return {packet['camera_id']: packet['frame'] for packet in packets}
+    
+    def read_ready(self, timeout=None):
+        if timeout is None:
+            return self.scheduler.poll()
+        return self.scheduler.wait(timeout)
+    
+    def release(self, packet):
+        self.processors[packet['camera_id']].release(packet)
+    
+    def share(self, packet):
+        return self.processors[packet['camera_id']].share(packet)
+    
+    def get_shared_channels(self):
+        return [processor.shared_channel for processor in self.processors.values()
+                if processor.shared_channel is not None]
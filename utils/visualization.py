@@ -1,10 +1,29 @@
 import cv2
 import numpy as np
+from collections import OrderedDict
 import matplotlib.pyplot as plt
 from matplotlib import cm
 
-class Visualization:
+class RenderPlan:
     def __init__(self):
+        self.primitives = []
+    
+    def add_rectangle(self, pt1, pt2, color, thickness):
+        self.primitives.append(('rectangle', pt1, pt2, color, thickness))
+    
+    def add_text(self, text, org, font_scale, color, thickness):
+        self.primitives.append(('text', text, org, font_scale, color, thickness))
+    
+    def extend(self, other):
+        self.primitives.extend(other.primitives)
+    
+    def __len__(self):
+        return len(self.primitives)
+
+class Visualization:
+    def __init__(self, text_cache_size=1024):
+        self.text_size_cache = OrderedDict()
+        self.text_cache_size = text_cache_size
         self.colors = {
             'car': (0, 255, 0),
             'person': (255, 0, 0),
@@ -13,9 +32,20 @@ class Visualization:
             'motorcycle': (0, 255, 255)
         }
     
-    def draw_detections(self, image, objects, show_labels=True):
-        result_image = image.copy()
+    def measure_text(self, text, font_scale, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+        key = (text, font, font_scale, thickness)
+        size = self.text_size_cache.get(key)
+        if size is not None:
+            self.text_size_cache.move_to_end(key)
+            return size
         
+        size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+        self.text_size_cache[key] = size
+        if len(self.text_size_cache) > self.text_cache_size:
+            self.text_size_cache.popitem(last=False)
+        return size
+    
+    def plan_detections(self, plan, objects, show_labels=True):
         for obj in objects:
             bbox = obj['bbox']
             class_name = obj['class_name']
@@ -23,27 +53,20 @@ class Visualization:
             
             color = self.colors.get(class_name, (255, 255, 255))
             
-            cv2.rectangle(result_image, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
+            plan.add_rectangle((bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
             
             if show_labels:
                 label = f"{class_name}: {confidence:.2f}"
-                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+                label_size = self.measure_text(label, 0.5, 2)
                 
-                cv2.rectangle(result_image, 
-                            (bbox[0], bbox[1] - label_size[1] - 10),
-                            (bbox[0] + label_size[0], bbox[1]), 
-                            color, -1)
-                
-                cv2.putText(result_image, label, 
-                          (bbox[0], bbox[1] - 5), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+                plan.add_rectangle((bbox[0], bbox[1] - label_size[1] - 10),
+                                   (bbox[0] + label_size[0], bbox[1]),
+                                   color, -1)
+                plan.add_text(label, (bbox[0], bbox[1] - 5), 0.5, (255, 255, 255), 2)
         
-        return result_image
+        return plan
     
-    def draw_traffic_analysis(self, image, analysis):
-        result_image = image.copy()
-        height, width = image.shape[:2]
-        
+    def plan_traffic_analysis(self, plan, analysis):
         congestion_level = analysis['congestion_level']
         vehicle_count = analysis['total_vehicles']
         
@@ -56,19 +79,14 @@ class Visualization:
         else:
             color = (0, 0, 255)
         
-        cv2.rectangle(result_image, (10, 10), (300, 120), (0, 0, 0), -1)
-        cv2.putText(result_image, f"Congestion: {congestion_level}", (20, 40), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        cv2.putText(result_image, f"Vehicles: {vehicle_count}", (20, 70), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(result_image, f"Density: {analysis['traffic_density']:.1f}%", (20, 100), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        plan.add_rectangle((10, 10), (300, 120), (0, 0, 0), -1)
+        plan.add_text(f"Congestion: {congestion_level}", (20, 40), 0.7, color, 2)
+        plan.add_text(f"Vehicles: {vehicle_count}", (20, 70), 0.7, (255, 255, 255), 2)
+        plan.add_text(f"Density: {analysis['traffic_density']:.1f}%", (20, 100), 0.7, (255, 255, 255), 2)
         
-        return result_image
+        return plan
     
-    def draw_crowd_density(self, image, analysis):
-        result_image = image.copy()
-        
+    def plan_crowd_density(self, plan, analysis):
         total_people = analysis['total_people']
         density_level = analysis['density_level']
         
@@ -83,14 +101,37 @@ class Visualization:
         else:
             color = (128, 0, 128)
         
-        cv2.rectangle(result_image, (10, 10), (300, 90), (0, 0, 0), -1)
-        cv2.putText(result_image, f"Crowd: {density_level}", (20, 40), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        cv2.putText(result_image, f"People: {total_people}", (20, 70), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        plan.add_rectangle((10, 10), (300, 90), (0, 0, 0), -1)
+        plan.add_text(f"Crowd: {density_level}", (20, 40), 0.7, color, 2)
+        plan.add_text(f"People: {total_people}", (20, 70), 0.7, (255, 255, 255), 2)
+        
+        return plan
+    
+    def render(self, image, plan, in_place=False):
+        result_image = image if in_place else image.copy()
+        
+        for primitive in plan.primitives:
+            if primitive[0] == 'rectangle':
+                _, pt1, pt2, color, thickness = primitive
+                cv2.rectangle(result_image, pt1, pt2, color, thickness)
+            else:
+                _, text, org, font_scale, color, thickness = primitive
+                cv2.putText(result_image, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
         
         return result_image
     
+    def draw_detections(self, image, objects, show_labels=True, in_place=False):
+        plan = self.plan_detections(RenderPlan(), objects, show_labels)
+        return self.render(image, plan, in_place)
+    
+    def draw_traffic_analysis(self, image, analysis, in_place=False):
+        plan = self.plan_traffic_analysis(RenderPlan(), analysis)
+        return self.render(image, plan, in_place)
+    
+    def draw_crowd_density(self, image, analysis, in_place=False):
+        plan = self.plan_crowd_density(RenderPlan(), analysis)
+        return self.render(image, plan, in_place)
+    
     def create_heatmap(self, points, image_shape, radius=20):
         heatmap = np.zeros(image_shape[:2], dtype=np.float32)
         